@@ -4,6 +4,9 @@ from typing import Dict
 import dolphin
 import gc
 
+from ..config import settings
+from ..utils.pcm_cache import PCM_SAMPLE_RATE, pcm_cache, to_float32
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -37,9 +40,12 @@ class DialogueTranscriptionEngine:
         try:
             logger.info(f"開始單線程處理音頻: {audio_path}")
             
-            # Load audio once at the beginning
-            waveform = dolphin.load_audio(audio_path)
-            sample_rate = 16000
+            # Load audio once at the beginning (memory-mapped int16 from the cache on re-runs)
+            if settings.PCM_CACHE_ENABLED:
+                waveform = pcm_cache.load(audio_path, dolphin.load_audio)
+            else:
+                waveform = dolphin.load_audio(audio_path)
+            sample_rate = PCM_SAMPLE_RATE
             total_duration = len(waveform) / sample_rate
             
             logger.info(f"音頻載入完成，總時長: {total_duration:.2f}秒")
@@ -58,7 +64,7 @@ class DialogueTranscriptionEngine:
                 # Extract audio chunk
                 start_sample = int(start_time * sample_rate)
                 end_sample = int(end_time * sample_rate)
-                audio_chunk = waveform[start_sample:end_sample]
+                audio_chunk = to_float32(waveform[start_sample:end_sample])
                 
                 # Single-threaded transcription
                 try:
@@ -0,0 +1,114 @@
+"""
+Sentence embeddings for call similarity.
+
+Uses a small multilingual sentence-transformers model on CPU when the
+library is installed. Otherwise falls back to hashed character n-gram
+vectors, which need only numpy and still place calls with shared wording
+close together.
+"""
+import logging
+import threading
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dimension of the hashing fallback (matches common small sentence models)
+HASHING_DIM = 384
+
+
+class HashingEmbedder:
+    """Feature-hashed character unigram and bigram counts, sublinear and L2-normalized."""
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-char-ngram-{dim}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        chars = [c for c in text.lower() if not c.isspace()]
+        grams = chars + [a + b for a, b in zip(chars, chars[1:])]
+        for gram in grams:
+            h = zlib.crc32(gram.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self._embed(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model run on CPU."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+class EmbeddingService:
+    """Lazily loaded embedder selected by settings.EMBEDDING_MODEL."""
+
+    def __init__(self):
+        self._embedder = None
+        self._lock = threading.Lock()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    self._embedder = self._load()
+        return self._embedder
+
+    @staticmethod
+    def _load():
+        if settings.EMBEDDING_MODEL:
+            try:
+                embedder = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL)
+                logger.info(f"Loaded embedding model {settings.EMBEDDING_MODEL} ({embedder.dim} dims)")
+                return embedder
+            except ImportError:
+                logger.warning("sentence-transformers is not installed, using hashed n-gram embeddings")
+            except Exception as e:
+                logger.error(f"Failed to load embedding model {settings.EMBEDDING_MODEL}, using hashed n-gram embeddings: {e}")
+        return HashingEmbedder()
+
+    @property
+    def model_name(self) -> str:
+        return self.embedder.name
+
+    @staticmethod
+    def analysis_text(transcript: Optional[str], feedback_summary: Optional[str]) -> str:
+        """Text embedded for an analysis: the summary, then the start of the transcript."""
+        text = "\n".join(part for part in (feedback_summary, transcript) if part)
+        return text[:settings.EMBEDDING_MAX_CHARS]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim), rows L2-normalized
+        """
+        return self.embedder.encode(texts)
+
+
+# Create singleton instance for import
+embedding_service = EmbeddingService()
@@ -2,21 +2,27 @@
 AI Analysis API endpoints.
 """
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from functools import partial
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 
 from ...database import get_db
-from ...schemas.analysis import AnalysisResponse, AnalysisUpdate
+from ...schemas.analysis import AnalysisResponse, AnalysisUpdate, SimilarAnalysis
 from ...repositories.file import FileRepository
 from ...repositories.analysis import AnalysisRepository
 from ...repositories.label import LabelRepository
 from ...core.dependencies import require_permission, get_current_user
 from ...models.user import User
-from ...models.file import FileStatus
-from ...models.analysis import SentimentType
+from ...models.file import FileStatus, VoiceFile
+from ...models.analysis import SentimentType, VoiceAnalysis
 from ...ai.speech_to_text import speech_service
 from ...ai.llm_analyzer import analyze_feedback
+from ...services.similarity_service import SimilarityService
+from ...utils.vector_index import vector_index
+from ...utils.cache import cache
+from ...config import settings
 import json
 
 router = APIRouter()
@@ -110,11 +116,14 @@ def process_file_analysis(file_id: str, db: Session):
             "product_names": json.dumps(product_names, ensure_ascii=False) if product_names else None
         }
         
-        analysis_repo.create(analysis_data)
+        analysis = analysis_repo.create(analysis_data)
         
         # Update file status to completed
         file_repo.update_status(file_id, FileStatus.COMPLETED)
         
+        # Embed for similarity search
+        SimilarityService(db).index_analysis(analysis)
+        
     except Exception as e:
         # Update status to failed
         file_repo.update_status(file_id, FileStatus.FAILED)
@@ -211,6 +220,36 @@ async def get_analysis_result(
     return analysis_response
 
 
+@router.get("/{analysis_id}/similar", response_model=List[SimilarAnalysis])
+async def get_similar_analyses(
+    analysis_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """查找內容相似的通話（語意向量近鄰搜索）"""
+    if vector_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Similarity search is unavailable"
+        )
+    
+    analysis_repo = AnalysisRepository(db)
+    if not analysis_repo.get(analysis_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found"
+        )
+    
+    similar = await run_in_threadpool(SimilarityService(db).similar, analysis_id, limit)
+    if similar is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Analysis has not been embedded yet"
+        )
+    return similar
+
+
 @router.post("/batch")
 async def batch_analysis(
     file_ids: List[str],
@@ -256,6 +295,7 @@ async def batch_analysis(
 async def update_transcript(
     file_id: str,
     update_data: AnalysisUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_permission("write", "analysis")),
     db: Session = Depends(get_db)
 ):
@@ -278,6 +318,10 @@ async def update_transcript(
     # Update the analysis record
     updated_analysis = analysis_repo.update(analysis, update_dict)
     
+    # Re-embed for similarity search after the response is sent
+    if "transcript" in update_dict:
+        background_tasks.add_task(_reindex_analysis, db.get_bind(), updated_analysis.id)
+    
     return {
         "message": "Transcript updated successfully",
         "file_id": file_id,
@@ -285,14 +329,45 @@ async def update_transcript(
     }
 
 
+def _reindex_analysis(bind, analysis_id: str) -> None:
+    """Re-embed an analysis after the response, with a session of its own (the request's is closed by then)."""
+    db = Session(bind=bind)
+    try:
+        analysis = AnalysisRepository(db).get(analysis_id)
+        if analysis:
+            SimilarityService(db).index_analysis(analysis)
+    finally:
+        db.close()
+
+
 @router.get("/statistics/summary")
 async def get_analysis_statistics(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """獲取分析統計"""
-    analysis_repo = AnalysisRepository(db)
-    
+    return await run_in_threadpool(
+        cache.get_or_set,
+        "api:analysis_statistics",
+        lambda: _build_analysis_statistics(AnalysisRepository(db)),
+        settings.DASHBOARD_CACHE_TTL,
+        (VoiceAnalysis.__tablename__, VoiceFile.__tablename__),
+        settings.DASHBOARD_STALE_TTL,
+        partial(_compute_analysis_statistics, db.get_bind())
+    )
+
+
+def _compute_analysis_statistics(bind) -> dict:
+    """Run the analysis statistics queries with a session of its own, for background refreshes."""
+    db = Session(bind=bind)
+    try:
+        analysis_repo = AnalysisRepository(db)
+        return _build_analysis_statistics(analysis_repo)
+    finally:
+        db.close()
+
+
+def _build_analysis_statistics(analysis_repo: AnalysisRepository) -> dict:
     return {
         "total_analyses": analysis_repo.count(),
         "sentiment_distribution": analysis_repo.get_sentiment_distribution(),
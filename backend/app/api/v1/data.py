@@ -1,27 +1,87 @@
 """
 Data query and dashboard API endpoints.
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
+import gzip
+from functools import partial
 
-from ...database import get_db
-from ...schemas.analysis import AnalysisResponse, AnalysisFilterParams, DashboardData
-from ...schemas.common import PaginationParams, PaginatedResponse
-from ...repositories.analysis import AnalysisRepository
+from ...database import get_db, SessionLocal
+from ...schemas.analysis import (
+    AnalysisListItem, AnalysisFilterParams, DashboardData, ExportJobCreate, ExportJobResponse,
+    TranscriptSearchHit
+)
+from ...schemas.common import PaginationParams, PaginatedResponse, CursorPaginatedResponse
+from ...repositories.analysis import AnalysisRepository, ANALYSIS_TABLES
 from ...repositories.file import FileRepository
 from ...core.dependencies import get_current_user
 from ...models.user import User
 from ...models.analysis import SentimentType
+from ...utils.pagination import decode_cursor, cached_total, page_cursor
+from ...utils.cache import cache
+from ...utils.http_cache import conditional_get
+from ...utils.search_index import search_index
+from ...services.export_service import ExportService, ExportJobStatus, EXPORT_FORMATS, export_jobs
+from ...services.search_service import SearchService
+from ...config import settings
 
 router = APIRouter()
 
+# Tables behind listing rows (uploader names come from users)
+LIST_TABLES = ANALYSIS_TABLES + (User.__tablename__,)
 
-@router.get("/analysis", response_model=PaginatedResponse[AnalysisResponse])
+
+def _get_analysis_cursor_page(
+    analysis_repo: AnalysisRepository,
+    cursor: str,
+    page_size: int,
+    include_total: bool,
+    filters: dict
+) -> CursorPaginatedResponse[AnalysisListItem]:
+    """Fetch one keyset page of analyses; an empty cursor starts from the newest row."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Fetch one extra row to know whether another page exists
+    rows = analysis_repo.get_list_with_file_info(
+        limit=page_size + 1,
+        preview_length=settings.TRANSCRIPT_PREVIEW_LENGTH,
+        after=after,
+        **filters
+    )
+    next_cursor = page_cursor(rows, page_size, lambda row: (row.analysis_time, row.id))
+    
+    total = None
+    if include_total:
+        total = cached_total(
+            "analysis", filters, lambda: analysis_repo.count_with_filters(**filters), tags=ANALYSIS_TABLES
+        )
+    
+    return CursorPaginatedResponse.create(
+        items=[AnalysisListItem.from_row(row) for row in rows[:page_size]],
+        page_size=page_size,
+        next_cursor=next_cursor,
+        total=total
+    )
+
+
+@router.get(
+    "/analysis",
+    response_model=Union[PaginatedResponse[AnalysisListItem], CursorPaginatedResponse[AnalysisListItem]]
+)
 async def get_analysis_data(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Return a cached total in cursor mode"),
     product_names: Optional[List[str]] = Query(None),
     feedback_categories: Optional[List[str]] = Query(None),
     sentiments: Optional[List[SentimentType]] = Query(None),
@@ -32,45 +92,40 @@ async def get_analysis_data(
     db: Session = Depends(get_db)
 ):
     """分頁查詢分析結果"""
+    not_modified = conditional_get(request, response, LIST_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
     analysis_repo = AnalysisRepository(db)
     
+    filters = {
+        "product_names": product_names,
+        "feedback_categories": feedback_categories,
+        "sentiments": sentiments,
+        "uploaders": uploaders,
+        "start_date": start_date,
+        "end_date": end_date
+    }
+    
+    # Cursor mode: constant cost per page regardless of depth
+    if cursor is not None:
+        return _get_analysis_cursor_page(analysis_repo, cursor, page_size, include_total, filters)
+    
     pagination = PaginationParams(page=page, page_size=page_size)
     
-    # Get filtered analysis results
-    analyses = analysis_repo.get_multi_with_file_info(
+    # Get filtered analysis results (list columns only, no full transcript)
+    rows = analysis_repo.get_list_with_file_info(
         skip=pagination.offset,
         limit=pagination.page_size,
-        product_names=product_names,
-        feedback_categories=feedback_categories,
-        sentiments=sentiments,
-        uploaders=uploaders,
-        start_date=start_date,
-        end_date=end_date
+        preview_length=settings.TRANSCRIPT_PREVIEW_LENGTH,
+        **filters
     )
     
     # Get total count
-    total = analysis_repo.count_with_filters(
-        product_names=product_names,
-        feedback_categories=feedback_categories,
-        sentiments=sentiments,
-        uploaders=uploaders,
-        start_date=start_date,
-        end_date=end_date
-    )
-    
-    # Convert to response format
-    analysis_responses = []
-    for analysis in analyses:
-        analysis_response = AnalysisResponse.from_orm(analysis)
-        if analysis.file:
-            analysis_response.filename = analysis.file.original_filename
-            analysis_response.upload_time = analysis.file.created_at
-            if analysis.file.uploader:
-                analysis_response.uploader_name = analysis.file.uploader.name
-        analysis_responses.append(analysis_response)
+    total = analysis_repo.count_with_filters(**filters)
     
     return PaginatedResponse.create(
-        items=analysis_responses,
+        items=[AnalysisListItem.from_row(row) for row in rows],
         total=total,
         page=pagination.page,
         page_size=pagination.page_size
@@ -106,10 +161,40 @@ async def get_files_data(
 
 @router.get("/dashboard", response_model=DashboardData)
 async def get_dashboard_data(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """獲取儀表盤數據"""
+    not_modified = conditional_get(request, response, ANALYSIS_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    # Runs in a worker thread so a recomputation does not block the event loop;
+    # concurrent misses wait for one computation
+    return await run_in_threadpool(
+        cache.get_or_set,
+        "api:dashboard",
+        lambda: _build_dashboard_data(db),
+        settings.DASHBOARD_CACHE_TTL,
+        ANALYSIS_TABLES,
+        settings.DASHBOARD_STALE_TTL,
+        partial(_compute_dashboard_data, db.get_bind())
+    )
+
+
+def _compute_dashboard_data(bind) -> DashboardData:
+    """Build dashboard data with a session of its own, for background refreshes."""
+    db = Session(bind=bind)
+    try:
+        return _build_dashboard_data(db)
+    finally:
+        db.close()
+
+
+def _build_dashboard_data(db: Session) -> DashboardData:
+    """Run the dashboard aggregate queries."""
     analysis_repo = AnalysisRepository(db)
     file_repo = FileRepository(db)
     
@@ -198,8 +283,7 @@ async def export_data(
     uploaders: Optional[List[str]] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """數據導出"""
     from ...core.permissions import PermissionChecker
@@ -212,46 +296,135 @@ async def export_data(
             detail="No permission to export data"
         )
     
-    analysis_repo = AnalysisRepository(db)
-    
-    # Get filtered data (without pagination for export)
-    analyses = analysis_repo.get_multi_with_file_info(
-        skip=0,
-        limit=10000,  # Large limit for export
-        product_names=product_names,
-        feedback_categories=feedback_categories,
-        sentiments=sentiments,
-        uploaders=uploaders,
-        start_date=start_date,
-        end_date=end_date
-    )
+    filters = {
+        "product_names": product_names,
+        "feedback_categories": feedback_categories,
+        "sentiments": sentiments,
+        "uploaders": uploaders,
+        "start_date": start_date,
+        "end_date": end_date
+    }
     
-    # For now, return the data structure
-    # In production, you would generate actual Excel/CSV files
-    export_data = []
-    for analysis in analyses:
-        export_data.append({
-            "分析ID": analysis.id,
-            "文件名": analysis.file.original_filename if analysis.file else "",
-            "產品名稱": analysis.product_names,
-            "情緒傾向": analysis.sentiment.value,
-            "反饋分類": analysis.feedback_category,
-            "反饋摘要": analysis.feedback_summary,
-            "上傳者": analysis.file.uploader.name if analysis.file and analysis.file.uploader else "",
-            "分析時間": analysis.analysis_time.isoformat(),
-            "轉錄內容": analysis.transcript[:100] + "..." if analysis.transcript else ""
-        })
+    def generate():
+        # The stream outlives the request's dependencies, so it opens its own session
+        db = SessionLocal()
+        try:
+            yield from ExportService(db).stream(format, filters)
+        finally:
+            db.close()
+    
+    filename = ExportService.filename(format)
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
+    if format == "excel":
+        # XLSX is already deflated; keep the compression middleware off it
+        headers["Content-Encoding"] = "identity"
+    
+    return StreamingResponse(generate(), media_type=EXPORT_FORMATS[format][1], headers=headers)
+
+
+def _require_export_permission(current_user: User = Depends(get_current_user)) -> User:
+    from ...core.permissions import PermissionChecker
     
-    return {
-        "format": format,
-        "total_records": len(export_data),
-        "export_time": datetime.utcnow().isoformat(),
-        "data": export_data,
-        "message": f"Data exported successfully in {format} format"
-    }
+    if not PermissionChecker.can_export_data(current_user.role):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No permission to export data"
+        )
+    return current_user
+
+
+def _export_job_response(job: dict) -> ExportJobResponse:
+    total = job["total_rows"]
+    if job["status"] == ExportJobStatus.COMPLETED:
+        progress = 100.0
+    elif total:
+        progress = round(min(job["processed_rows"] / total, 1.0) * 100, 1)
+    else:
+        progress = 0.0
+    
+    timestamp = lambda value: datetime.utcfromtimestamp(value) if value else None
+    return ExportJobResponse(
+        job_id=job["job_id"],
+        format=job["format"],
+        status=job["status"],
+        processed_rows=job["processed_rows"],
+        total_rows=total,
+        progress=progress,
+        file_size=job["file_size"],
+        error=job["error"],
+        created_at=timestamp(job["created_at"]),
+        completed_at=timestamp(job["completed_at"]),
+        expires_at=timestamp(job["expires_at"]),
+        download_url=(
+            f"/api/data/export/jobs/{job['job_id']}/download"
+            if job["status"] == ExportJobStatus.COMPLETED else None
+        )
+    )
+
+
+@router.post("/export/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    job_request: ExportJobCreate,
+    current_user: User = Depends(_require_export_permission)
+):
+    """提交背景導出任務（相同條件且數據未變更時重用既有結果）"""
+    filters = job_request.dict(exclude={"format"})
+    job = await run_in_threadpool(export_jobs.submit, job_request.format, filters)
+    return _export_job_response(job)
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: str,
+    current_user: User = Depends(_require_export_permission)
+):
+    """查詢導出任務進度"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found or expired")
+    return _export_job_response(job)
+
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(_require_export_permission)
+):
+    """下載導出結果"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found or expired")
+    if job["status"] != ExportJobStatus.COMPLETED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Export job is {job['status']}")
+    
+    path = export_jobs.artifact_path(job)
+    filename = ExportService.filename(job["format"], datetime.fromtimestamp(job["created_at"]))
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
+    media_type = EXPORT_FORMATS[job["format"]][1]
+    
+    if job["format"] != "csv":
+        # XLSX is already deflated; keep the compression middleware off it
+        headers["Content-Encoding"] = "identity"
+        return FileResponse(path, media_type=media_type, headers=headers)
+    
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        # Send the stored gzip bytes as is; the client decodes them
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(path, media_type=media_type, headers=headers)
+    
+    def decompress():
+        with gzip.open(path, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
+    
+    return StreamingResponse(decompress(), media_type=media_type, headers=headers)
 
 
-@router.post("/search")
+@router.post(
+    "/search",
+    response_model=Union[PaginatedResponse[AnalysisListItem], CursorPaginatedResponse[AnalysisListItem]]
+)
 async def advanced_search(
     filter_params: AnalysisFilterParams,
     pagination: PaginationParams,
@@ -261,47 +434,51 @@ async def advanced_search(
     """高級搜索"""
     analysis_repo = AnalysisRepository(db)
     
-    # Get filtered analysis results
-    analyses = analysis_repo.get_multi_with_file_info(
+    filters = filter_params.dict()
+    
+    # Cursor mode: constant cost per page regardless of depth
+    if pagination.cursor is not None:
+        return _get_analysis_cursor_page(
+            analysis_repo, pagination.cursor, pagination.page_size, pagination.include_total, filters
+        )
+    
+    # Get filtered analysis results (list columns only, no full transcript)
+    rows = analysis_repo.get_list_with_file_info(
         skip=pagination.offset,
         limit=pagination.page_size,
-        product_names=filter_params.product_names,
-        feedback_categories=filter_params.feedback_categories,
-        sentiments=filter_params.sentiments,
-        uploaders=filter_params.uploaders,
-        start_date=filter_params.start_date,
-        end_date=filter_params.end_date
+        preview_length=settings.TRANSCRIPT_PREVIEW_LENGTH,
+        **filters
     )
     
     # Get total count
-    total = analysis_repo.count_with_filters(
-        product_names=filter_params.product_names,
-        feedback_categories=filter_params.feedback_categories,
-        sentiments=filter_params.sentiments,
-        uploaders=filter_params.uploaders,
-        start_date=filter_params.start_date,
-        end_date=filter_params.end_date
-    )
-    
-    # Convert to response format
-    analysis_responses = []
-    for analysis in analyses:
-        analysis_response = AnalysisResponse.from_orm(analysis)
-        if analysis.file:
-            analysis_response.filename = analysis.file.original_filename
-            analysis_response.upload_time = analysis.file.created_at
-            if analysis.file.uploader:
-                analysis_response.uploader_name = analysis.file.uploader.name
-        analysis_responses.append(analysis_response)
+    total = analysis_repo.count_with_filters(**filters)
     
     return PaginatedResponse.create(
-        items=analysis_responses,
+        items=[AnalysisListItem.from_row(row) for row in rows],
         total=total,
         page=pagination.page,
         page_size=pagination.page_size
     )
 
 
+@router.get("/search/transcripts", response_model=PaginatedResponse[TranscriptSearchHit])
+async def search_transcripts(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms separated by spaces"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """全文搜索轉錄內容與反饋摘要（依相關度排序，附高亮片段）"""
+    if search_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Full-text search is unavailable"
+        )
+    
+    return SearchService(db).search(q, page=page, page_size=page_size)
+
+
 @router.get("/time-series")
 async def get_time_series_data(
     product_names: Optional[List[str]] = Query(None),
@@ -318,9 +495,9 @@ async def get_time_series_data(
     
     analysis_repo = AnalysisRepository(db)
     
-    # 計算時間範圍
+    # 計算時間範圍（結束時間取到下一分鐘，讓同一分鐘內的請求共用快取的每日統計）
     from datetime import timedelta
-    end_date = datetime.utcnow()
+    end_date = datetime.utcnow().replace(second=0, microsecond=0) + timedelta(minutes=1)
     if time_period == "week":
         start_date = end_date - timedelta(days=7)
         days = 7
@@ -1,25 +1,40 @@
 """
 File management API endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks, Request, Response, Header
+from fastapi import status as http_status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse as StoredFileResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 import os
 import uuid
-import shutil
+from urllib.parse import quote
+import aiofiles.os
 
 from ...database import get_db
-from ...schemas.file import FileResponse, FileUploadResponse, FileBatchUploadResponse, FileAnalysisResult
-from ...schemas.common import PaginationParams, PaginatedResponse
+from ...schemas.file import (
+    FileResponse, FileUploadResponse, FileBatchUploadResponse, FileAnalysisResult,
+    ChunkedUploadCreate, ChunkedUploadResponse, ChunkReceipt, FileImportRequest, FileImportResponse
+)
+from ...schemas.analysis import AnalysisTranscriptResponse, parse_product_names
+from ...schemas.common import PaginationParams, PaginatedResponse, CursorPaginatedResponse
 from ...repositories.file import FileRepository
-from ...repositories.analysis import AnalysisRepository
-from ...core.dependencies import require_permission, get_current_user
+from ...repositories.analysis import AnalysisRepository, ANALYSIS_TABLES
+from ...core.dependencies import require_permission, require_admin, get_current_user
 from ...models.user import User
-from ...models.file import FileStatus, FileFormat
+from ...models.file import FileStatus, FileFormat, VoiceFile
 from ...config import settings
 from ...services.analysis_service import AnalysisService
+from ...services.duplicate_service import DuplicateCheck, DuplicateService
+from ...services.upload_service import ChunkedUploadError, chunked_uploads
+from ...services.import_service import ImportService
+from ...services.storage_service import deletion_queue
 from ...database import SessionLocal
-import json
+from ...utils.pagination import decode_cursor, cached_total, page_cursor
+from ...utils.http_cache import conditional_get
+from ...utils.file_handler import UploadTooLargeError, write_upload
+from ...utils.content_store import staging_dir, store_file
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,48 +60,69 @@ def process_file_in_background(file_id: str, db_url: str):
 router = APIRouter()
 
 
-def save_uploaded_file(file: UploadFile, user_id: str) -> dict:
-    """Save uploaded file and return file info."""
+def _to_analysis_result(analysis) -> FileAnalysisResult:
+    """Convert an analysis row to the result embedded in file responses."""
+    return FileAnalysisResult(
+        sentiment=analysis.sentiment,
+        feedback_category=analysis.feedback_category,
+        feedback_summary=analysis.feedback_summary,
+        product_names=parse_product_names(analysis.product_names),
+        transcript=analysis.transcript
+    )
+
+
+def _to_analysis_summary(row) -> FileAnalysisResult:
+    """Convert a list-view analysis row to the result embedded in file list rows."""
+    return FileAnalysisResult(
+        sentiment=row.sentiment,
+        feedback_category=row.feedback_category,
+        feedback_summary=row.feedback_summary,
+        product_names=parse_product_names(row.product_names),
+        transcript_preview=row.transcript_preview
+    )
+
+
+def check_upload(filename: str, file_size: Optional[int]) -> str:
+    """Validate an upload's name and (if known) size; return its lowercase extension."""
     # Validate file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(filename)[1].lower()
     if file_ext[1:] not in settings.allowed_extensions_list:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type not allowed. Allowed types: {', '.join(settings.allowed_extensions_list)}"
         )
     
-    # Generate unique file ID and path
-    file_id = str(uuid.uuid4())
-    upload_dir = settings.UPLOAD_DIR
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_path = os.path.join(upload_dir, f"{file_id}{file_ext}")
-    
-    # Save file
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file: {str(e)}"
-        )
-    
-    # Get file size
-    file_size = os.path.getsize(file_path)
-    
-    # Validate file size
-    if file_size > settings.MAX_FILE_SIZE:
-        os.remove(file_path)  # Clean up
+    # Refuse before writing anything when the size is already known
+    if file_size is not None and file_size > settings.MAX_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
         )
-    
+    return file_ext
+
+
+async def new_upload_path(file_ext: str) -> tuple[str, str]:
+    """Generate a unique file ID and the path its upload is written to before it is hashed."""
+    file_id = str(uuid.uuid4())
+    upload_dir = staging_dir()
+    await aiofiles.os.makedirs(upload_dir, exist_ok=True)
+    return file_id, os.path.join(upload_dir, f"{file_id}{file_ext}")
+
+
+async def store_upload(file_info: dict, content_hash: str) -> None:
+    """Move a saved upload into the content store (reusing the stored copy of identical content)."""
+    file_path, _ = await run_in_threadpool(store_file, file_info["file_path"], content_hash)
+    file_info["file_path"] = file_path
+    file_info["filename"] = os.path.basename(file_path)
+
+
+def upload_file_info(file_id: str, file_path: str, original_filename: str, file_size: int, user_id: str) -> dict:
+    """File record values for a saved upload."""
+    file_ext = os.path.splitext(file_path)[1]
     return {
         "id": file_id,
         "filename": f"{file_id}{file_ext}",
-        "original_filename": file.filename,
+        "original_filename": original_filename,
         "file_path": file_path,
         "file_size": file_size,
         "file_format": FileFormat(file_ext[1:]),
@@ -94,35 +130,98 @@ def save_uploaded_file(file: UploadFile, user_id: str) -> dict:
     }
 
 
-@router.post("/upload", response_model=FileUploadResponse)
-async def upload_file(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    current_user: User = Depends(require_permission("write", "files")),
-    db: Session = Depends(get_db)
-):
-    """上傳單個文件並啟動自動分析"""
-    file_repo = FileRepository(db)
-    
-    # Save file
-    file_info = save_uploaded_file(file, current_user.id)
+async def save_uploaded_file(file: UploadFile, user_id: str) -> tuple[dict, str]:
+    """Stream an uploaded file to disk and return file info and the SHA-256 of its content."""
+    file_ext = check_upload(file.filename, file.size)
+    file_id, file_path = await new_upload_path(file_ext)
     
-    # Create file record with PENDING status (待分析)
-    file_record = file_repo.create(file_info)
+    # Save file, enforcing the size limit and hashing in the same pass
+    try:
+        file_size, content_hash = await write_upload(file, file_path, settings.MAX_FILE_SIZE)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
     
+    return upload_file_info(file_id, file_path, file.filename, file_size, user_id), content_hash
+
+
+async def find_upload_duplicate(file_info: dict, content_hash: str, duplicate_service: DuplicateService) -> DuplicateCheck:
+    """Look for an earlier upload of a saved file; a duplicate's saved copy is removed."""
+    check = await run_in_threadpool(
+        duplicate_service.find_duplicate, file_info["file_path"], file_info["file_format"], content_hash
+    )
+    if check.file:
+        await aiofiles.os.remove(file_info["file_path"])
+    return check
+
+
+def duplicate_response(file_id: str, filename: str, match_type: str) -> FileUploadResponse:
+    """Upload response pointing at the earlier upload of the same recording."""
+    return FileUploadResponse(
+        file_id=file_id,
+        filename=filename,
+        message="Duplicate of an existing upload, existing analysis reused",
+        duplicate=True,
+        match_type=match_type
+    )
+
+
+def queue_analysis(file_id: str, file_format: FileFormat, db: Session, background_tasks: BackgroundTasks) -> None:
+    """Start a new file's analysis after the response is sent."""
     # Auto-start analysis for audio and text files (background task)
-    if file_record.file_format in [FileFormat.WAV, FileFormat.MP3, FileFormat.TXT]:
+    if file_format in [FileFormat.WAV, FileFormat.MP3, FileFormat.TXT]:
         # Use background task to avoid request timeout
         background_tasks.add_task(
             process_file_in_background,
-            file_record.id,
+            file_id,
             str(db.bind.url)  # Pass database URL for new connection
         )
+
+
+async def register_upload(
+    file_info: dict,
+    content_hash: str,
+    db: Session,
+    background_tasks: BackgroundTasks,
+    message: str
+) -> FileUploadResponse:
+    """
+    Point a saved upload at an earlier upload of the same recording (no
+    record created, no analysis run), or record it and start its analysis.
+    """
+    duplicate_service = DuplicateService(db)
+    check = await find_upload_duplicate(file_info, content_hash, duplicate_service)
+    if check.file:
+        return duplicate_response(check.file.id, file_info["original_filename"], check.match_type)
+    
+    # Create file record with PENDING status (待分析)
+    await store_upload(file_info, content_hash)
+    file_record = FileRepository(db).create(file_info)
+    duplicate_service.record(file_record.id, content_hash, check.fingerprint)
+    queue_analysis(file_record.id, file_record.file_format, db, background_tasks)
     
     return FileUploadResponse(
         file_id=file_record.id,
         filename=file_record.original_filename,
-        message="File uploaded successfully, analysis started"
+        message=message
+    )
+
+
+@router.post("/upload", response_model=FileUploadResponse)
+async def upload_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: User = Depends(require_permission("write", "files")),
+    db: Session = Depends(get_db)
+):
+    """上傳單個文件並啟動自動分析（重複上傳直接回傳既有文件）"""
+    file_info, content_hash = await save_uploaded_file(file, current_user.id)
+    return await register_upload(
+        file_info, content_hash, db, background_tasks, "File uploaded successfully, analysis started"
     )
 
 
@@ -133,41 +232,71 @@ async def batch_upload_files(
     current_user: User = Depends(require_permission("write", "files")),
     db: Session = Depends(get_db)
 ):
-    """批量上傳文件並啟動自動分析"""
-    file_repo = FileRepository(db)
-    
-    successful_uploads = []
+    """批量上傳文件並啟動自動分析（重複上傳直接回傳既有文件）"""
+    duplicate_service = DuplicateService(db)
+    results = []  # FileUploadResponse, or (file_info, content_hash, fingerprint) of a new file
+    new_hashes = {}  # content hash -> file ID of the new files in this batch
     failed_uploads = []
     
     for file in files:
         try:
-            # Save file
-            file_info = save_uploaded_file(file, current_user.id)
-            
-            # Create file record with PENDING status (待分析)
-            file_record = file_repo.create(file_info)
-            
-            # Auto-start analysis for audio and text files (background task)
-            if file_record.file_format in [FileFormat.WAV, FileFormat.MP3, FileFormat.TXT]:
-                # Use background task to avoid request timeout
-                background_tasks.add_task(
-                    process_file_in_background,
-                    file_record.id,
-                    str(db.bind.url)  # Pass database URL for new connection
-                )
-            
-            successful_uploads.append(FileUploadResponse(
-                file_id=file_record.id,
-                filename=file_record.original_filename,
-                message="Uploaded successfully, analysis started"
-            ))
-            
+            file_info, content_hash = await save_uploaded_file(file, current_user.id)
+            if content_hash in new_hashes:
+                await aiofiles.os.remove(file_info["file_path"])
+                results.append(duplicate_response(new_hashes[content_hash], file_info["original_filename"], "exact"))
+                continue
+            check = await find_upload_duplicate(file_info, content_hash, duplicate_service)
+            if check.file:
+                results.append(duplicate_response(check.file.id, file_info["original_filename"], check.match_type))
+                continue
+            new_hashes[content_hash] = file_info["id"]
+            results.append((file_info, content_hash, check.fingerprint))
+        except HTTPException as e:
+            failed_uploads.append({
+                "filename": file.filename,
+                "reason": e.detail
+            })
         except Exception as e:
             failed_uploads.append({
                 "filename": file.filename,
                 "reason": str(e)
             })
     
+    # Record every new file in one transaction with multi-row INSERTs
+    new_files = [result for result in results if isinstance(result, tuple)]
+    if new_files:
+        try:
+            for file_info, content_hash, _ in new_files:
+                await store_upload(file_info, content_hash)
+            FileRepository(db).bulk_create([file_info for file_info, _, _ in new_files])
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record {len(new_files)} uploaded files: {e}")
+            # Stored copies are shared with identical content; the queue removes them only if unreferenced
+            deletion_queue.enqueue(file_info["file_path"] for file_info, _, _ in new_files)
+            for file_info, _, _ in new_files:
+                failed_uploads.append({
+                    "filename": file_info["original_filename"],
+                    "reason": "Failed to save file record"
+                })
+            results = [result for result in results if not isinstance(result, tuple)]
+        else:
+            duplicate_service.record_many([
+                (file_info["id"], content_hash, fingerprint) for file_info, content_hash, fingerprint in new_files
+            ])
+    
+    successful_uploads = []
+    for result in results:
+        if isinstance(result, tuple):
+            file_info = result[0]
+            queue_analysis(file_info["id"], file_info["file_format"], db, background_tasks)
+            result = FileUploadResponse(
+                file_id=file_info["id"],
+                filename=file_info["original_filename"],
+                message="Uploaded successfully, analysis started"
+            )
+        successful_uploads.append(result)
+    
     return FileBatchUploadResponse(
         successful_uploads=successful_uploads,
         failed_uploads=failed_uploads,
@@ -177,10 +306,151 @@ async def batch_upload_files(
     )
 
 
-@router.get("/", response_model=PaginatedResponse[FileResponse])
+@router.post("/import", response_model=FileImportResponse)
+async def import_files(
+    import_request: FileImportRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """從伺服器目錄或 zip/tar 壓縮檔批量匯入（跳過已匯入的內容），並排入分析"""
+    import_root = os.path.realpath(settings.IMPORT_DIR)
+    source = os.path.realpath(os.path.join(import_root, import_request.path))
+    if os.path.commonpath([import_root, source]) != import_root:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import path must be inside the import directory"
+        )
+    
+    try:
+        report = await run_in_threadpool(ImportService(db).import_path, source, current_user.id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import source not found")
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Same path as uploads: background tasks run one after another once the response is sent
+    if import_request.analyze:
+        for file_id in report.file_ids:
+            background_tasks.add_task(process_file_in_background, file_id, str(db.bind.url))
+    
+    return FileImportResponse(
+        source=import_request.path,
+        total_files=report.total_files,
+        imported_count=report.imported_count,
+        skipped_count=report.skipped_count,
+        failed_count=report.failed_count,
+        imported_bytes=report.imported_bytes,
+        elapsed_seconds=report.elapsed_seconds,
+        files_per_second=report.files_per_second,
+        megabytes_per_second=report.megabytes_per_second,
+        failed=report.failed,
+        analysis_queued=len(report.file_ids) if import_request.analyze else 0
+    )
+
+
+def _chunked_upload_response(upload: dict) -> ChunkedUploadResponse:
+    return ChunkedUploadResponse(
+        upload_id=upload["upload_id"],
+        filename=upload["filename"],
+        file_size=upload["file_size"],
+        chunk_size=upload["chunk_size"],
+        total_chunks=upload["total_chunks"],
+        received_chunks=chunked_uploads.received_chunks(upload)
+    )
+
+
+def _get_chunked_upload(upload_id: str, user: User) -> dict:
+    upload = chunked_uploads.get(upload_id, user.id)
+    if not upload:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Upload not found or expired"
+        )
+    return upload
+
+
+@router.post("/uploads", response_model=ChunkedUploadResponse, status_code=http_status.HTTP_201_CREATED)
+async def create_chunked_upload(
+    upload_request: ChunkedUploadCreate,
+    current_user: User = Depends(require_permission("write", "files"))
+):
+    """開始分段上傳（可續傳），之後以 PUT 上傳各分段"""
+    check_upload(upload_request.filename, upload_request.file_size)
+    upload = await run_in_threadpool(
+        chunked_uploads.create, current_user.id, upload_request.filename, upload_request.file_size
+    )
+    return _chunked_upload_response(upload)
+
+
+@router.get("/uploads/{upload_id}", response_model=ChunkedUploadResponse)
+async def get_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(require_permission("write", "files"))
+):
+    """查詢分段上傳進度（續傳時只需補傳缺少的分段）"""
+    return _chunked_upload_response(_get_chunked_upload(upload_id, current_user))
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}", response_model=ChunkReceipt)
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    chunk_sha256: Optional[str] = Header(None, alias="X-Chunk-SHA256"),
+    current_user: User = Depends(require_permission("write", "files"))
+):
+    """上傳一個分段（請求主體為分段原始內容；可並行、可重送）"""
+    upload = _get_chunked_upload(upload_id, current_user)
+    try:
+        digest = await chunked_uploads.write_chunk(upload, index, request.stream(), chunk_sha256)
+    except ChunkedUploadError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ChunkReceipt(index=index, size=chunked_uploads.chunk_length(upload, index), sha256=digest)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse)
+async def complete_chunked_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_permission("write", "files")),
+    db: Session = Depends(get_db)
+):
+    """合併分段並啟動自動分析（重複上傳直接回傳既有文件）"""
+    upload = _get_chunked_upload(upload_id, current_user)
+    file_ext = check_upload(upload["filename"], upload["file_size"])
+    file_id, file_path = await new_upload_path(file_ext)
+    
+    try:
+        file_size, content_hash = await chunked_uploads.assemble(upload, file_path)
+    except ChunkedUploadError as e:
+        raise HTTPException(status_code=http_status.HTTP_409_CONFLICT, detail=str(e))
+    
+    file_info = upload_file_info(file_id, file_path, upload["filename"], file_size, current_user.id)
+    return await register_upload(
+        file_info, content_hash, db, background_tasks, "File uploaded successfully, analysis started"
+    )
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(require_permission("write", "files"))
+):
+    """取消分段上傳並刪除已上傳的分段"""
+    upload = _get_chunked_upload(upload_id, current_user)
+    await run_in_threadpool(chunked_uploads.remove, upload["upload_id"])
+    return {"message": "Upload cancelled"}
+
+
+@router.get("/", response_model=Union[PaginatedResponse[FileResponse], CursorPaginatedResponse[FileResponse]])
 async def get_files(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Return a cached total in cursor mode"),
     status: Optional[FileStatus] = Query(None),
     format: Optional[FileFormat] = Query(None),
     uploaded_by: Optional[str] = Query(None),
@@ -188,46 +458,75 @@ async def get_files(
     db: Session = Depends(get_db)
 ):
     """獲取文件列表"""
+    # Rows include analysis summaries and uploader names
+    not_modified = conditional_get(request, response, ANALYSIS_TABLES + (User.__tablename__,), current_user.id)
+    if not_modified:
+        return not_modified
+    
     file_repo = FileRepository(db)
     
-    pagination = PaginationParams(page=page, page_size=page_size)
+    filters = {
+        "status": status,
+        "format": format,
+        "uploaded_by": uploaded_by
+    }
     
-    files = file_repo.get_multi_with_uploader(
-        skip=pagination.offset,
-        limit=pagination.page_size,
-        status=status,
-        format=format,
-        uploaded_by=uploaded_by
-    )
+    if cursor is not None:
+        # Cursor mode: constant cost per page regardless of depth
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        # Fetch one extra row to know whether another page exists
+        files = file_repo.get_multi_with_uploader(limit=page_size + 1, after=after, **filters)
+        next_cursor = page_cursor(files, page_size, lambda f: (f.created_at, f.id))
+        files = files[:page_size]
+        
+        total = None
+        if include_total:
+            total = cached_total(
+                "files", filters, lambda: file_repo.count_with_filters(**filters), tags=(VoiceFile.__tablename__,)
+            )
+    else:
+        pagination = PaginationParams(page=page, page_size=page_size)
+        
+        files = file_repo.get_multi_with_uploader(
+            skip=pagination.offset,
+            limit=pagination.page_size,
+            **filters
+        )
+        
+        total = file_repo.count_with_filters(**filters)
     
-    total = file_repo.count_with_filters(
-        status=status,
-        format=format,
-        uploaded_by=uploaded_by
+    # Load list-view analysis rows for all completed files on the page in one query
+    analysis_repo = AnalysisRepository(db)
+    analyses = analysis_repo.get_summaries_by_file_ids(
+        [file_obj.id for file_obj in files if file_obj.status == FileStatus.COMPLETED],
+        preview_length=settings.TRANSCRIPT_PREVIEW_LENGTH
     )
+    analysis_results = {
+        file_id: _to_analysis_summary(row)
+        for file_id, row in analyses.items()
+    }
     
     # Convert to response format with analysis results
-    analysis_repo = AnalysisRepository(db)
     file_responses = []
     for file_obj in files:
         file_response = FileResponse.from_orm(file_obj)
         if file_obj.uploader:
             file_response.uploader_name = file_obj.uploader.name
-        
-        # Get analysis result if exists
-        if file_obj.status == FileStatus.COMPLETED:
-            analysis = analysis_repo.get_by_file_id(file_obj.id)
-            if analysis:
-                file_response.analysis_result = FileAnalysisResult(
-                    sentiment=analysis.sentiment,
-                    feedback_category=analysis.feedback_category,
-                    feedback_summary=analysis.feedback_summary,
-                    product_names=json.loads(analysis.product_names) if analysis.product_names else [],
-                    transcript=analysis.transcript
-                )
-        
+        file_response.analysis_result = analysis_results.get(file_obj.id)
         file_responses.append(file_response)
     
+    if cursor is not None:
+        return CursorPaginatedResponse.create(
+            items=file_responses,
+            page_size=page_size,
+            next_cursor=next_cursor,
+            total=total
+        )
+    
     return PaginatedResponse.create(
         items=file_responses,
         total=total,
@@ -261,17 +560,72 @@ async def get_file(
     if file_obj.status == FileStatus.COMPLETED:
         analysis = analysis_repo.get_by_file_id(file_obj.id)
         if analysis:
-            file_response.analysis_result = FileAnalysisResult(
-                sentiment=analysis.sentiment,
-                feedback_category=analysis.feedback_category,
-                feedback_summary=analysis.feedback_summary,
-                product_names=json.loads(analysis.product_names) if analysis.product_names else [],
-                transcript=analysis.transcript
-            )
+            file_response.analysis_result = _to_analysis_result(analysis)
     
     return file_response
 
 
+@router.get("/{file_id}/transcript", response_model=AnalysisTranscriptResponse)
+async def get_file_transcript(
+    file_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """獲取文件的完整逐字稿"""
+    analysis_repo = AnalysisRepository(db)
+    
+    analysis = analysis_repo.get_by_file_id(file_id)
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found for this file"
+        )
+    
+    return AnalysisTranscriptResponse(
+        file_id=file_id,
+        analysis_id=analysis.id,
+        transcript=analysis.transcript
+    )
+
+
+# Stored extension -> media type; analyzed recordings may have been transcoded since upload
+STORED_MEDIA_TYPES = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".opus": "audio/ogg",
+    ".flac": "audio/flac",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+
+@router.get("/{file_id}/download")
+async def download_file(
+    file_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """下載或播放文件（已轉碼的錄音以目前的儲存格式回傳）"""
+    file_obj = FileRepository(db).get(file_id)
+    if not file_obj or not await aiofiles.os.path.exists(file_obj.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    extension = os.path.splitext(file_obj.file_path)[1].lower()
+    filename = os.path.splitext(file_obj.original_filename)[0] + extension
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+        # Audio is already compressed; keep the compression middleware off it
+        "Content-Encoding": "identity",
+    }
+    return StoredFileResponse(
+        file_obj.file_path,
+        media_type=STORED_MEDIA_TYPES.get(extension, "application/octet-stream"),
+        headers=headers
+    )
+
+
 @router.delete("/batch")
 async def batch_delete_files(
     request: Request,
@@ -298,36 +652,16 @@ async def batch_delete_files(
             detail="No file IDs provided"
         )
     
-    successful_deletes = []
-    failed_deletes = []
+    deleted = file_repo.delete_files(file_ids)
     
-    for file_id in file_ids:
-        try:
-            file_obj = file_repo.get(file_id)
-            if not file_obj:
-                failed_deletes.append({
-                    "id": file_id,
-                    "reason": "File not found"
-                })
-                continue
-            
-            # Delete physical file
-            try:
-                if os.path.exists(file_obj.file_path):
-                    os.remove(file_obj.file_path)
-            except Exception as e:
-                # Log error but continue with database deletion
-                logger.warning(f"Failed to delete physical file {file_obj.file_path}: {str(e)}")
-            
-            # Delete from database
-            file_repo.delete(file_id)
-            successful_deletes.append(file_id)
-            
-        except Exception as e:
-            failed_deletes.append({
-                "id": file_id,
-                "reason": str(e)
-            })
+    # Physical files are removed in the background once their records are gone
+    deletion_queue.enqueue(deleted.values())
+    
+    successful_deletes = [file_id for file_id in file_ids if file_id in deleted]
+    failed_deletes = [
+        {"id": file_id, "reason": "File not found"}
+        for file_id in file_ids if file_id not in deleted
+    ]
     
     return {
         "message": f"Batch delete completed. Success: {len(successful_deletes)}, Failed: {len(failed_deletes)}",
@@ -355,16 +689,10 @@ async def delete_file(
             detail="File not found"
         )
     
-    # Delete physical file
-    try:
-        if os.path.exists(file_obj.file_path):
-            os.remove(file_obj.file_path)
-    except Exception as e:
-        # Log error but continue with database deletion
-        pass
-    
-    # Delete from database
+    # Delete from database, then remove the physical file in the background
+    file_path = file_obj.file_path
     file_repo.delete(file_id)
+    deletion_queue.enqueue([file_path])
     
     return {"message": "File deleted successfully"}
 
@@ -1,7 +1,7 @@
 """
 Label management API endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -14,6 +14,10 @@ from ...schemas.label import (
 from ...repositories.label import LabelRepository
 from ...core.dependencies import require_permission, get_current_user
 from ...models.user import User
+from ...models.label import ProductLabel, FeedbackCategory
+from ...utils.cache import cache
+from ...utils.http_cache import conditional_get
+from ...config import settings
 
 router = APIRouter()
 
@@ -21,13 +25,31 @@ router = APIRouter()
 # Product Labels
 @router.get("/products", response_model=List[ProductLabelResponse])
 async def get_product_labels(
+    request: Request,
+    response: Response,
     active_only: bool = True,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """獲取產品標籤列表"""
-    label_repo = LabelRepository(db)
-    return label_repo.get_product_labels(active_only=active_only, limit=1000)
+    tags = (ProductLabel.__tablename__, User.__tablename__)
+    not_modified = conditional_get(request, response, tags)
+    if not_modified:
+        return not_modified
+    
+    def load():
+        label_repo = LabelRepository(db)
+        return [
+            ProductLabelResponse.model_validate(label)
+            for label in label_repo.get_product_labels(active_only=active_only, limit=1000)
+        ]
+    
+    return cache.get_or_set(
+        f"api:product_labels:{active_only}",
+        load,
+        ttl=settings.LABEL_CACHE_TTL,
+        tags=tags
+    )
 
 
 @router.post("/products", response_model=ProductLabelResponse)
@@ -62,33 +84,13 @@ async def create_product_labels_batch(
     """批量創建產品標籤"""
     label_repo = LabelRepository(db)
     
-    successful_labels = []
-    failed_labels = []
-    
-    for label_name in batch_data.labels:
-        try:
-            # Check if label already exists
-            if label_repo.get_product_label_by_name(label_name):
-                failed_labels.append({
-                    "name": label_name,
-                    "reason": "Label already exists"
-                })
-                continue
-            
-            label_dict = {
-                "name": label_name,
-                "is_active": True,
-                "created_by": current_user.id
-            }
-            
-            label_repo.create_product_label(label_dict)
-            successful_labels.append(label_name)
-            
-        except Exception as e:
-            failed_labels.append({
-                "name": label_name,
-                "reason": str(e)
-            })
+    successful_labels, existing_labels = label_repo.create_product_labels_batch(
+        batch_data.labels, current_user.id
+    )
+    failed_labels = [
+        {"name": label_name, "reason": "Label already exists"}
+        for label_name in existing_labels
+    ]
     
     return LabelBatchResponse(
         successful_labels=successful_labels,
@@ -102,13 +104,31 @@ async def create_product_labels_batch(
 # Feedback Categories
 @router.get("/categories", response_model=List[FeedbackCategoryResponse])
 async def get_feedback_categories(
+    request: Request,
+    response: Response,
     active_only: bool = True,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """獲取反饋分類列表"""
-    label_repo = LabelRepository(db)
-    return label_repo.get_feedback_categories(active_only=active_only, limit=1000)
+    tags = (FeedbackCategory.__tablename__, User.__tablename__)
+    not_modified = conditional_get(request, response, tags)
+    if not_modified:
+        return not_modified
+    
+    def load():
+        label_repo = LabelRepository(db)
+        return [
+            FeedbackCategoryResponse.model_validate(category)
+            for category in label_repo.get_feedback_categories(active_only=active_only, limit=1000)
+        ]
+    
+    return cache.get_or_set(
+        f"api:feedback_categories:{active_only}",
+        load,
+        ttl=settings.LABEL_CACHE_TTL,
+        tags=tags
+    )
 
 
 @router.post("/categories", response_model=FeedbackCategoryResponse)
@@ -175,36 +195,21 @@ async def delete_product_labels_batch(
     # 獲取請求體中的產品ID列表
     try:
         body = await request.json()
-        print(f"DEBUG: Received body: {body}")
-        print(f"DEBUG: Body type: {type(body)}")
         # Handle both direct array and { data: array } formats
         product_ids = body if isinstance(body, list) else body.get('data', [])
-        print(f"DEBUG: Extracted product_ids: {product_ids}")
+        product_ids = [int(item_id) for item_id in product_ids]
     except Exception as e:
-        print(f"DEBUG: Error parsing body: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid request body: {str(e)}"
         )
     
-    deleted_count = 0
-    failed_deletions = []
-    
-    for product_id in product_ids:
-        try:
-            label = label_repo.delete_product_label(product_id)
-            if label:
-                deleted_count += 1
-            else:
-                failed_deletions.append({
-                    "id": product_id,
-                    "reason": "Product label not found"
-                })
-        except Exception as e:
-            failed_deletions.append({
-                "id": product_id,
-                "reason": str(e)
-            })
+    deleted_ids = set(label_repo.delete_product_labels_batch(product_ids))
+    deleted_count = len(deleted_ids)
+    failed_deletions = [
+        {"id": item_id, "reason": "Product label not found"}
+        for item_id in product_ids if item_id not in deleted_ids
+    ]
     
     return {
         "message": f"Batch deletion completed",
@@ -274,36 +279,21 @@ async def delete_feedback_categories_batch(
     # 獲取請求體中的分類ID列表
     try:
         body = await request.json()
-        print(f"DEBUG: Received body: {body}")
-        print(f"DEBUG: Body type: {type(body)}")
         # Handle both direct array and { data: array } formats
         category_ids = body if isinstance(body, list) else body.get('data', [])
-        print(f"DEBUG: Extracted category_ids: {category_ids}")
+        category_ids = [int(item_id) for item_id in category_ids]
     except Exception as e:
-        print(f"DEBUG: Error parsing body: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid request body: {str(e)}"
         )
     
-    deleted_count = 0
-    failed_deletions = []
-    
-    for category_id in category_ids:
-        try:
-            category = label_repo.delete_feedback_category(category_id)
-            if category:
-                deleted_count += 1
-            else:
-                failed_deletions.append({
-                    "id": category_id,
-                    "reason": "Feedback category not found"
-                })
-        except Exception as e:
-            failed_deletions.append({
-                "id": category_id,
-                "reason": str(e)
-            })
+    deleted_ids = set(label_repo.delete_feedback_categories_batch(category_ids))
+    deleted_count = len(deleted_ids)
+    failed_deletions = [
+        {"id": item_id, "reason": "Feedback category not found"}
+        for item_id in category_ids if item_id not in deleted_ids
+    ]
     
     return {
         "message": f"Batch deletion completed",
@@ -22,6 +22,63 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./storage/uploads"
     MAX_FILE_SIZE: int = 104857600  # 100MB
     ALLOWED_EXTENSIONS: str = "wav,mp3,txt"
+    CHUNK_UPLOAD_DIR: str = "./storage/chunks"  # chunks of resumable uploads in progress
+    CHUNK_UPLOAD_SIZE: int = 8388608  # 8MB per chunk
+    CHUNK_UPLOAD_TTL: int = 86400  # seconds an upload without new chunks is kept for resuming
+    IMPORT_DIR: str = "./storage/imports"  # server-side imports must be under this directory
+    IMPORT_WORKERS: int = 4  # threads hashing and copying imported files
+    IMPORT_BATCH_SIZE: int = 500  # files inserted per INSERT and commit during an import
+    STORAGE_GC_QUEUE_DIR: str = "./storage/gc"  # deleted files waiting for background removal
+    STORAGE_GC_STALE_SECONDS: int = 600  # a claimed deletion batch untouched this long is taken over
+    STORAGE_GC_GRACE_SECONDS: int = 3600  # files younger than this are never swept as orphans
+    
+    # Audio Retention
+    AUDIO_RETENTION_ACTION: str = ""  # "opus" / "flac" (transcode) or "cold" (move to AUDIO_COLD_DIR); empty disables
+    AUDIO_RETENTION_DAYS: int = 30  # days after analysis before a recording is transcoded or moved
+    AUDIO_RETENTION_FORMATS: str = "wav"  # stored file extensions that are transcoded
+    AUDIO_RETENTION_BITRATE: int = 16000  # Opus bits per second (speech stays intelligible well below this)
+    AUDIO_RETENTION_WORKERS: int = 2  # recordings transcoded in parallel
+    AUDIO_COLD_DIR: str = "./storage/cold"  # cheaper storage for recordings that are rarely played
+    
+    # Duplicate Uploads
+    DUPLICATE_DETECTION_ENABLED: bool = True  # reuse an existing file's analysis for re-uploads
+    FINGERPRINT_MAX_DISTANCE: int = 3  # acoustic fingerprint bits that may differ for a near-duplicate
+    FINGERPRINT_DURATION_TOLERANCE: float = 1.0  # seconds of duration difference allowed for a near-duplicate
+    
+    # List Views
+    TRANSCRIPT_PREVIEW_LENGTH: int = 120  # characters of transcript shown in list rows
+    
+    # Export
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched per round trip while streaming an export
+    EXPORT_DIR: str = "./storage/exports"  # background export manifests and artifacts
+    EXPORT_JOB_WORKERS: int = 2  # concurrent background exports per process
+    EXPORT_JOB_TTL: int = 86400  # seconds a finished export stays downloadable (and reusable)
+    EXPORT_JOB_STALE_SECONDS: int = 300  # a running job without progress this long is treated as abandoned
+    
+    # Full-text Search
+    SEARCH_INDEX_PATH: str = "./storage/search/search.db"  # FTS5 index shared by all workers
+    SEARCH_SNIPPET_LENGTH: int = 80  # characters of context in highlighted snippets
+    
+    # Similarity Search
+    EMBEDDING_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"  # sentence-transformers model; hashed n-grams if unavailable
+    EMBEDDING_MAX_CHARS: int = 512  # characters of summary + transcript embedded per call
+    EMBEDDING_DIR: str = "./storage/embeddings"  # float16 vectors and IVF index shared by all workers
+    SIMILARITY_NPROBE: int = 8  # IVF lists scanned per query (more is slower and more exact)
+    
+    # Cache Configuration
+    CACHE_BACKEND: str = "sqlite"  # "sqlite" (shared by all workers) or "memory" (per process; no ETags with several WORKERS)
+    CACHE_SQLITE_PATH: str = "./storage/cache/cache.db"
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_BYTES: int = 67108864  # 64MB
+    DASHBOARD_CACHE_TTL: int = 300  # dashboard/statistics, also invalidated on writes
+    DASHBOARD_STALE_TTL: int = 300  # serve stale dashboard data this long while refreshing
+    LABEL_CACHE_TTL: int = 3600  # label lists, also invalidated on writes
+    DATA_VERSION_MAX_AGE: int = 300  # ETags and reused exports expire after this even without a seen write
+    
+    # Decoded Audio Cache
+    PCM_CACHE_ENABLED: bool = False  # keep decoded 16 kHz audio so reprocessing skips decoding
+    PCM_CACHE_DIR: str = "./storage/pcm"  # int16 .npy files shared by all workers
+    PCM_CACHE_MAX_BYTES: int = 10737418240  # 10GB (about 90 hours of audio); least recently used entries are removed
     
     # AI Configuration
     LLM_API_URL: str = "http://192.168.50.123:11434/api/generate"
@@ -33,6 +90,11 @@ class Settings(BaseSettings):
     WORKERS: int = 4
     RELOAD: bool = False
     
+    # Response Compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller responses are sent as is
+    BROTLI_QUALITY: int = 4  # 0-11; higher is smaller but slower
+    GZIP_LEVEL: int = 6  # 1-9; used when brotli-asgi is not installed
+    
     # CORS Configuration
     CORS_ORIGINS: str = "*"
     
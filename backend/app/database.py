@@ -47,4 +47,24 @@ def drop_tables():
     """
     Drop all database tables.
     """
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
+
+def register_session_listeners() -> None:
+    """
+    Attach the write listeners to every Session: cache invalidation, the
+    full-text index and similarity vector cleanup.
+
+    Registered when this module is imported, so the API, its background
+    tasks and the scripts all keep the shared caches and indexes in step
+    with their commits. Safe to call more than once.
+    """
+    from .utils.cache_invalidation import register_cache_invalidation
+    from .utils.search_index import register_search_indexing
+    from .utils.vector_index import register_vector_cleanup
+
+    register_cache_invalidation()
+    register_search_indexing()
+    register_vector_cleanup()
+
+
+register_session_listeners()
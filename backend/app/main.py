@@ -4,12 +4,19 @@ FastAPI main application.
 import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from .config import settings
 from .database import create_tables
+from .utils.cache import setup_cache_maintenance
+from .services.export_service import export_jobs
+from .services.upload_service import chunked_uploads
+from .services.storage_service import deletion_queue
+from .utils.responses import FastJSONResponse
+from .utils.file_handler import UploadSizeLimitMiddleware
 from .api.v1 import auth, files, analysis, data, labels, users
 
 # Configure logging
@@ -26,9 +33,13 @@ app = FastAPI(
     description="奇美食品客服語音分析系統 API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
+# Refuse oversized single-file uploads before their body is received (added first so CORS headers still apply)
+app.add_middleware(UploadSizeLimitMiddleware, paths=("/api/files/upload",), max_size=settings.MAX_FILE_SIZE)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +49,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses above the size threshold; brotli for clients that accept it
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(
+        BrotliMiddleware,
+        quality=settings.BROTLI_QUALITY,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_fallback=True
+    )
+except ImportError:
+    logger.warning("brotli-asgi not installed, falling back to gzip compression")
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        compresslevel=settings.GZIP_LEVEL
+    )
+
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
@@ -102,6 +130,18 @@ async def startup_event():
         logger.error(f"Failed to create database tables: {e}")
         raise
     
+    # Release expired cache entries even when no new entries are written
+    setup_cache_maintenance()
+    
+    # Drop export artifacts that expired while the server was down
+    export_jobs.cleanup_expired()
+    
+    # Drop chunked uploads abandoned long enough ago that they will not be resumed
+    chunked_uploads.cleanup_expired()
+    
+    # Remove files deleted before a restart (in the background)
+    deletion_queue.start()
+    
     logger.info("Chime Dashboard API started successfully")
 
 
@@ -0,0 +1,30 @@
+"""
+File fingerprint model for duplicate upload detection.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+
+from ..database import Base
+
+
+class FileFingerprint(Base):
+    """Content hash and acoustic fingerprint of an uploaded file (one row per file)."""
+    
+    __tablename__ = "voice_file_fingerprints"
+    
+    file_id = Column(String(50), ForeignKey("voice_files.id", ondelete="CASCADE"), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA-256 hex of the file bytes
+    
+    # 64-bit acoustic fingerprint (hex) and its four 16-bit bands for indexed candidate lookup
+    acoustic_hash = Column(String(16), nullable=True)
+    band_0 = Column(Integer, nullable=True, index=True)
+    band_1 = Column(Integer, nullable=True, index=True)
+    band_2 = Column(Integer, nullable=True, index=True)
+    band_3 = Column(Integer, nullable=True, index=True)
+    duration = Column(Float, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<FileFingerprint(file_id={self.file_id}, content_hash={self.content_hash[:12]})>"
@@ -6,11 +6,13 @@ from .user import UserRepository
 from .file import FileRepository
 from .analysis import AnalysisRepository
 from .label import LabelRepository
+from .fingerprint import FingerprintRepository
 
 __all__ = [
     "BaseRepository",
     "UserRepository", 
     "FileRepository",
     "AnalysisRepository",
-    "LabelRepository"
+    "LabelRepository",
+    "FingerprintRepository"
 ]
\ No newline at end of file
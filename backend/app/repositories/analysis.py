@@ -1,16 +1,21 @@
 """
 Analysis repository for analysis-related database operations.
 """
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict, Any, Iterator
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc, and_, func, or_
 
+from ..config import settings
 from ..models.analysis import VoiceAnalysis, SentimentType
 from ..models.file import VoiceFile
 from ..models.user import User
+from ..utils.cache import cache_database_query
 from .base import BaseRepository
 
+# Tables read by analysis aggregates; writes to them invalidate cached results
+ANALYSIS_TABLES = (VoiceAnalysis.__tablename__, VoiceFile.__tablename__)
+
 
 class AnalysisRepository(BaseRepository[VoiceAnalysis]):
     """Analysis repository with analysis-specific operations."""
@@ -37,27 +42,44 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
             .first()
         )
     
-    def get_multi_with_file_info(
+    def _list_columns(self, preview_length: int) -> list:
+        """Columns shown in list views; the transcript is cut to a preview in SQL."""
+        return [
+            VoiceAnalysis.id,
+            VoiceAnalysis.file_id,
+            VoiceAnalysis.sentiment,
+            VoiceAnalysis.feedback_category,
+            VoiceAnalysis.feedback_summary,
+            VoiceAnalysis.product_names,
+            VoiceAnalysis.analysis_time,
+            VoiceAnalysis.created_at,
+            func.substr(VoiceAnalysis.transcript, 1, preview_length).label('transcript_preview'),
+        ]
+    
+    def get_summaries_by_file_ids(self, file_ids: List[str], preview_length: int) -> Dict[str, Any]:
+        """Get list-view analysis rows for many files in one IN query, keyed by file ID."""
+        if not file_ids:
+            return {}
+        
+        rows = (
+            self.db.query(*self._list_columns(preview_length))
+            .filter(VoiceAnalysis.file_id.in_(file_ids))
+            .all()
+        )
+        return {row.file_id: row for row in rows}
+    
+    def _apply_filters(
         self,
-        skip: int = 0,
-        limit: int = 100,
+        query,
         product_names: Optional[List[str]] = None,
         feedback_categories: Optional[List[str]] = None,
         sentiments: Optional[List[SentimentType]] = None,
         uploaders: Optional[List[str]] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> List[VoiceAnalysis]:
-        """Get multiple analyses with file information and filtering."""
-        query = (
-            self.db.query(VoiceAnalysis)
-            .options(
-                joinedload(VoiceAnalysis.file).joinedload(VoiceFile.uploader)
-            )
-            .order_by(desc(VoiceAnalysis.analysis_time))
-        )
-        
-        # Apply filters
+        end_date: Optional[datetime] = None,
+        file_joined: bool = False
+    ):
+        """Apply the shared analysis filter dimensions to a query."""
         # Dimension 1: Products (OR within dimension)
         if product_names:
             # Filter by product names - handle "未分類" specially
@@ -96,13 +118,11 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         if feedback_categories:
             query = query.filter(VoiceAnalysis.feedback_category.in_(feedback_categories))
         
-        if uploaders:
-            query = query.join(VoiceFile).filter(VoiceFile.uploaded_by.in_(uploaders))
+        if (uploaders or start_date or end_date) and not file_joined:
+            query = query.join(VoiceFile, VoiceAnalysis.file_id == VoiceFile.id)
         
-        if start_date or end_date:
-            # Ensure VoiceFile is joined if not already
-            if not uploaders:  # If not already joined via uploaders filter
-                query = query.join(VoiceFile, VoiceAnalysis.file_id == VoiceFile.id)
+        if uploaders:
+            query = query.filter(VoiceFile.uploaded_by.in_(uploaders))
         
         if start_date:
             query = query.filter(VoiceFile.created_at >= start_date)
@@ -110,75 +130,215 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         if end_date:
             query = query.filter(VoiceFile.created_at <= end_date)
         
+        return query
+    
+    def get_multi_with_file_info(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        product_names: Optional[List[str]] = None,
+        feedback_categories: Optional[List[str]] = None,
+        sentiments: Optional[List[SentimentType]] = None,
+        uploaders: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[VoiceAnalysis]:
+        """
+        Get multiple analyses with file information and filtering.
+        
+        When ``after`` is given, rows are fetched by keyset position
+        (analysis_time, id) instead of OFFSET, so deep pages cost the same
+        as the first one.
+        """
+        query = (
+            self.db.query(VoiceAnalysis)
+            .options(
+                joinedload(VoiceAnalysis.file).joinedload(VoiceFile.uploader)
+            )
+            .order_by(desc(VoiceAnalysis.analysis_time), desc(VoiceAnalysis.id))
+        )
+        
+        query = self._apply_filters(
+            query,
+            product_names=product_names,
+            feedback_categories=feedback_categories,
+            sentiments=sentiments,
+            uploaders=uploaders,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
+        if after:
+            return self._after(query, after).limit(limit).all()
+        
         return query.offset(skip).limit(limit).all()
     
-    def count_with_filters(
+    def get_list_with_file_info(
         self,
+        skip: int = 0,
+        limit: int = 100,
+        preview_length: int = 120,
         product_names: Optional[List[str]] = None,
         feedback_categories: Optional[List[str]] = None,
         sentiments: Optional[List[SentimentType]] = None,
         uploaders: Optional[List[str]] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> int:
-        """Count analyses with filters."""
-        query = self.db.query(VoiceAnalysis)
+        end_date: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Any]:
+        """
+        Get list-view rows for analyses, with file and uploader columns.
         
-        # Apply filters (same as get_multi_with_file_info)
-        # Dimension 1: Products (OR within dimension)
-        if product_names:
-            # Filter by product names - handle "未分類" specially
-            product_conditions = []
-            for product in product_names:
-                if product == "未分類":
-                    # Special handling for unclassified records
-                    product_conditions.append(
-                        or_(
-                            VoiceAnalysis.product_names.is_(None),
-                            VoiceAnalysis.product_names.like('null'),
-                            VoiceAnalysis.product_names.like('[]')
-                        )
-                    )
-                else:
-                    # Regular product name matching - handle double JSON encoding
-                    product_conditions.append(
-                        and_(
-                            VoiceAnalysis.product_names.isnot(None),
-                            VoiceAnalysis.product_names != 'null',
-                            VoiceAnalysis.product_names != '[]',
-                            VoiceAnalysis.product_names.contains(f'\\\\\\"{product}\\\\\\"')
-                        )
-                    )
-            
-            if product_conditions:
-                # Apply OR within product dimension
-                query = query.filter(or_(*product_conditions))
+        Selects only the columns list tables show, so the full transcript is
+        never read into Python; it is cut to ``preview_length`` characters in SQL.
+        """
+        query = (
+            self.db.query(
+                *self._list_columns(preview_length),
+                VoiceFile.original_filename.label('filename'),
+                VoiceFile.created_at.label('upload_time'),
+                User.name.label('uploader_name'),
+            )
+            .join(VoiceFile, VoiceAnalysis.file_id == VoiceFile.id)
+            .outerjoin(User, VoiceFile.uploaded_by == User.id)
+            .order_by(desc(VoiceAnalysis.analysis_time), desc(VoiceAnalysis.id))
+        )
         
-        # Dimension 2: Sentiments (OR within dimension, AND with products)
-        if sentiments:
-            # Apply OR within sentiment dimension, AND with product filter
-            query = query.filter(VoiceAnalysis.sentiment.in_(sentiments))
+        query = self._apply_filters(
+            query,
+            product_names=product_names,
+            feedback_categories=feedback_categories,
+            sentiments=sentiments,
+            uploaders=uploaders,
+            start_date=start_date,
+            end_date=end_date,
+            file_joined=True
+        )
         
-        # Other filters (AND with all previous filters)
-        if feedback_categories:
-            query = query.filter(VoiceAnalysis.feedback_category.in_(feedback_categories))
+        if after:
+            return self._after(query, after).limit(limit).all()
         
-        if uploaders:
-            query = query.join(VoiceFile).filter(VoiceFile.uploaded_by.in_(uploaders))
+        return query.offset(skip).limit(limit).all()
+    
+    def get_list_by_ids(self, analysis_ids: List[str], preview_length: int = 120) -> List[Any]:
+        """
+        Get list-view rows plus the full transcript for the given analyses, in the order given.
         
-        if start_date or end_date:
-            # Ensure VoiceFile is joined if not already
-            if not uploaders:  # If not already joined via uploaders filter
-                query = query.join(VoiceFile, VoiceAnalysis.file_id == VoiceFile.id)
+        IDs without an analysis (e.g. deleted since they were looked up) are skipped.
+        """
+        if not analysis_ids:
+            return []
         
-        if start_date:
-            query = query.filter(VoiceFile.created_at >= start_date)
+        rows = (
+            self.db.query(
+                *self._list_columns(preview_length),
+                VoiceAnalysis.transcript,
+                VoiceFile.original_filename.label('filename'),
+                VoiceFile.created_at.label('upload_time'),
+                User.name.label('uploader_name'),
+            )
+            .join(VoiceFile, VoiceAnalysis.file_id == VoiceFile.id)
+            .outerjoin(User, VoiceFile.uploaded_by == User.id)
+            .filter(VoiceAnalysis.id.in_(analysis_ids))
+            .all()
+        )
+        by_id = {row.id: row for row in rows}
+        return [by_id[analysis_id] for analysis_id in analysis_ids if analysis_id in by_id]
+    
+    def iter_search_documents(self, batch_size: int = 1000) -> Iterator[Any]:
+        """Yield (id, file_id, transcript, feedback_summary) for every analysis, fetched in batches."""
+        query = self.db.query(
+            VoiceAnalysis.id,
+            VoiceAnalysis.file_id,
+            VoiceAnalysis.transcript,
+            VoiceAnalysis.feedback_summary,
+        )
+        return iter(query.yield_per(batch_size))
+    
+    def iter_export_rows(
+        self,
+        batch_size: int = 1000,
+        product_names: Optional[List[str]] = None,
+        feedback_categories: Optional[List[str]] = None,
+        sentiments: Optional[List[SentimentType]] = None,
+        uploaders: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        """
+        Iterate over export rows for every matching analysis.
         
-        if end_date:
-            query = query.filter(VoiceFile.created_at <= end_date)
+        Rows are streamed from a server-side cursor ``batch_size`` at a
+        time, so memory use does not grow with the number of rows.
+        """
+        query = (
+            self.db.query(
+                VoiceAnalysis.id,
+                VoiceAnalysis.product_names,
+                VoiceAnalysis.sentiment,
+                VoiceAnalysis.feedback_category,
+                VoiceAnalysis.feedback_summary,
+                VoiceAnalysis.analysis_time,
+                VoiceAnalysis.transcript,
+                VoiceFile.original_filename.label('filename'),
+                User.name.label('uploader_name'),
+            )
+            .join(VoiceFile, VoiceAnalysis.file_id == VoiceFile.id)
+            .outerjoin(User, VoiceFile.uploaded_by == User.id)
+            .order_by(desc(VoiceAnalysis.analysis_time), desc(VoiceAnalysis.id))
+        )
+        
+        query = self._apply_filters(
+            query,
+            product_names=product_names,
+            feedback_categories=feedback_categories,
+            sentiments=sentiments,
+            uploaders=uploaders,
+            start_date=start_date,
+            end_date=end_date,
+            file_joined=True
+        )
+        
+        return iter(query.yield_per(batch_size))
+    
+    def _after(self, query, after: Tuple[datetime, str]):
+        """Restrict a query ordered by (analysis_time, id) DESC to rows after a keyset position."""
+        after_time, after_id = after
+        return query.filter(
+            or_(
+                VoiceAnalysis.analysis_time < after_time,
+                and_(
+                    VoiceAnalysis.analysis_time == after_time,
+                    VoiceAnalysis.id < after_id
+                )
+            )
+        )
+    
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
+    def count_with_filters(
+        self,
+        product_names: Optional[List[str]] = None,
+        feedback_categories: Optional[List[str]] = None,
+        sentiments: Optional[List[SentimentType]] = None,
+        uploaders: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        """Count analyses with filters."""
+        query = self._apply_filters(
+            self.db.query(VoiceAnalysis),
+            product_names=product_names,
+            feedback_categories=feedback_categories,
+            sentiments=sentiments,
+            uploaders=uploaders,
+            start_date=start_date,
+            end_date=end_date
+        )
         
         return query.count()
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_sentiment_distribution(self) -> dict:
         """Get sentiment distribution statistics."""
         result = (
@@ -192,6 +352,7 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         
         return {sentiment.value: count for sentiment, count in result}
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_product_distribution(self, limit: int = 10) -> List[dict]:
         """Get top products by frequency."""
         # This is simplified - in reality you'd need to parse JSON properly
@@ -209,6 +370,7 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         
         return [{'product': product, 'count': count} for product, count in result]
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_product_distribution_with_sentiment(self, limit: int = 10) -> List[dict]:
         """Get top products with sentiment distribution."""
         # Get top products first, including None values (represent as "未分類")
@@ -273,6 +435,7 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         return result
     
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_category_distribution(self, limit: int = 10) -> List[dict]:
         """Get feedback category distribution."""
         result = (
@@ -289,6 +452,7 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         
         return [{'category': category, 'count': count} for category, count in result]
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_category_distribution_with_sentiment(self, limit: int = 10) -> List[dict]:
         """Get feedback categories with sentiment distribution."""
         # Get top categories first, including None/empty values (represent as "未分類")
@@ -358,6 +522,7 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
         return result
     
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_daily_trend(self, days: int = 30) -> List[dict]:
         """Get daily analysis trend based on file upload time."""
         start_date = datetime.utcnow().date() - timedelta(days=days)
@@ -388,6 +553,7 @@ class AnalysisRepository(BaseRepository[VoiceAnalysis]):
             .all()
         )
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=ANALYSIS_TABLES)
     def get_daily_counts_by_product_sentiment(
         self, 
         product_name: Optional[str], 
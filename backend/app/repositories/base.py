@@ -1,13 +1,16 @@
 """
 Base repository class with common CRUD operations.
 """
-from typing import Generic, TypeVar, Type, Optional, List, Any, Dict
+from typing import Generic, TypeVar, Type, Optional, List, Any, Dict, Iterable
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, insert, update, delete
 from ..database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+# Rows per multi-row INSERT or IDs per IN list in bulk operations
+BULK_BATCH_SIZE = 1000
+
 
 class BaseRepository(Generic[ModelType]):
     """Base repository with common CRUD operations."""
@@ -66,6 +69,98 @@ class BaseRepository(Generic[ModelType]):
             self.db.commit()
         return db_obj
     
+    def get_by_ids(self, ids: Iterable[Any]) -> List[ModelType]:
+        """Get the records with the given IDs (missing IDs are skipped) in one query per BULK_BATCH_SIZE."""
+        ids = list(ids)
+        records = []
+        for start in range(0, len(ids), BULK_BATCH_SIZE):
+            records.extend(
+                self.db.query(self.model).filter(self.model.id.in_(ids[start:start + BULK_BATCH_SIZE])).all()
+            )
+        return records
+    
+    def bulk_create(self, rows: List[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Insert records with multi-row INSERT statements in one transaction.
+        
+        No ORM objects are created or refreshed; column defaults still apply.
+        Every row must have the same keys.
+        
+        Args:
+            rows: Column values of each record
+            commit: Commit the transaction (pass False to add more writes to it first)
+            
+        Returns:
+            int: Number of records inserted
+        """
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            self.db.execute(insert(self.model).values(rows[start:start + BULK_BATCH_SIZE]))
+        if commit:
+            self.db.commit()
+        return len(rows)
+    
+    def bulk_update(self, ids: Iterable[Any], values: Dict[str, Any], commit: bool = True) -> int:
+        """
+        Set the same column values on many records with one UPDATE per BULK_BATCH_SIZE IDs.
+        
+        Records already loaded in the session are not refreshed.
+        
+        Args:
+            ids: IDs of the records to update
+            values: Column values to set
+            commit: Commit the transaction
+            
+        Returns:
+            int: Number of records updated
+        """
+        ids = list(ids)
+        updated = 0
+        for start in range(0, len(ids), BULK_BATCH_SIZE):
+            result = self.db.execute(
+                update(self.model)
+                .where(self.model.id.in_(ids[start:start + BULK_BATCH_SIZE]))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        if commit:
+            self.db.commit()
+        return updated
+    
+    def bulk_delete(self, ids: Iterable[Any], commit: bool = True) -> List[Any]:
+        """
+        Delete many records with one DELETE per BULK_BATCH_SIZE IDs.
+        
+        ORM cascades and delete events do not run; rows in tables with
+        ON DELETE CASCADE foreign keys are removed by the database.
+        
+        Args:
+            ids: IDs of the records to delete
+            commit: Commit the transaction
+            
+        Returns:
+            List[Any]: IDs that existed and were deleted
+        """
+        ids = list(ids)
+        deleted = []
+        for start in range(0, len(ids), BULK_BATCH_SIZE):
+            batch = ids[start:start + BULK_BATCH_SIZE]
+            existing = [row[0] for row in self.db.query(self.model.id).filter(self.model.id.in_(batch)).all()]
+            self._delete_ids(existing)
+            deleted.extend(existing)
+        if commit:
+            self.db.commit()
+        return deleted
+    
+    def _delete_ids(self, ids: List[Any]) -> None:
+        """DELETE the rows with the given IDs (at most BULK_BATCH_SIZE) without loading them."""
+        if ids:
+            self.db.execute(
+                delete(self.model)
+                .where(self.model.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+    
     def count(self) -> int:
         """Count total records."""
         return self.db.query(self.model).count()
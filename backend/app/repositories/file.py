@@ -1,14 +1,20 @@
 """
 File repository for file-related database operations.
 """
-from typing import Optional, List
+import os
+from typing import Optional, List, Tuple, Dict, Iterable, Iterator, Set
 from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, or_, update, exists, func
 
+from ..config import settings
 from ..models.file import VoiceFile, FileStatus, FileFormat
 from ..models.user import User
-from .base import BaseRepository
+from ..models.analysis import VoiceAnalysis
+from ..utils.cache import cache_database_query
+from ..utils.search_index import record_removed_files
+from ..utils.vector_index import record_removed_analyses
+from .base import BaseRepository, BULK_BATCH_SIZE
 
 
 class FileRepository(BaseRepository[VoiceFile]):
@@ -34,13 +40,19 @@ class FileRepository(BaseRepository[VoiceFile]):
         format: Optional[FileFormat] = None,
         uploaded_by: Optional[str] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, str]] = None
     ) -> List[VoiceFile]:
-        """Get multiple files with uploader information and filtering."""
+        """
+        Get multiple files with uploader information and filtering.
+        
+        When ``after`` is given, rows are fetched by keyset position
+        (created_at, id) instead of OFFSET.
+        """
         query = (
             self.db.query(VoiceFile)
             .options(joinedload(VoiceFile.uploader))
-            .order_by(desc(VoiceFile.created_at))
+            .order_by(desc(VoiceFile.created_at), desc(VoiceFile.id))
         )
         
         # Apply filters
@@ -55,8 +67,19 @@ class FileRepository(BaseRepository[VoiceFile]):
         if end_date:
             query = query.filter(VoiceFile.created_at <= end_date)
         
+        if after:
+            after_time, after_id = after
+            query = query.filter(
+                or_(
+                    VoiceFile.created_at < after_time,
+                    and_(VoiceFile.created_at == after_time, VoiceFile.id < after_id)
+                )
+            )
+            return query.limit(limit).all()
+        
         return query.offset(skip).limit(limit).all()
     
+    @cache_database_query(ttl=settings.DASHBOARD_CACHE_TTL, tags=(VoiceFile.__tablename__,))
     def count_with_filters(
         self,
         status: Optional[FileStatus] = None,
@@ -111,6 +134,124 @@ class FileRepository(BaseRepository[VoiceFile]):
             self.db.refresh(file_obj)
         return file_obj
     
+    def delete_files(self, file_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Delete file records in bulk: one SELECT and one DELETE per BULK_BATCH_SIZE IDs.
+        
+        Analyses and fingerprints go with them through ON DELETE CASCADE, and
+        their search documents and similarity vectors are removed on commit.
+        
+        Returns:
+            Dict[str, str]: File path of each deleted record, by ID (missing IDs are left out)
+        """
+        file_ids = list(file_ids)
+        deleted = {}
+        analysis_ids = set()
+        for start in range(0, len(file_ids), BULK_BATCH_SIZE):
+            rows = (
+                self.db.query(VoiceFile.id, VoiceFile.file_path, VoiceAnalysis.id.label("analysis_id"))
+                .outerjoin(VoiceAnalysis, VoiceAnalysis.file_id == VoiceFile.id)
+                .filter(VoiceFile.id.in_(file_ids[start:start + BULK_BATCH_SIZE]))
+                .all()
+            )
+            batch = {row.id: row.file_path for row in rows}
+            self._delete_ids(list(batch))
+            deleted.update(batch)
+            analysis_ids.update(row.analysis_id for row in rows if row.analysis_id)
+        record_removed_files(self.db, deleted)
+        record_removed_analyses(self.db, analysis_ids)
+        self.db.commit()
+        return deleted
+    
+    def iter_file_paths(self, batch_size: int = BULK_BATCH_SIZE) -> Iterator[Tuple[str, str]]:
+        """Yield (id, file_path) of every file record, fetched in batches."""
+        return iter(self.db.query(VoiceFile.id, VoiceFile.file_path).yield_per(batch_size))
+    
+    def get_file_paths(self, after: Optional[str] = None, limit: int = BULK_BATCH_SIZE) -> List[Tuple[str, str]]:
+        """(id, file_path) of up to limit file records with IDs after the given one, in ID order."""
+        query = self.db.query(VoiceFile.id, VoiceFile.file_path)
+        if after is not None:
+            query = query.filter(VoiceFile.id > after)
+        return query.order_by(VoiceFile.id).limit(limit).all()
+    
+    def get_referenced_paths(self, paths: Iterable[str]) -> Set[str]:
+        """Which of the given stored file paths some file record still points to."""
+        paths = list(set(paths))
+        referenced = set()
+        for start in range(0, len(paths), BULK_BATCH_SIZE):
+            rows = (
+                self.db.query(VoiceFile.file_path)
+                .filter(VoiceFile.file_path.in_(paths[start:start + BULK_BATCH_SIZE]))
+                .distinct()
+                .all()
+            )
+            referenced.update(row.file_path for row in rows)
+        return referenced
+    
+    def update_file_paths(self, paths: Dict[str, str], commit: bool = True) -> None:
+        """Point file records at new stored paths (one executemany UPDATE by primary key)."""
+        if paths:
+            self.db.execute(update(VoiceFile), [
+                {"id": file_id, "file_path": file_path, "filename": os.path.basename(file_path)}
+                for file_id, file_path in paths.items()
+            ])
+        if commit:
+            self.db.commit()
+    
+    def get_files_for_retention(
+        self,
+        analyzed_before: datetime,
+        extensions: Optional[List[str]] = None,
+        outside_dir: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: int = 500
+    ) -> List[Tuple[str, str]]:
+        """
+        (id, file_path) of completed audio files analyzed before a time, in ID order.
+        
+        Args:
+            analyzed_before: Only files whose analysis is older than this
+            extensions: Only stored files with these extensions (lowercase, without dot)
+            outside_dir: Skip files already stored under this directory
+            after: Return files with IDs after this one (keyset paging)
+            limit: Maximum files
+        """
+        query = (
+            self.db.query(VoiceFile.id, VoiceFile.file_path)
+            .filter(VoiceFile.status == FileStatus.COMPLETED)
+            .filter(VoiceFile.file_format != FileFormat.TXT)
+            .filter(exists().where(and_(
+                VoiceAnalysis.file_id == VoiceFile.id,
+                VoiceAnalysis.analysis_time < analyzed_before
+            )))
+        )
+        if extensions:
+            query = query.filter(or_(*[func.lower(VoiceFile.file_path).like(f"%.{ext}") for ext in extensions]))
+        if outside_dir:
+            query = query.filter(~VoiceFile.file_path.startswith(outside_dir))
+        if after is not None:
+            query = query.filter(VoiceFile.id > after)
+        return query.order_by(VoiceFile.id).limit(limit).all()
+    
+    def replace_stored_file(self, old_path: str, new_path: str, file_size: int, commit: bool = True) -> int:
+        """
+        Point the completed file records stored at old_path to new_path.
+        
+        Records still being analyzed keep the old file (and so keep it referenced).
+        
+        Returns:
+            int: Number of records updated
+        """
+        result = self.db.execute(
+            update(VoiceFile)
+            .where(VoiceFile.file_path == old_path, VoiceFile.status == FileStatus.COMPLETED)
+            .values(file_path=new_path, filename=os.path.basename(new_path), file_size=file_size)
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            self.db.commit()
+        return result.rowcount
+    
     def get_pending_files(self) -> List[VoiceFile]:
         """Get files pending analysis."""
         return (
@@ -0,0 +1,155 @@
+"""
+Fingerprint repository for duplicate upload lookups.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, List, Set, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+
+from ..models.file import VoiceFile, FileStatus
+from ..models.fingerprint import FileFingerprint
+from ..utils.fingerprint import AcousticFingerprint, hamming_distance
+from .base import BaseRepository
+
+
+class FingerprintRepository(BaseRepository[FileFingerprint]):
+    """Fingerprint repository with duplicate lookups."""
+    
+    def __init__(self, db: Session):
+        super().__init__(FileFingerprint, db)
+    
+    def _candidates(self):
+        """Files that can stand in for a new upload: anything not failed."""
+        return (
+            self.db.query(VoiceFile, FileFingerprint)
+            .join(FileFingerprint, FileFingerprint.file_id == VoiceFile.id)
+            .filter(VoiceFile.status != FileStatus.FAILED)
+        )
+    
+    def find_by_content_hash(self, content_hash: str) -> Optional[VoiceFile]:
+        """Earliest non-failed file with exactly this content."""
+        row = (
+            self._candidates()
+            .filter(FileFingerprint.content_hash == content_hash)
+            .order_by(VoiceFile.created_at, VoiceFile.id)
+            .first()
+        )
+        return row[0] if row else None
+    
+    def get_existing_content_hashes(self, content_hashes: List[str], chunk_size: int = 500) -> Set[str]:
+        """Which of the given content hashes are already stored (any file status)."""
+        existing = set()
+        unique = list(set(content_hashes))
+        for start in range(0, len(unique), chunk_size):
+            rows = (
+                self.db.query(FileFingerprint.content_hash)
+                .filter(FileFingerprint.content_hash.in_(unique[start:start + chunk_size]))
+                .all()
+            )
+            existing.update(row.content_hash for row in rows)
+        return existing
+    
+    def get_content_hashes(self, file_ids: List[str]) -> Dict[str, str]:
+        """Recorded content hash of each given file that has fingerprints."""
+        rows = (
+            self.db.query(FileFingerprint.file_id, FileFingerprint.content_hash)
+            .filter(FileFingerprint.file_id.in_(file_ids))
+            .all()
+        ) if file_ids else []
+        return {row.file_id: row.content_hash for row in rows}
+    
+    def find_by_acoustic_fingerprint(
+        self,
+        fingerprint: AcousticFingerprint,
+        max_distance: int,
+        duration_tolerance: float
+    ) -> Optional[Tuple[VoiceFile, int]]:
+        """
+        Closest non-failed file that sounds like the fingerprinted recording.
+        
+        Candidates share at least one fingerprint band (indexed lookups) and
+        have a duration within the tolerance; the rest are compared bit by bit.
+        
+        Returns:
+            Optional[Tuple[VoiceFile, int]]: File and fingerprint distance in bits
+        """
+        bands = fingerprint.bands
+        rows = (
+            self._candidates()
+            .filter(
+                or_(
+                    FileFingerprint.band_0 == bands[0],
+                    FileFingerprint.band_1 == bands[1],
+                    FileFingerprint.band_2 == bands[2],
+                    FileFingerprint.band_3 == bands[3],
+                ),
+                FileFingerprint.duration.between(
+                    fingerprint.duration - duration_tolerance, fingerprint.duration + duration_tolerance
+                )
+            )
+            .all()
+        )
+        
+        best = None
+        for file_obj, stored in rows:
+            distance = hamming_distance(fingerprint.value, stored.acoustic_hash)
+            if distance <= max_distance and (best is None or (distance, file_obj.created_at) < (best[1], best[0].created_at)):
+                best = (file_obj, distance)
+        return best
+    
+    @staticmethod
+    def row(
+        file_id: str,
+        content_hash: str,
+        fingerprint: Optional[AcousticFingerprint] = None
+    ) -> Dict[str, Any]:
+        """Column values of a file's fingerprints."""
+        bands = fingerprint.bands if fingerprint else (None,) * 4
+        return {
+            "file_id": file_id,
+            "content_hash": content_hash,
+            "acoustic_hash": fingerprint.value if fingerprint else None,
+            "band_0": bands[0],
+            "band_1": bands[1],
+            "band_2": bands[2],
+            "band_3": bands[3],
+            "duration": fingerprint.duration if fingerprint else None
+        }
+    
+    def save(
+        self,
+        file_id: str,
+        content_hash: str,
+        fingerprint: Optional[AcousticFingerprint] = None
+    ) -> FileFingerprint:
+        """Store (or replace) a file's fingerprints."""
+        record = self.db.merge(FileFingerprint(**self.row(file_id, content_hash, fingerprint)))
+        self.db.commit()
+        return record
+    
+    def get_files_without_fingerprint(
+        self,
+        limit: int = 500,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[VoiceFile]:
+        """
+        Files uploaded before fingerprints were recorded, oldest first.
+        
+        Args:
+            limit: Maximum files returned
+            after: (created_at, id) of the last file already processed
+        """
+        query = (
+            self.db.query(VoiceFile)
+            .outerjoin(FileFingerprint, FileFingerprint.file_id == VoiceFile.id)
+            .filter(FileFingerprint.file_id.is_(None))
+        )
+        if after:
+            after_time, after_id = after
+            query = query.filter(
+                or_(
+                    VoiceFile.created_at > after_time,
+                    and_(VoiceFile.created_at == after_time, VoiceFile.id > after_id)
+                )
+            )
+        return query.order_by(VoiceFile.created_at, VoiceFile.id).limit(limit).all()
@@ -1,7 +1,7 @@
 """
 Label repository for label-related database operations.
 """
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session, joinedload
 
 from ..models.label import ProductLabel, FeedbackCategory
@@ -145,34 +145,44 @@ class LabelRepository:
         return query.count()
     
     # Batch operations
-    def create_product_labels_batch(self, labels: List[str], created_by: str) -> List[ProductLabel]:
-        """Create multiple product labels."""
-        created_labels = []
-        for label_name in labels:
-            # Check if label already exists
-            if not self.get_product_label_by_name(label_name):
-                label_data = {
-                    "name": label_name,
-                    "created_by": created_by,
-                    "is_active": True
-                }
-                created_label = self.create_product_label(label_data)
-                created_labels.append(created_label)
+    def _create_batch(self, repo: BaseRepository, names: List[str], created_by: str) -> Tuple[List[str], List[str]]:
+        """Insert the names not taken yet with one lookup and one multi-row INSERT."""
+        model = repo.model
+        taken = {
+            row[0] for row in self.db.query(model.name).filter(model.name.in_(set(names))).all()
+        } if names else set()
+        new_names, existing = [], []
+        for name in names:
+            # A name repeated in the batch exists once its first copy is created
+            (existing if name in taken else new_names).append(name)
+            taken.add(name)
+        repo.bulk_create([
+            {"name": name, "created_by": created_by, "is_active": True} for name in new_names
+        ])
+        return new_names, existing
+    
+    def create_product_labels_batch(self, labels: List[str], created_by: str) -> Tuple[List[str], List[str]]:
+        """
+        Create multiple product labels in one transaction.
         
-        return created_labels
-    
-    def create_feedback_categories_batch(self, categories: List[str], created_by: str) -> List[FeedbackCategory]:
-        """Create multiple feedback categories."""
-        created_categories = []
-        for category_name in categories:
-            # Check if category already exists
-            if not self.get_feedback_category_by_name(category_name):
-                category_data = {
-                    "name": category_name,
-                    "created_by": created_by,
-                    "is_active": True
-                }
-                created_category = self.create_feedback_category(category_data)
-                created_categories.append(created_category)
+        Returns:
+            Tuple[List[str], List[str]]: Names created, and names that already existed
+        """
+        return self._create_batch(self.product_labels, labels, created_by)
+    
+    def create_feedback_categories_batch(self, categories: List[str], created_by: str) -> Tuple[List[str], List[str]]:
+        """
+        Create multiple feedback categories in one transaction.
         
-        return created_categories
\ No newline at end of file
+        Returns:
+            Tuple[List[str], List[str]]: Names created, and names that already existed
+        """
+        return self._create_batch(self.feedback_categories, categories, created_by)
+    
+    def delete_product_labels_batch(self, label_ids: List[int]) -> List[int]:
+        """Delete multiple product labels; returns the IDs that existed."""
+        return self.product_labels.bulk_delete(label_ids)
+    
+    def delete_feedback_categories_batch(self, category_ids: List[int]) -> List[int]:
+        """Delete multiple feedback categories; returns the IDs that existed."""
+        return self.feedback_categories.bulk_delete(category_ids)
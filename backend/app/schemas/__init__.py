@@ -3,16 +3,16 @@ Pydantic schemas package.
 """
 from .user import UserCreate, UserUpdate, UserResponse, LoginRequest, TokenResponse
 from .file import FileResponse, FileCreate, FileUpdate, FileListResponse
-from .analysis import AnalysisResponse, AnalysisCreate, AnalysisListResponse
+from .analysis import AnalysisResponse, AnalysisCreate, AnalysisListResponse, AnalysisListItem
 from .label import ProductLabelCreate, ProductLabelUpdate, ProductLabelResponse
 from .label import FeedbackCategoryCreate, FeedbackCategoryUpdate, FeedbackCategoryResponse
-from .common import PaginationParams, PaginatedResponse
+from .common import PaginationParams, PaginatedResponse, CursorPaginatedResponse
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "LoginRequest", "TokenResponse",
     "FileResponse", "FileCreate", "FileUpdate", "FileListResponse",
-    "AnalysisResponse", "AnalysisCreate", "AnalysisListResponse", 
+    "AnalysisResponse", "AnalysisCreate", "AnalysisListResponse", "AnalysisListItem",
     "ProductLabelCreate", "ProductLabelUpdate", "ProductLabelResponse",
     "FeedbackCategoryCreate", "FeedbackCategoryUpdate", "FeedbackCategoryResponse",
-    "PaginationParams", "PaginatedResponse"
+    "PaginationParams", "PaginatedResponse", "CursorPaginatedResponse"
 ]
\ No newline at end of file
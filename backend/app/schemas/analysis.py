@@ -1,12 +1,27 @@
 """
 Analysis-related Pydantic schemas.
 """
-from typing import Optional, List, Any
+import json
+from typing import Optional, List, Any, Dict
 from datetime import datetime
 from pydantic import BaseModel, Field
 from ..models.analysis import SentimentType
 
 
+def parse_product_names(value: Any) -> List[str]:
+    """Decode the product_names JSON column, which may be a list or a JSON-encoded string."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value and value != 'null':
+        try:
+            decoded = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+        return decoded if isinstance(decoded, list) else []
+    # Handle null, None, or string "null" cases
+    return []
+
+
 class AnalysisBase(BaseModel):
     """Base analysis schema."""
     transcript: Optional[str] = None
@@ -48,8 +63,6 @@ class AnalysisResponse(AnalysisBase):
     @classmethod
     def from_orm(cls, obj):
         """Custom from_orm method to handle JSON fields properly."""
-        import json
-        
         # Get base data
         data = {
             'id': obj.id,
@@ -60,26 +73,66 @@ class AnalysisResponse(AnalysisBase):
             'sentiment': obj.sentiment,
             'feedback_category': obj.feedback_category,
             'feedback_summary': obj.feedback_summary,
+            'product_names': parse_product_names(obj.product_names),
         }
         
-        # Handle JSON product_names field
-        if obj.product_names and obj.product_names != 'null':
-            if isinstance(obj.product_names, str):
-                try:
-                    data['product_names'] = json.loads(obj.product_names)
-                except json.JSONDecodeError:
-                    data['product_names'] = []
-            elif isinstance(obj.product_names, list):
-                data['product_names'] = obj.product_names
-            else:
-                data['product_names'] = []
-        else:
-            # Handle null, None, or string "null" cases
-            data['product_names'] = []
-        
         return cls(**data)
 
 
+class AnalysisListItem(BaseModel):
+    """Schema for analysis rows in list views (transcript preview only)."""
+    id: str
+    file_id: str
+    sentiment: SentimentType
+    feedback_category: Optional[str] = None
+    feedback_summary: Optional[str] = None
+    product_names: Optional[List[str]] = None
+    transcript_preview: Optional[str] = None
+    analysis_time: datetime
+    created_at: datetime
+    
+    # File information
+    filename: Optional[str] = None
+    uploader_name: Optional[str] = None
+    upload_time: Optional[datetime] = None
+    
+    @classmethod
+    def from_row(cls, row):
+        """Build a list item from a projection row returned by AnalysisRepository.get_list_with_file_info."""
+        return cls(
+            id=row.id,
+            file_id=row.file_id,
+            sentiment=row.sentiment,
+            feedback_category=row.feedback_category,
+            feedback_summary=row.feedback_summary,
+            product_names=parse_product_names(row.product_names),
+            transcript_preview=row.transcript_preview,
+            analysis_time=row.analysis_time,
+            created_at=row.created_at,
+            filename=row.filename,
+            uploader_name=row.uploader_name,
+            upload_time=row.upload_time
+        )
+
+
+class TranscriptSearchHit(AnalysisListItem):
+    """Schema for a full-text search hit, with highlighted snippets of the matching fields."""
+    score: float
+    highlights: Dict[str, str] = {}
+
+
+class SimilarAnalysis(AnalysisListItem):
+    """Schema for an analysis similar to a given one (cosine similarity of their embeddings)."""
+    similarity: float
+
+
+class AnalysisTranscriptResponse(BaseModel):
+    """Schema for the full transcript of one analysis."""
+    file_id: str
+    analysis_id: str
+    transcript: Optional[str] = None
+
+
 class AnalysisListResponse(BaseModel):
     """Schema for analysis list response."""
     analyses: List[AnalysisResponse]
@@ -99,6 +152,27 @@ class AnalysisFilterParams(BaseModel):
     end_date: Optional[datetime] = None
 
 
+class ExportJobCreate(AnalysisFilterParams):
+    """Schema for submitting a background export job."""
+    format: str = Field(default="excel", pattern="^(excel|csv)$", description="excel or csv")
+
+
+class ExportJobResponse(BaseModel):
+    """Schema for the state of a background export job."""
+    job_id: str
+    format: str
+    status: str  # pending, running, completed, failed
+    processed_rows: int = 0
+    total_rows: Optional[int] = None
+    progress: float = 0.0  # percent
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+
 class AnalysisStatistics(BaseModel):
     """Schema for analysis statistics."""
     total_analyses: int
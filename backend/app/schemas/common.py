@@ -11,6 +11,8 @@ class PaginationParams(BaseModel):
     """Pagination parameters."""
     page: int = Field(default=1, ge=1, description="Page number")
     page_size: int = Field(default=20, ge=1, le=100, description="Items per page")
+    cursor: Optional[str] = Field(default=None, description="Keyset cursor; enables cursor mode (empty string for the first page)")
+    include_total: bool = Field(default=False, description="Return a cached total in cursor mode")
     
     @property
     def offset(self) -> int:
@@ -39,6 +41,26 @@ class PaginatedResponse(BaseModel, Generic[T]):
         )
 
 
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    """Generic keyset-paginated response."""
+    items: List[T]
+    page_size: int
+    next_cursor: Optional[str] = None
+    has_more: bool
+    total: Optional[int] = None
+    
+    @classmethod
+    def create(cls, items: List[T], page_size: int, next_cursor: Optional[str], total: Optional[int] = None):
+        """Create cursor-paginated response."""
+        return cls(
+            items=items,
+            page_size=page_size,
+            next_cursor=next_cursor,
+            has_more=next_cursor is not None,
+            total=total
+        )
+
+
 class ErrorResponse(BaseModel):
     """Error response schema."""
     detail: str
@@ -37,6 +37,7 @@ class FileAnalysisResult(BaseModel):
     feedback_summary: Optional[str] = None
     product_names: Optional[List[str]] = None
     transcript: Optional[str] = None
+    transcript_preview: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -72,6 +73,52 @@ class FileUploadResponse(BaseModel):
     file_id: str
     filename: str
     message: str
+    duplicate: bool = False  # file_id is an earlier upload of the same recording
+    match_type: Optional[str] = None  # "exact" (same bytes) or "acoustic" (same audio)
+
+
+class ChunkedUploadCreate(BaseModel):
+    """Schema for starting a chunked upload."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    file_size: int = Field(..., gt=0)
+
+
+class ChunkedUploadResponse(BaseModel):
+    """Schema for chunked upload state."""
+    upload_id: str
+    filename: str
+    file_size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: List[int]  # chunk indexes already stored
+
+
+class ChunkReceipt(BaseModel):
+    """Schema for a stored chunk."""
+    index: int
+    size: int
+    sha256: str
+
+
+class FileImportRequest(BaseModel):
+    """Schema for importing a server-side directory or archive."""
+    path: str = Field(..., min_length=1, description="Directory or zip/tar archive, relative to IMPORT_DIR")
+    analyze: bool = True
+
+
+class FileImportResponse(BaseModel):
+    """Schema for import results."""
+    source: str
+    total_files: int
+    imported_count: int
+    skipped_count: int  # content already imported
+    failed_count: int
+    imported_bytes: int
+    elapsed_seconds: float
+    files_per_second: float
+    megabytes_per_second: float
+    failed: List[Dict[str, str]]
+    analysis_queued: int
 
 
 class FileBatchUploadResponse(BaseModel):
@@ -18,6 +18,7 @@ from ..schemas.analysis import AnalysisCreate, AnalysisFilterParams
 from ..schemas.common import PaginationParams, PaginatedResponse
 from ..ai.speech_to_text import speech_service
 from ..ai.llm_analyzer import analyze_feedback
+from .similarity_service import SimilarityService
 
 logger = logging.getLogger(__name__)
 
@@ -212,6 +213,9 @@ class AnalysisService:
                 self.file_repo.update_status(file_id, FileStatus.FAILED)
                 return {"error": f"Failed to save analysis results: {str(e)}"}
             
+            # Embed for similarity search; a failure here does not fail the analysis
+            SimilarityService(self.db).index_analysis(analysis)
+            
             return {
                 "success": True,
                 "analysis_id": analysis.id,
@@ -0,0 +1,138 @@
+"""
+Duplicate upload service: finds earlier uploads of the same recording.
+"""
+import logging
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.file import FileFormat, VoiceFile
+from ..repositories.fingerprint import FingerprintRepository
+from ..utils.fingerprint import AcousticFingerprint, acoustic_fingerprint, file_content_hash
+
+logger = logging.getLogger(__name__)
+
+# Formats with audio to fingerprint; other files only match by content hash
+AUDIO_FORMATS = (FileFormat.WAV, FileFormat.MP3)
+
+
+class DuplicateCheck(NamedTuple):
+    """Result of a duplicate lookup."""
+    file: Optional[VoiceFile]  # earlier upload, if any
+    match_type: Optional[str]  # "exact" or "acoustic"
+    fingerprint: Optional[AcousticFingerprint]  # new file's fingerprint, if computed
+
+
+class DuplicateService:
+    """Duplicate upload detection service."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.fingerprint_repo = FingerprintRepository(db)
+
+    def find_duplicate(self, file_path: str, file_format: FileFormat, content_hash: str) -> DuplicateCheck:
+        """
+        Look for an earlier upload of a newly saved file.
+
+        The content hash is checked first; only when it misses is the audio
+        decoded and fingerprinted, so exact re-uploads cost one indexed lookup.
+        Failed uploads never match, so a re-upload of one is analyzed again.
+
+        Args:
+            file_path: Saved upload
+            file_format: Upload format
+            content_hash: SHA-256 hex of the upload
+
+        Returns:
+            DuplicateCheck: Matching file (or None), match type and the new file's fingerprint
+        """
+        if settings.DUPLICATE_DETECTION_ENABLED:
+            existing = self.fingerprint_repo.find_by_content_hash(content_hash)
+            if existing:
+                return DuplicateCheck(existing, "exact", None)
+
+        if file_format not in AUDIO_FORMATS:
+            return DuplicateCheck(None, None, None)
+
+        fingerprint = acoustic_fingerprint(file_path)
+        if fingerprint is None or not settings.DUPLICATE_DETECTION_ENABLED:
+            return DuplicateCheck(None, None, fingerprint)
+
+        match = self.fingerprint_repo.find_by_acoustic_fingerprint(
+            fingerprint,
+            max_distance=settings.FINGERPRINT_MAX_DISTANCE,
+            duration_tolerance=settings.FINGERPRINT_DURATION_TOLERANCE
+        )
+        if match:
+            existing, distance = match
+            logger.info(f"{file_path} sounds like file {existing.id} ({distance} bits apart)")
+            return DuplicateCheck(existing, "acoustic", fingerprint)
+        return DuplicateCheck(None, None, fingerprint)
+
+    def record(self, file_id: str, content_hash: str, fingerprint: Optional[AcousticFingerprint]) -> None:
+        """
+        Store a new file's fingerprints so later uploads can match it.
+
+        Failures are logged, not raised: the upload itself has already succeeded.
+        """
+        try:
+            self.fingerprint_repo.save(file_id, content_hash, fingerprint)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to store fingerprints for file {file_id}: {e}")
+
+    def record_many(self, files: List[Tuple[str, str, Optional[AcousticFingerprint]]]) -> None:
+        """
+        Store the fingerprints of several new files with multi-row INSERTs.
+
+        Failures are logged, not raised: the uploads themselves have already succeeded.
+
+        Args:
+            files: (file_id, content_hash, fingerprint) of each file
+        """
+        try:
+            self.fingerprint_repo.bulk_create([FingerprintRepository.row(*file) for file in files])
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to store fingerprints for {len(files)} files: {e}")
+
+    def backfill(self, batch_size: int = 100) -> Tuple[int, List[Tuple[str, str, str]]]:
+        """
+        Fingerprint files uploaded before duplicate detection, oldest first.
+
+        Each file is compared with the files fingerprinted before it, so every
+        duplicate is reported against the earliest upload of its recording.
+        Files missing from storage are skipped.
+
+        Args:
+            batch_size: Files loaded per query
+
+        Returns:
+            Tuple[int, List[Tuple[str, str, str]]]: Files fingerprinted and
+            (file_id, earlier_file_id, match_type) for each duplicate found
+        """
+        count = 0
+        duplicates = []
+        after = None
+        while True:
+            files = self.fingerprint_repo.get_files_without_fingerprint(limit=batch_size, after=after)
+            if not files:
+                break
+            after = (files[-1].created_at, files[-1].id)
+
+            for file_obj in files:
+                if not file_obj.file_path or not os.path.exists(file_obj.file_path):
+                    logger.warning(f"Skipping file {file_obj.id}: {file_obj.file_path} not found")
+                    continue
+
+                content_hash = file_content_hash(file_obj.file_path)
+                check = self.find_duplicate(file_obj.file_path, file_obj.file_format, content_hash)
+                if check.file and check.file.id != file_obj.id:
+                    duplicates.append((file_obj.id, check.file.id, check.match_type))
+                self.record(file_obj.id, content_hash, check.fingerprint)
+                count += 1
+
+        logger.info(f"Fingerprinted {count} files, {len(duplicates)} duplicates of earlier uploads")
+        return count, duplicates
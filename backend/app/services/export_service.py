@@ -0,0 +1,329 @@
+"""
+Export service for writing analysis results as CSV or Excel files.
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.user import User
+from ..repositories.analysis import AnalysisRepository, ANALYSIS_TABLES
+from ..schemas.analysis import parse_product_names
+from ..utils.cache import cache, cache_key
+from ..utils.export import write_csv, write_xlsx, XLSX_MEDIA_TYPE
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADERS = ["分析ID", "文件名", "產品名稱", "情緒傾向", "反饋分類", "反饋摘要", "上傳者", "分析時間", "轉錄內容"]
+
+# format -> (writer, media type, file extension)
+EXPORT_FORMATS = {
+    "csv": (write_csv, "text/csv", "csv"),
+    "excel": (write_xlsx, XLSX_MEDIA_TYPE, "xlsx"),
+}
+
+
+# Tables an export reads; a write to any of them makes older exports stale
+EXPORT_TABLES = ANALYSIS_TABLES + (User.__tablename__,)
+
+
+class ExportJobStatus(str, Enum):
+    """Background export job states."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ExportService:
+    """Analysis export service."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.analysis_repo = AnalysisRepository(db)
+
+    @staticmethod
+    def export_row(row: Any) -> List[Any]:
+        """Cell values of one export row, in EXPORT_HEADERS order."""
+        return [
+            row.id,
+            row.filename or "",
+            "、".join(str(name) for name in parse_product_names(row.product_names)),
+            row.sentiment.value if row.sentiment else "",
+            row.feedback_category,
+            row.feedback_summary,
+            row.uploader_name or "",
+            row.analysis_time,
+            row.transcript,
+        ]
+
+    @staticmethod
+    def filename(format: str, now: datetime = None) -> str:
+        """Download file name for an export in the given format."""
+        extension = EXPORT_FORMATS[format][2]
+        return f"analysis_export_{(now or datetime.now()).strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+    def iter_rows(
+        self, filters: Dict[str, Any], progress: Optional[Callable[[int], None]] = None
+    ) -> Iterator[List[Any]]:
+        """Export rows for every analysis matching the filters, streamed from the database."""
+        batch_size = settings.EXPORT_BATCH_SIZE
+        count = 0
+        for row in self.analysis_repo.iter_export_rows(batch_size=batch_size, **filters):
+            count += 1
+            yield self.export_row(row)
+            if progress and count % batch_size == 0:
+                progress(count)
+        if progress:
+            progress(count)
+        logger.info(f"Exported {count} analysis rows")
+
+    def stream(
+        self, format: str, filters: Dict[str, Any], progress: Optional[Callable[[int], None]] = None
+    ) -> Iterator[bytes]:
+        """
+        Yield the export file in chunks.
+
+        Args:
+            format: "csv" or "excel"
+            filters: Analysis filter values (see AnalysisRepository._apply_filters)
+            progress: Called with the number of rows written so far, once per batch
+
+        Yields:
+            bytes: Consecutive pieces of the file
+        """
+        writer = EXPORT_FORMATS[format][0]
+        yield from writer(EXPORT_HEADERS, self.iter_rows(filters, progress))
+
+
+class ExportJobManager:
+    """
+    Background export jobs with downloadable artifacts.
+
+    Each job is a JSON manifest plus an artifact file in EXPORT_DIR, so every
+    worker process can report progress and serve downloads for jobs started
+    by another. The job ID is derived from the format, the filters and the
+    current data version: submitting the same export again while nothing
+    changed returns the existing job instead of starting a new one.
+    CSV artifacts are stored gzipped; XLSX files are already compressed.
+    """
+
+    def __init__(self, directory: str, max_workers: int, ttl: int, stale_seconds: int):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _manifest_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def artifact_path(self, job: Dict[str, Any]) -> str:
+        """Path of a job's artifact file."""
+        extension = EXPORT_FORMATS[job["format"]][2]
+        if job["format"] == "csv":
+            extension += ".gz"
+        return os.path.join(self.directory, f"{job['job_id']}.{extension}")
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        """Replace a manifest atomically so readers never see a partial file."""
+        job["updated_at"] = time.time()
+        path = self._manifest_path(job["job_id"])
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _claim(self, job: Dict[str, Any]) -> bool:
+        """Create a new manifest; False if another worker created it first."""
+        job["updated_at"] = time.time()
+        try:
+            fd = os.open(self._manifest_path(job["job_id"]), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        return True
+
+    def _remove(self, job: Dict[str, Any]) -> None:
+        for path in (self.artifact_path(job), self._manifest_path(job["job_id"])):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _is_live(self, job: Dict[str, Any], now: float) -> bool:
+        """Whether a job can still be served or is still making progress."""
+        if job["status"] == ExportJobStatus.COMPLETED:
+            return job["expires_at"] > now and os.path.exists(self.artifact_path(job))
+        if job["status"] == ExportJobStatus.RUNNING:
+            return now - job["updated_at"] < self.stale_seconds
+        if job["status"] == ExportJobStatus.PENDING:
+            # Queued behind other exports, so there is no progress to judge yet
+            return now - job["created_at"] < self.ttl
+        return False
+
+    def job_id_for(self, format: str, filters: Dict[str, Any]) -> str:
+        """Job ID shared by identical exports of unchanged data."""
+        version = cache.data_version(EXPORT_TABLES)
+        if version is None:
+            # Without a data version an older export cannot be proven current
+            version = uuid.uuid4().hex
+        return cache_key("export", format, filters, version)
+
+    def submit(self, format: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Start an export, or return the identical job that is running or finished.
+
+        Args:
+            format: "csv" or "excel"
+            filters: Analysis filter values
+
+        Returns:
+            Dict[str, Any]: Job manifest
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.cleanup_expired()
+
+        job_id = self.job_id_for(format, filters)
+        now = time.time()
+        existing = self._load(job_id)
+        if existing and self._is_live(existing, now):
+            return existing
+        if existing:
+            # Failed, expired or abandoned by a worker that died
+            self._remove(existing)
+
+        job = {
+            "job_id": job_id,
+            "run_id": uuid.uuid4().hex,
+            "format": format,
+            "filters": jsonable_encoder(filters),
+            "status": ExportJobStatus.PENDING,
+            "processed_rows": 0,
+            "total_rows": None,
+            "file_size": None,
+            "error": None,
+            "created_at": now,
+            "completed_at": None,
+            "expires_at": None,
+        }
+        if not self._claim(job):
+            return self._load(job_id) or job
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export")
+        self._executor.submit(self._run, job, filters)
+        logger.info(f"Export job {job_id} submitted ({format})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job manifest, or None if unknown or expired."""
+        job = self._load(job_id)
+        if job is None:
+            return None
+        if job["status"] == ExportJobStatus.COMPLETED and not self._is_live(job, time.time()):
+            self._remove(job)
+            return None
+        return job
+
+    def _run(self, job: Dict[str, Any], filters: Dict[str, Any]) -> None:
+        """Write the artifact for a job, recording progress in its manifest."""
+        current = self._load(job["job_id"])
+        if current is None or current.get("run_id") != job["run_id"]:
+            # Taken over after this run was considered abandoned
+            logger.info(f"Export job {job['job_id']} was restarted elsewhere; skipping")
+            return
+
+        artifact_path = self.artifact_path(job)
+        temp_path = f"{artifact_path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+        db = SessionLocal()
+        try:
+            service = ExportService(db)
+            job["status"] = ExportJobStatus.RUNNING
+            job["total_rows"] = service.analysis_repo.count_with_filters(**filters)
+            self._save(job)
+
+            def progress(count: int) -> None:
+                job["processed_rows"] = count
+                self._save(job)
+
+            opener = gzip.open if job["format"] == "csv" else open
+            with opener(temp_path, "wb") as f:
+                for chunk in service.stream(job["format"], filters, progress):
+                    f.write(chunk)
+            os.replace(temp_path, artifact_path)
+
+            now = time.time()
+            job.update({
+                "status": ExportJobStatus.COMPLETED,
+                "file_size": os.path.getsize(artifact_path),
+                "completed_at": now,
+                "expires_at": now + self.ttl,
+            })
+            self._save(job)
+            logger.info(f"Export job {job['job_id']} completed: {job['processed_rows']} rows")
+        except Exception as e:
+            logger.error(f"Export job {job['job_id']} failed: {e}", exc_info=True)
+            job.update({"status": ExportJobStatus.FAILED, "error": str(e)})
+            self._save(job)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            db.close()
+
+    def cleanup_expired(self) -> int:
+        """
+        Delete expired artifacts and finished jobs past their expiry.
+
+        Returns:
+            int: Number of jobs removed
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            job = self._load(name[:-len(".json")])
+            if job is None:
+                continue
+            finished = job["status"] in (ExportJobStatus.COMPLETED, ExportJobStatus.FAILED)
+            if finished and (job["expires_at"] or job["updated_at"] + self.ttl) <= now:
+                self._remove(job)
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} expired export jobs")
+        return removed
+
+
+# Global export job manager
+export_jobs = ExportJobManager(
+    settings.EXPORT_DIR,
+    max_workers=settings.EXPORT_JOB_WORKERS,
+    ttl=settings.EXPORT_JOB_TTL,
+    stale_seconds=settings.EXPORT_JOB_STALE_SECONDS
+)
@@ -11,6 +11,7 @@ from ..models.file import VoiceFile, FileStatus, FileFormat
 from ..schemas.file import FileCreate, FileUpdate
 from ..schemas.common import PaginationParams, PaginatedResponse
 from ..config import settings
+from .storage_service import deletion_queue
 # from ..ai.speech_to_text import speech_service
 
 
@@ -80,16 +81,11 @@ class FileService:
         if not file_obj:
             return False
         
-        # Remove physical file if requested
-        if remove_physical and os.path.exists(file_obj.file_path):
-            try:
-                os.remove(file_obj.file_path)
-            except Exception:
-                # Log error but continue with database deletion
-                pass
-        
-        # Delete from database
+        # Delete from database, then queue the physical file for background removal
+        file_path = file_obj.file_path
         self.file_repo.delete(file_id)
+        if remove_physical:
+            deletion_queue.enqueue([file_path])
         return True
     
     def update_file_status(self, file_id: str, status: FileStatus) -> Optional[VoiceFile]:
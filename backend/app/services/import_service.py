@@ -0,0 +1,359 @@
+"""
+Bulk import of recordings from a server-side directory or archive.
+"""
+import logging
+import os
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.file import FileFormat, FileStatus
+from ..repositories.file import FileRepository
+from ..repositories.fingerprint import FingerprintRepository
+from ..utils.content_store import staging_dir, store_file
+from ..utils.fingerprint import content_hasher
+from ..utils.file_handler import UPLOAD_CHUNK_SIZE
+from .analysis_service import AnalysisService
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+@dataclass
+class ImportItem:
+    """One file to import: its name in the source, size and how to read it."""
+    name: str
+    size: int
+    open: Callable[[], IO[bytes]]
+    path: Optional[str] = None  # set for files in a directory, which are hashed before copying
+
+
+@dataclass
+class StagedFile:
+    """A hashed import item, and where it was written if it already was."""
+    item: ImportItem
+    content_hash: str
+    size: int
+    file_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    stored_path: Optional[str] = None
+    shared: bool = False  # stored_path is content stored before this import
+
+
+@dataclass
+class ImportReport:
+    """Outcome and throughput of an import."""
+    source: str
+    total_files: int = 0
+    imported_count: int = 0
+    skipped_count: int = 0
+    failed_count: int = 0
+    imported_bytes: int = 0
+    elapsed_seconds: float = 0.0
+    file_ids: List[str] = field(default_factory=list)
+    failed: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def files_per_second(self) -> float:
+        return round(self.total_files / self.elapsed_seconds, 1) if self.elapsed_seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return round(self.imported_bytes / 1048576 / self.elapsed_seconds, 1) if self.elapsed_seconds else 0.0
+
+
+def _hash_stream(source: IO[bytes], target: Optional[IO[bytes]] = None) -> tuple:
+    """SHA-256 and size of a stream, optionally copying it to target in the same pass."""
+    hasher = content_hasher()
+    size = 0
+    while chunk := source.read(UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+        size += len(chunk)
+        if target is not None:
+            target.write(chunk)
+    return hasher.hexdigest(), size
+
+
+class ImportService:
+    """
+    Imports recordings that are already on the server.
+
+    Files are hashed in parallel (hashlib releases the GIL, so threads use
+    every core), content already in the database or earlier in the same
+    import is skipped, and the rest is copied into the content store and inserted
+    with one multi-row INSERT and one commit per batch instead of one
+    commit per file. Files in a directory are hashed before they are copied,
+    so re-running a nightly import only reads it. Members of a zip archive
+    are read in parallel; tar archives are a single compressed stream and
+    are read in order.
+    """
+
+    def __init__(self, db: Session, workers: Optional[int] = None, batch_size: Optional[int] = None):
+        self.db = db
+        self.file_repo = FileRepository(db)
+        self.fingerprint_repo = FingerprintRepository(db)
+        self.workers = workers or settings.IMPORT_WORKERS
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    @staticmethod
+    def is_archive(path: str) -> bool:
+        return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+    @staticmethod
+    def _allowed(name: str) -> Optional[str]:
+        """Lowercase extension (without dot) if the file type can be imported."""
+        extension = os.path.splitext(name)[1].lower()[1:]
+        return extension if extension in settings.allowed_extensions_list else None
+
+    def _directory_items(self, directory: str) -> List[ImportItem]:
+        items = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.startswith(".") or not self._allowed(name):
+                    continue
+                path = os.path.join(root, name)
+                items.append(ImportItem(
+                    name=os.path.relpath(path, directory),
+                    size=os.path.getsize(path),
+                    open=lambda path=path: open(path, "rb"),
+                    path=path
+                ))
+        return items
+
+    @contextmanager
+    def _zip_items(self, archive: str) -> Iterator[List[ImportItem]]:
+        """Items of a zip archive; the archive handles opened to read them are closed on exit."""
+        # One handle per thread: a ZipFile cannot be read from several threads at once.
+        # Handles are reused across members, since opening one reads the whole central directory.
+        handles = threading.local()
+        opened: List[zipfile.ZipFile] = []
+        opened_lock = threading.Lock()
+
+        def member(name: str) -> IO[bytes]:
+            if not hasattr(handles, "zip"):
+                handles.zip = zipfile.ZipFile(archive)
+                with opened_lock:
+                    opened.append(handles.zip)
+            return handles.zip.open(name)
+
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                items = [
+                    ImportItem(name=info.filename, size=info.file_size, open=lambda name=info.filename: member(name))
+                    for info in zf.infolist()
+                    if not info.is_dir() and self._allowed(info.filename)
+                    and not os.path.basename(info.filename).startswith(".")
+                ]
+            yield items
+        finally:
+            for handle in opened:
+                handle.close()
+
+    def _tar_items(self, tar: tarfile.TarFile) -> Iterator[ImportItem]:
+        for member in tar:
+            if member.isfile() and self._allowed(member.name) and not os.path.basename(member.name).startswith("."):
+                yield ImportItem(name=member.name, size=member.size, open=lambda member=member: tar.extractfile(member))
+
+    def _stage(self, item: ImportItem) -> StagedFile:
+        """Hash an item; archive members are written to the staging directory in the same pass."""
+        if item.path:
+            with item.open() as source:
+                content_hash, size = _hash_stream(source)
+            return StagedFile(item, content_hash, size)
+
+        staged = StagedFile(item, "", 0)
+        staged.stored_path = self._upload_path(staged)
+        try:
+            with item.open() as source, open(staged.stored_path, "wb") as target:
+                staged.content_hash, staged.size = _hash_stream(source, target)
+        except BaseException:
+            self._discard(staged)
+            raise
+        return staged
+
+    @staticmethod
+    def _upload_path(staged: StagedFile) -> str:
+        extension = os.path.splitext(staged.item.name)[1].lower()
+        return os.path.join(staging_dir(), f"{staged.file_id}{extension}")
+
+    def _store(self, staged: StagedFile) -> StagedFile:
+        """Put a staged file into the content store (directory files are copied, not moved)."""
+        if staged.stored_path:
+            staged.stored_path, created = store_file(staged.stored_path, staged.content_hash)
+        else:
+            staged.stored_path, created = store_file(
+                staged.item.path, staged.content_hash, keep_source=True, link=False
+            )
+        staged.shared = not created
+        return staged
+
+    @staticmethod
+    def _discard(staged: StagedFile) -> None:
+        if staged.stored_path and not staged.shared:
+            try:
+                os.remove(staged.stored_path)
+            except FileNotFoundError:
+                pass
+
+    def _run_batch(
+        self,
+        items: List[ImportItem],
+        executor: Optional[ThreadPoolExecutor],
+        user_id: str,
+        seen: set,
+        report: ImportReport
+    ) -> None:
+        def parallel(function, values) -> List:
+            """Apply function to every value; failures are reported and dropped."""
+            results = []
+            futures = [(value, executor.submit(function, value)) for value in values] if executor else None
+            for index, value in enumerate(values):
+                try:
+                    results.append(futures[index][1].result() if futures else function(value))
+                except Exception as e:
+                    item = value.item if isinstance(value, StagedFile) else value
+                    report.failed.append({"name": item.name, "reason": str(e)})
+                    if isinstance(value, StagedFile):
+                        self._discard(value)
+            return results
+
+        staged = parallel(self._stage, items)
+
+        # Skip content that is already stored or appeared earlier in this import
+        known = self.fingerprint_repo.get_existing_content_hashes([s.content_hash for s in staged])
+        new = []
+        for s in staged:
+            if s.content_hash in known or s.content_hash in seen:
+                self._discard(s)
+                report.skipped_count += 1
+            else:
+                seen.add(s.content_hash)
+                new.append(s)
+
+        stored = parallel(self._store, new)
+        if not stored:
+            return
+
+        now = datetime.utcnow()
+        try:
+            self.file_repo.bulk_create([
+                {
+                    "id": s.file_id,
+                    "filename": os.path.basename(s.stored_path),
+                    "original_filename": os.path.basename(s.item.name)[:255],
+                    "file_path": s.stored_path,
+                    "file_size": s.size,
+                    "file_format": FileFormat(self._allowed(s.item.name)),
+                    "status": FileStatus.PENDING,
+                    "uploaded_by": user_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for s in stored
+            ], commit=False)
+            self.fingerprint_repo.bulk_create([
+                {"file_id": s.file_id, "content_hash": s.content_hash, "created_at": now} for s in stored
+            ], commit=False)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            for s in stored:
+                self._discard(s)
+                seen.discard(s.content_hash)
+                report.failed.append({"name": s.item.name, "reason": f"Database insert failed: {e}"})
+            logger.error(f"Import batch of {len(stored)} files failed: {e}")
+            return
+
+        report.imported_count += len(stored)
+        report.imported_bytes += sum(s.size for s in stored)
+        report.file_ids.extend(s.file_id for s in stored)
+
+    def import_path(self, path: str, user_id: str) -> ImportReport:
+        """
+        Import every allowed file in a directory (recursively) or archive.
+
+        Args:
+            path: Directory, .zip or .tar(.gz/.bz2/.xz) archive on the server
+            user_id: User recorded as the uploader
+
+        Returns:
+            ImportReport: Counts, throughput and IDs of the imported files (status PENDING)
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Import source not found: {path}")
+        if not (os.path.isdir(path) or self.is_archive(path)):
+            raise ValueError("Import source must be a directory or a zip/tar archive")
+
+        os.makedirs(staging_dir(), exist_ok=True)
+        report = ImportReport(source=path)
+        started = time.perf_counter()
+        seen: set = set()
+
+        def run(items: Iterable[ImportItem], executor: Optional[ThreadPoolExecutor]) -> None:
+            batch = []
+            for item in items:
+                report.total_files += 1
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._run_batch(batch, executor, user_id, seen, report)
+                    batch = []
+            if batch:
+                self._run_batch(batch, executor, user_id, seen, report)
+
+        if os.path.isdir(path):
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import") as executor:
+                run(self._directory_items(path), executor)
+        elif zipfile.is_zipfile(path):
+            # The executor is shut down (every member staged) before the archive handles close
+            with self._zip_items(path) as items, \
+                    ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import") as executor:
+                run(items, executor)
+        else:
+            with tarfile.open(path, "r:*") as tar:
+                run(self._tar_items(tar), None)
+
+        report.failed_count = len(report.failed)
+        report.elapsed_seconds = round(time.perf_counter() - started, 2)
+        logger.info(
+            f"Imported {report.imported_count} of {report.total_files} files from {path} "
+            f"({report.skipped_count} already imported, {report.failed_count} failed) in "
+            f"{report.elapsed_seconds}s: {report.files_per_second} files/s, {report.megabytes_per_second} MB/s"
+        )
+        return report
+
+
+def analyze_files(file_ids: List[str]) -> None:
+    """
+    Analyze imported files one after another (used by the import script;
+    the API queues each file as an analysis background task instead).
+
+    Args:
+        file_ids: Files to analyze, in order
+    """
+    db = SessionLocal()
+    try:
+        service = AnalysisService(db)
+        for index, file_id in enumerate(file_ids, 1):
+            try:
+                result = service.process_file_analysis(file_id)
+                if "error" in result:
+                    logger.error(f"Imported file {file_id} analysis failed: {result['error']}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Imported file {file_id} analysis exception: {e}")
+            if index % 100 == 0:
+                logger.info(f"Analyzed {index} of {len(file_ids)} imported files")
+    finally:
+        db.close()
@@ -0,0 +1,176 @@
+"""
+Lifecycle of analyzed recordings: once analysis is done, the original WAV
+is only kept for playback and the odd reprocess, so after
+AUDIO_RETENTION_DAYS it is transcoded to a compact codec or moved to cold
+storage.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..repositories.file import FileRepository
+from ..utils.content_store import is_content_path, staging_dir, store_file
+from ..utils.fingerprint import file_content_hash
+from ..utils.transcode import CODECS, TranscodeError, codec_extension, transcode
+from .storage_service import deletion_queue
+
+logger = logging.getLogger(__name__)
+
+COLD_ACTION = "cold"
+RETENTION_ACTIONS = tuple(CODECS) + (COLD_ACTION,)
+
+
+@dataclass
+class RetentionReport:
+    """Outcome of a retention run."""
+    action: str
+    files: int = 0
+    stored_files: int = 0
+    skipped_files: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    failed: List[dict] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+class RetentionService:
+    """Transcodes or archives recordings whose analysis is complete."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.file_repo = FileRepository(db)
+
+    def run(
+        self,
+        action: Optional[str] = None,
+        older_than_days: Optional[int] = None,
+        batch_size: int = 500,
+        workers: Optional[int] = None,
+        dry_run: bool = False
+    ) -> RetentionReport:
+        """
+        Transcode or move the recordings analyzed more than older_than_days ago.
+
+        Each stored file is processed once, however many records share it.
+        The new file goes into the content store, the completed records are
+        pointed at it (path and size) with one commit per batch, and the old
+        file is queued for removal; records still being analyzed keep it
+        referenced, so reprocessing reads the original until they are done.
+        A transcode that does not come out smaller is discarded. Failed
+        files keep their original and are retried on the next run.
+
+        Args:
+            action: "opus", "flac" or "cold" (default AUDIO_RETENTION_ACTION)
+            older_than_days: Minimum days since analysis (default AUDIO_RETENTION_DAYS)
+            batch_size: Records per page and commit
+            workers: Files processed in parallel (default AUDIO_RETENTION_WORKERS)
+            dry_run: Only count the files and bytes that would be processed
+
+        Returns:
+            RetentionReport: Files processed and bytes before and after
+        """
+        action = action or settings.AUDIO_RETENTION_ACTION
+        if action not in RETENTION_ACTIONS:
+            raise ValueError(f"Unknown retention action: {action!r} (expected one of {', '.join(RETENTION_ACTIONS)})")
+        if older_than_days is None:
+            older_than_days = settings.AUDIO_RETENTION_DAYS
+
+        report = RetentionReport(action=action, dry_run=dry_run)
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        extensions = None
+        if action != COLD_ACTION:
+            extensions = [ext.strip().lower().lstrip(".") for ext in settings.AUDIO_RETENTION_FORMATS.split(",") if ext.strip()]
+        cold_prefix = os.path.join(settings.AUDIO_COLD_DIR, "")
+
+        after = None
+        with ThreadPoolExecutor(max_workers=workers or settings.AUDIO_RETENTION_WORKERS) as executor:
+            while True:
+                rows = self.file_repo.get_files_for_retention(
+                    cutoff, extensions=extensions, outside_dir=cold_prefix, after=after, limit=batch_size
+                )
+                if not rows:
+                    break
+                after = rows[-1].id
+                paths = list(dict.fromkeys(row.file_path for row in rows))
+                report.files += len(rows)
+
+                if dry_run:
+                    for path in paths:
+                        try:
+                            report.bytes_before += os.path.getsize(path)
+                        except OSError:
+                            pass
+                    continue
+
+                results = executor.map(lambda path: self._process(path, action), paths)
+                self._apply(dict(zip(paths, results)), report)
+
+        logger.info(
+            f"Audio retention ({action}{', dry run' if dry_run else ''}): {report.files} records, "
+            f"{report.stored_files} files stored, {report.skipped_files} kept, {len(report.failed)} failed, "
+            f"{report.bytes_before} -> {report.bytes_after} bytes"
+        )
+        return report
+
+    def _apply(self, results: Dict[str, Tuple], report: RetentionReport) -> None:
+        """Point records at the new files and queue the old ones for removal."""
+        replaced = []
+        unused = []
+        for old_path, (new_path, old_size, new_size, error) in results.items():
+            if error:
+                report.failed.append({"path": old_path, "reason": error})
+                continue
+            if new_path is None:
+                report.skipped_files += 1
+                continue
+            if self.file_repo.replace_stored_file(old_path, new_path, new_size, commit=False):
+                replaced.append(old_path)
+                report.stored_files += 1
+                report.bytes_before += old_size
+                report.bytes_after += new_size
+            else:
+                unused.append(new_path)  # the records were deleted or reprocessed meanwhile
+        self.db.commit()
+        # Removed only once no record points to them
+        deletion_queue.enqueue(replaced + unused)
+
+    def _process(self, path: str, action: str) -> Tuple[Optional[str], int, int, Optional[str]]:
+        """
+        Store the retained version of one file.
+
+        Returns:
+            Tuple: (new path or None to keep the file, old size, new size, error)
+        """
+        try:
+            old_size = os.path.getsize(path)
+            if action == COLD_ACTION:
+                content_hash = os.path.basename(path)[:64] if is_content_path(path) else file_content_hash(path)
+                new_path, _ = store_file(path, content_hash, keep_source=True, root=settings.AUDIO_COLD_DIR)
+                return new_path, old_size, old_size, None
+
+            os.makedirs(staging_dir(), exist_ok=True)
+            temp_path = os.path.join(staging_dir(), f"{uuid.uuid4()}{codec_extension(action)}")
+            try:
+                transcode(path, temp_path, action, bitrate=settings.AUDIO_RETENTION_BITRATE)
+                new_size = os.path.getsize(temp_path)
+                if new_size >= old_size:
+                    return None, old_size, old_size, None
+                new_path, _ = store_file(temp_path, file_content_hash(temp_path))
+                return new_path, old_size, new_size, None
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        except (OSError, TranscodeError) as e:
+            logger.warning(f"Audio retention failed for {path}: {e}")
+            return None, 0, 0, str(e)
@@ -0,0 +1,90 @@
+"""
+Full-text search service over analysis transcripts and summaries.
+"""
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..repositories.analysis import AnalysisRepository
+from ..schemas.analysis import AnalysisListItem, TranscriptSearchHit
+from ..schemas.common import PaginatedResponse
+from ..utils.search_index import SearchIndex, highlight, search_index
+
+logger = logging.getLogger(__name__)
+
+
+class SearchService:
+    """Transcript search service."""
+
+    def __init__(self, db: Session, index: Optional[SearchIndex] = None):
+        self.db = db
+        self.analysis_repo = AnalysisRepository(db)
+        self.index = index or search_index
+
+    def search(self, query: str, page: int = 1, page_size: int = 20) -> PaginatedResponse[TranscriptSearchHit]:
+        """
+        Find analyses whose transcript or summary contains every query term, best match first.
+
+        Args:
+            query: Search terms separated by whitespace
+            page: Page number
+            page_size: Hits per page
+
+        Returns:
+            PaginatedResponse[TranscriptSearchHit]: Ranked hits with highlighted snippets
+        """
+        started = time.perf_counter()
+        total, ranked = self.index.search(query, limit=page_size, offset=(page - 1) * page_size)
+        scores = dict(ranked)
+        rows = self.analysis_repo.get_list_by_ids(
+            [analysis_id for analysis_id, _ in ranked], preview_length=settings.TRANSCRIPT_PREVIEW_LENGTH
+        )
+
+        items = []
+        for row in rows:
+            highlights = {
+                field: snippet
+                for field, snippet in (
+                    ("feedback_summary", highlight(row.feedback_summary, query, settings.SEARCH_SNIPPET_LENGTH)),
+                    ("transcript", highlight(row.transcript, query, settings.SEARCH_SNIPPET_LENGTH)),
+                )
+                if snippet
+            }
+            items.append(TranscriptSearchHit(
+                **AnalysisListItem.from_row(row).dict(),
+                score=round(scores[row.id], 4),
+                highlights=highlights
+            ))
+
+        logger.debug(f"Search {query!r}: {total} hits in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return PaginatedResponse.create(items=items, total=total, page=page, page_size=page_size)
+
+    def rebuild_index(self, batch_size: int = 1000) -> int:
+        """
+        Re-index every analysis from the database.
+
+        Args:
+            batch_size: Analyses read and indexed per transaction
+
+        Returns:
+            int: Number of analyses indexed
+        """
+        self.index.clear()
+        batch = []
+        count = 0
+        for row in self.analysis_repo.iter_search_documents(batch_size=batch_size):
+            batch.append(tuple(row))
+            if len(batch) >= batch_size:
+                self.index.update(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.index.update(batch)
+            count += len(batch)
+
+        self.index.optimize()
+        logger.info(f"Search index rebuilt with {count} analyses")
+        return count
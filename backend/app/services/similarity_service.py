@@ -0,0 +1,121 @@
+"""
+Similarity service: embeds analyses and finds calls like a given one.
+"""
+import logging
+from typing import List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from ..ai.embedding import EmbeddingService, embedding_service
+from ..config import settings
+from ..repositories.analysis import AnalysisRepository
+from ..schemas.analysis import AnalysisListItem, SimilarAnalysis
+from ..utils.vector_index import VectorIndex, vector_index
+
+logger = logging.getLogger(__name__)
+
+
+class SimilarityService:
+    """Call similarity service."""
+
+    def __init__(
+        self,
+        db: Session,
+        index: Optional[VectorIndex] = None,
+        embedder: Optional[EmbeddingService] = None
+    ):
+        self.db = db
+        self.analysis_repo = AnalysisRepository(db)
+        self.index = index or vector_index
+        self.embedder = embedder or embedding_service
+
+    def embed(self, documents: Sequence[tuple]) -> None:
+        """
+        Embed and store analyses.
+
+        Args:
+            documents: (analysis_id, transcript, feedback_summary) tuples
+        """
+        documents = [doc for doc in documents if doc[1] or doc[2]]
+        if not documents:
+            return
+        vectors = self.embedder.encode([EmbeddingService.analysis_text(doc[1], doc[2]) for doc in documents])
+        self.index.add(self.embedder.model_name, [(doc[0], vector) for doc, vector in zip(documents, vectors)])
+
+    def index_analysis(self, analysis) -> bool:
+        """
+        Embed one analysis after it is written; failures are logged, not raised.
+
+        Args:
+            analysis: VoiceAnalysis (or any object with id, transcript and feedback_summary)
+
+        Returns:
+            bool: Whether the embedding was stored
+        """
+        if self.index is None:
+            return False
+        try:
+            self.embed([(analysis.id, analysis.transcript, analysis.feedback_summary)])
+            return True
+        except Exception as e:
+            logger.error(f"Failed to embed analysis {analysis.id}: {e}")
+            return False
+
+    def similar(self, analysis_id: str, limit: int = 10) -> Optional[List[SimilarAnalysis]]:
+        """
+        Analyses most similar to one, most similar first.
+
+        Args:
+            analysis_id: Analysis to compare against
+            limit: Maximum results
+
+        Returns:
+            Optional[List[SimilarAnalysis]]: Similar analyses, or None if the analysis has no embedding
+        """
+        neighbours = self.index.similar(analysis_id, limit=limit)
+        if neighbours is None:
+            return None
+
+        similarity = dict(neighbours)
+        rows = self.analysis_repo.get_list_by_ids(
+            [neighbour_id for neighbour_id, _ in neighbours], preview_length=settings.TRANSCRIPT_PREVIEW_LENGTH
+        )
+        return [
+            SimilarAnalysis(**AnalysisListItem.from_row(row).dict(), similarity=round(similarity[row.id], 4))
+            for row in rows
+        ]
+
+    def backfill(self, batch_size: int = 256, rebuild: bool = False) -> int:
+        """
+        Embed every analysis that has no vector yet.
+
+        Args:
+            batch_size: Analyses embedded per batch
+            rebuild: Clear the store first and embed everything (needed after changing the model)
+
+        Returns:
+            int: Number of analyses embedded
+        """
+        if rebuild:
+            self.index.clear()
+
+        count = 0
+        batch = []
+
+        def flush():
+            nonlocal count
+            missing = set(self.index.missing([doc[0] for doc in batch]))
+            todo = [doc for doc in batch if doc[0] in missing]
+            self.embed(todo)
+            count += len(todo)
+
+        for row in self.analysis_repo.iter_search_documents(batch_size=batch_size):
+            batch.append((row.id, row.transcript, row.feedback_summary))
+            if len(batch) >= batch_size:
+                flush()
+                batch = []
+        if batch:
+            flush()
+
+        logger.info(f"Embedded {count} analyses with {self.embedder.model_name}")
+        return count
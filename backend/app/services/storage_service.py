@@ -0,0 +1,375 @@
+"""
+Storage garbage collection: background removal of deleted files' content,
+and sweeps for files and records that lost their counterpart.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..repositories.file import FileRepository
+from ..repositories.fingerprint import FingerprintRepository
+from ..utils.content_store import is_content_path, store_file
+from ..utils.fingerprint import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+BATCH_SUFFIX = ".json"
+CLAIMED_SUFFIX = ".claimed"
+TOMBSTONE_SUFFIX = ".deleting"
+
+
+def referenced_paths(paths: List[str]) -> Set[str]:
+    """Which stored paths some file record still points to."""
+    db = SessionLocal()
+    try:
+        return FileRepository(db).get_referenced_paths(paths)
+    finally:
+        db.close()
+
+
+class FileDeletionQueue:
+    """
+    Physical files waiting to be removed after their records were deleted.
+
+    Deleting a record only queues its file: each call writes one small JSON
+    batch into STORAGE_GC_QUEUE_DIR and a background thread removes the
+    files, so a request deleting thousands of files returns once the rows
+    are gone. Batches are files, so any worker process can drain batches
+    queued by another, and batches left by a restart are drained on the
+    next startup. A worker claims a batch by renaming it; a claim older than
+    STORAGE_GC_STALE_SECONDS (the worker died) is taken over, which is safe
+    because removing an already removed file is a no-op.
+
+    Stored files are shared by every record with the same content, so a
+    file is only removed if, when its batch is drained, no record points to
+    it and it was not stored again after the batch was queued.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        stale_seconds: int,
+        references: Callable[[List[str]], Set[str]] = referenced_paths
+    ):
+        self.directory = directory
+        self.stale_seconds = stale_seconds
+        self.references = references
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def enqueue(self, paths: Iterable[str]) -> int:
+        """
+        Queue files for removal and start draining in the background.
+
+        Args:
+            paths: Paths of files whose records were deleted
+
+        Returns:
+            int: Number of files queued
+        """
+        paths = [path for path in paths if path]
+        if not paths:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Time-ordered names so batches are drained oldest first
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}{BATCH_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(paths, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+        self.start()
+        return len(paths)
+
+    def start(self) -> None:
+        """Drain the queue on the background thread."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-gc")
+        self._executor.submit(self.drain)
+
+    def _claim(self, name: str, now: float) -> Optional[str]:
+        """Take a batch for this worker; None if another worker holds it."""
+        path = os.path.join(self.directory, name)
+        if name.endswith(BATCH_SUFFIX):
+            claimed = f"{path}.{os.getpid()}{CLAIMED_SUFFIX}"
+        elif name.endswith(CLAIMED_SUFFIX):
+            try:
+                if os.path.getmtime(path) > now - self.stale_seconds:
+                    return None
+            except OSError:
+                return None
+            claimed = f"{path[:-len(CLAIMED_SUFFIX)]}.{os.getpid()}{CLAIMED_SUFFIX}"
+        else:
+            return None
+        try:
+            os.rename(path, claimed)
+            # The claim's age, not the batch's, decides when it is stale
+            os.utime(claimed)
+        except OSError:
+            return None
+        return claimed
+
+    @staticmethod
+    def _remove_unless_stored(path: str, queued_at: float) -> bool:
+        """
+        Remove a file unless it was stored again since it was queued.
+
+        The file is renamed aside before its mtime is checked, so an upload of
+        the same content either refreshed the mtime first (and the file is put
+        back) or finds it gone and stores it anew (see store_file).
+
+        Returns:
+            bool: Whether the file was removed
+        """
+        tombstone = f"{path}.{os.getpid()}{TOMBSTONE_SUFFIX}"
+        os.rename(path, tombstone)
+        if os.path.getmtime(tombstone) > queued_at:
+            os.replace(tombstone, path)  # stored again since it was queued
+            return False
+        os.remove(tombstone)
+        return True
+
+    def drain(self) -> int:
+        """
+        Remove the files of every queued batch.
+
+        Returns:
+            int: Number of files removed
+        """
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return 0
+
+        removed = 0
+        now = time.time()
+        for name in names:
+            claimed = self._claim(name, now)
+            if not claimed:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    paths = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable deletion batch {claimed}: {e}")
+                continue
+
+            try:
+                referenced = self.references(paths)
+            except Exception as e:
+                # The claim goes stale and the batch is retried
+                logger.error(f"Could not check references of deletion batch {claimed}: {e}")
+                continue
+
+            queued_at = int(name.split("-", 1)[0]) / 1e9
+            for path in paths:
+                if path in referenced:
+                    continue
+                try:
+                    if self._remove_unless_stored(path, queued_at):
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # Left in place; the next sweep finds it as an orphan
+                    logger.warning(f"Failed to delete physical file {path}: {e}")
+            os.remove(claimed)
+
+        if removed:
+            logger.info(f"Removed {removed} deleted files from storage")
+        return removed
+
+
+@dataclass
+class StorageSweepReport:
+    """Outcome of a storage sweep."""
+    orphaned_files: List[str] = field(default_factory=list)
+    orphaned_bytes: int = 0
+    missing_file_ids: List[str] = field(default_factory=list)
+    deleted_records: int = 0
+    dry_run: bool = False
+
+
+@dataclass
+class StorageMigrationReport:
+    """Outcome of moving files into the content-addressed layout."""
+    total_files: int = 0
+    moved_files: int = 0
+    deduplicated_files: int = 0
+    saved_bytes: int = 0
+    missing_file_ids: List[str] = field(default_factory=list)
+    failed: List[dict] = field(default_factory=list)
+    dry_run: bool = False
+
+
+class StorageService:
+    """Storage consistency service."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.file_repo = FileRepository(db)
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _stored_files(self, grace_seconds: int) -> dict:
+        """Files under UPLOAD_DIR and AUDIO_COLD_DIR (except dotfiles) by normalized path, and whether they are past the grace period."""
+        cutoff = time.time() - grace_seconds
+        files = {}
+        walks = [os.walk(settings.UPLOAD_DIR), os.walk(settings.AUDIO_COLD_DIR)]
+        for root, _, names in (entry for walk in walks for entry in walk):
+            for name in names:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    files[self._normalize(path)] = os.path.getmtime(path) < cutoff
+                except OSError:
+                    continue
+        return files
+
+    def sweep(
+        self,
+        delete_missing: bool = False,
+        dry_run: bool = False,
+        grace_seconds: Optional[int] = None
+    ) -> StorageSweepReport:
+        """
+        Reconcile UPLOAD_DIR and AUDIO_COLD_DIR with the file records.
+
+        Files in either directory that no record points to are removed. Files newer
+        than the grace period are left alone: uploads and imports write the
+        file before inserting its record. Records whose file is gone are
+        reported, and deleted with delete_missing (their analyses go with
+        them, so this is opt-in).
+
+        Args:
+            delete_missing: Delete records whose file is missing
+            dry_run: Only report what would be removed
+            grace_seconds: Minimum file age to count as orphaned (default STORAGE_GC_GRACE_SECONDS)
+
+        Returns:
+            StorageSweepReport: Orphaned files, missing records and what was removed
+        """
+        if grace_seconds is None:
+            grace_seconds = settings.STORAGE_GC_GRACE_SECONDS
+        report = StorageSweepReport(dry_run=dry_run)
+        stored = self._stored_files(grace_seconds)
+
+        for file_id, file_path in self.file_repo.iter_file_paths():
+            normalized = self._normalize(file_path)
+            if normalized in stored:
+                del stored[normalized]
+            elif not os.path.exists(file_path):
+                report.missing_file_ids.append(file_id)
+
+        for path, expired in stored.items():
+            if not expired:
+                continue
+            try:
+                size = os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Failed to remove orphaned file {path}: {e}")
+                continue
+            report.orphaned_files.append(path)
+            report.orphaned_bytes += size
+
+        if delete_missing and report.missing_file_ids and not dry_run:
+            report.deleted_records = len(self.file_repo.delete_files(report.missing_file_ids))
+
+        logger.info(
+            f"Storage sweep{' (dry run)' if dry_run else ''}: {len(report.orphaned_files)} orphaned files "
+            f"({report.orphaned_bytes} bytes), {len(report.missing_file_ids)} records without a file, "
+            f"{report.deleted_records} records deleted"
+        )
+        return report
+
+
+    def migrate_to_content_store(self, batch_size: int = 500, dry_run: bool = False) -> StorageMigrationReport:
+        """
+        Move files stored under the old flat {uuid}{ext} layout into the content store.
+
+        Each file is hard-linked (or copied) to its content path, the batch's
+        records are pointed at the new paths with one commit, and only then
+        is the old file removed; an interrupted run leaves every record
+        pointing to an existing file and can simply be run again. Files with
+        identical content end up as one stored file. Recorded content hashes
+        are used when present; other files are hashed.
+
+        Args:
+            batch_size: Records updated per commit
+            dry_run: Only count the files that would move
+
+        Returns:
+            StorageMigrationReport: Files moved and merged, space saved and files not found
+        """
+        report = StorageMigrationReport(dry_run=dry_run)
+        fingerprint_repo = FingerprintRepository(self.db)
+        after = None
+        while True:
+            rows = self.file_repo.get_file_paths(after=after, limit=batch_size)
+            if not rows:
+                break
+            after = rows[-1].id
+            legacy = [row for row in rows if not is_content_path(row.file_path)]
+            report.total_files += len(legacy)
+            if dry_run or not legacy:
+                continue
+
+            hashes = fingerprint_repo.get_content_hashes([row.id for row in legacy])
+            new_paths = {}
+            for row in legacy:
+                try:
+                    size = os.path.getsize(row.file_path)
+                    content_hash = hashes.get(row.id) or file_content_hash(row.file_path)
+                    new_paths[row.id], created = store_file(row.file_path, content_hash, keep_source=True)
+                except FileNotFoundError:
+                    report.missing_file_ids.append(row.id)
+                    continue
+                except OSError as e:
+                    report.failed.append({"id": row.id, "reason": str(e)})
+                    continue
+                if created:
+                    report.moved_files += 1
+                else:
+                    report.deduplicated_files += 1
+                    report.saved_bytes += size
+
+            self.file_repo.update_file_paths(new_paths)
+            old_paths = [row.file_path for row in legacy if row.id in new_paths]
+            still_referenced = self.file_repo.get_referenced_paths(old_paths)
+            for path in old_paths:
+                if path not in still_referenced:
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        logger.warning(f"Failed to remove migrated file {path}: {e}")
+
+        logger.info(
+            f"Storage migration{' (dry run)' if dry_run else ''}: {report.total_files} files in the old layout, "
+            f"{report.moved_files} moved, {report.deduplicated_files} merged ({report.saved_bytes} bytes saved), "
+            f"{len(report.missing_file_ids)} missing, {len(report.failed)} failed"
+        )
+        return report
+
+
+# Global file deletion queue
+deletion_queue = FileDeletionQueue(settings.STORAGE_GC_QUEUE_DIR, stale_seconds=settings.STORAGE_GC_STALE_SECONDS)
@@ -0,0 +1,234 @@
+"""
+Resumable chunked uploads.
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import time
+import uuid
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..utils.file_handler import UPLOAD_CHUNK_SIZE, UploadTooLargeError, write_stream
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+COMPLETE_LOCK_NAME = "complete.lock"
+
+
+class ChunkedUploadError(ValueError):
+    """Raised when a chunk or an upload is rejected."""
+
+
+class ChunkedUploadManager:
+    """
+    Resumable uploads assembled from separately sent chunks.
+
+    An upload is a directory in CHUNK_UPLOAD_DIR holding a JSON manifest and
+    one file per received chunk, so any worker process can accept chunks
+    and complete uploads started on another. A chunk file exists only once
+    it was written in full and matched its checksum; the chunks present are
+    the upload's progress, and a client that lost its connection resumes by
+    sending the missing ones. Chunks can be sent in parallel and in any
+    order. Uploads with no activity for CHUNK_UPLOAD_TTL seconds are removed.
+    """
+
+    def __init__(self, directory: str, chunk_size: int, ttl: int):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+
+    def _upload_dir(self, upload_id: str) -> str:
+        # Only IDs we generated can name a directory
+        try:
+            upload_id = uuid.UUID(hex=upload_id).hex
+        except ValueError:
+            raise ChunkedUploadError("Invalid upload ID")
+        return os.path.join(self.directory, upload_id)
+
+    def chunk_path(self, upload: Dict[str, Any], index: int) -> str:
+        """Path of one chunk of an upload."""
+        return os.path.join(self._upload_dir(upload["upload_id"]), f"{index:06d}.chunk")
+
+    def create(self, user_id: str, filename: str, file_size: int) -> Dict[str, Any]:
+        """
+        Start an upload.
+
+        Args:
+            user_id: Uploading user; only they can send chunks or complete it
+            filename: Original file name
+            file_size: Total size in bytes
+
+        Returns:
+            Dict[str, Any]: Upload manifest
+        """
+        upload_id = uuid.uuid4().hex
+        upload = {
+            "upload_id": upload_id,
+            "user_id": user_id,
+            "filename": filename,
+            "file_size": file_size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": max(1, math.ceil(file_size / self.chunk_size)),
+            "created_at": time.time(),
+        }
+        directory = self._upload_dir(upload_id)
+        os.makedirs(directory)
+        with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(upload, f, ensure_ascii=False)
+        return upload
+
+    def get(self, upload_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Manifest of a user's upload.
+
+        Returns:
+            Optional[Dict[str, Any]]: Manifest, or None if unknown, expired or another user's
+        """
+        try:
+            directory = self._upload_dir(upload_id)
+            with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+                upload = json.load(f)
+        except (ChunkedUploadError, OSError, ValueError):
+            return None
+        if upload["user_id"] != user_id:
+            return None
+        return upload
+
+    def received_chunks(self, upload: Dict[str, Any]) -> List[int]:
+        """Indexes of the chunks received so far, ascending."""
+        try:
+            names = os.listdir(self._upload_dir(upload["upload_id"]))
+        except OSError:
+            return []
+        return sorted(int(name[:-len(".chunk")]) for name in names if name.endswith(".chunk"))
+
+    def chunk_length(self, upload: Dict[str, Any], index: int) -> int:
+        """Expected size of a chunk: chunk_size, except for the last one."""
+        if not 0 <= index < upload["total_chunks"]:
+            raise ChunkedUploadError(f"Chunk index must be between 0 and {upload['total_chunks'] - 1}")
+        return min(upload["chunk_size"], upload["file_size"] - index * upload["chunk_size"])
+
+    async def write_chunk(
+        self,
+        upload: Dict[str, Any],
+        index: int,
+        chunks: AsyncIterable[bytes],
+        checksum: Optional[str] = None
+    ) -> str:
+        """
+        Store one chunk, replacing an earlier copy.
+
+        Args:
+            upload: Upload manifest
+            index: Chunk index
+            chunks: Chunk body as an async byte stream
+            checksum: Expected SHA-256 hex of the chunk, if the client sent one
+
+        Returns:
+            str: SHA-256 hex of the stored chunk
+
+        Raises:
+            ChunkedUploadError: Wrong size or checksum (nothing is kept)
+        """
+        expected = self.chunk_length(upload, index)
+        path = self.chunk_path(upload, index)
+        temp_path = f"{path}.{uuid.uuid4().hex[:8]}.verify"
+        try:
+            size, digest = await write_stream(chunks, temp_path, expected)
+        except UploadTooLargeError:
+            raise ChunkedUploadError(f"Chunk {index} must be {expected} bytes")
+
+        if size != expected or (checksum and checksum.lower() != digest):
+            os.remove(temp_path)
+            if size != expected:
+                raise ChunkedUploadError(f"Chunk {index} must be {expected} bytes, received {size}")
+            raise ChunkedUploadError(f"Chunk {index} checksum mismatch")
+        os.replace(temp_path, path)
+        return digest
+
+    async def _read_chunks(self, upload: Dict[str, Any]) -> AsyncIterator[bytes]:
+        for index in range(upload["total_chunks"]):
+            async with aiofiles.open(self.chunk_path(upload, index), "rb") as f:
+                while data := await f.read(UPLOAD_CHUNK_SIZE):
+                    yield data
+
+    async def assemble(self, upload: Dict[str, Any], file_path: str) -> Tuple[int, str]:
+        """
+        Join an upload's chunks into file_path, hashing the whole file in the same pass.
+
+        Only one request can complete an upload; the chunks are removed once
+        the file is in place.
+
+        Args:
+            upload: Upload manifest
+            file_path: Final file path
+
+        Returns:
+            Tuple[int, str]: File size and SHA-256 hex of the content
+
+        Raises:
+            ChunkedUploadError: Chunks are missing or the upload is already being completed
+        """
+        received = await run_in_threadpool(self.received_chunks, upload)
+        missing = sorted(set(range(upload["total_chunks"])) - set(received))
+        if missing:
+            raise ChunkedUploadError(f"Missing chunks: {', '.join(map(str, missing[:20]))}")
+
+        lock_path = os.path.join(self._upload_dir(upload["upload_id"]), COMPLETE_LOCK_NAME)
+        try:
+            os.close(os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            raise ChunkedUploadError("Upload is already being completed")
+
+        try:
+            size, content_hash = await write_stream(self._read_chunks(upload), file_path, upload["file_size"])
+        except BaseException:
+            os.remove(lock_path)
+            raise
+        # Thousands of chunk files; removed off the event loop
+        await run_in_threadpool(self.remove, upload["upload_id"])
+        return size, content_hash
+
+    def remove(self, upload_id: str) -> None:
+        """Delete an upload and its chunks."""
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+    def cleanup_expired(self) -> int:
+        """
+        Delete uploads with no chunk received for ttl seconds.
+
+        Returns:
+            int: Number of uploads removed
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for name in os.listdir(self.directory):
+            directory = os.path.join(self.directory, name)
+            try:
+                # Adding or replacing a chunk updates the directory's mtime
+                if os.path.getmtime(directory) < cutoff:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Removed {removed} abandoned chunked uploads")
+        return removed
+
+
+# Global chunked upload manager
+chunked_uploads = ChunkedUploadManager(
+    settings.CHUNK_UPLOAD_DIR,
+    chunk_size=settings.CHUNK_UPLOAD_SIZE,
+    ttl=settings.CHUNK_UPLOAD_TTL
+)
@@ -0,0 +1,121 @@
+"""
+Round-trip tests for the repositories' bulk operations.
+
+Statements are counted as they reach the database, so a regression back
+to one query per row fails regardless of how fast SQLite answers it.
+"""
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from ..database import Base
+from ..models.user import User, UserRole
+from ..models.file import VoiceFile, FileStatus, FileFormat
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..models.label import ProductLabel
+from ..repositories.base import BaseRepository
+from ..repositories.file import FileRepository
+from ..repositories.label import LabelRepository
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(connection, record):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def user(session):
+    user = User(
+        name="Bulk User",
+        email="bulk@example.com",
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    user.set_password("testpassword123")
+    session.add(user)
+    session.commit()
+    return user
+
+
+@contextmanager
+def count_statements(session):
+    """Collect the SQL statements (not transaction control) sent inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_label_batch_round_trips(session, user):
+    labels = LabelRepository(session)
+    names = [f"產品 {i}" for i in range(1000)]
+    user_id = user.id
+    labels.product_labels.bulk_create([{"name": names[0], "created_by": user_id}])
+
+    with count_statements(session) as statements:
+        created, existing = labels.create_product_labels_batch(names, user_id)
+    assert existing == [names[0]]
+    assert created == names[1:]
+    assert len(statements) == 2  # name lookup, multi-row INSERT
+    assert session.query(ProductLabel).count() == 1000
+
+    ids = [row[0] for row in session.query(ProductLabel.id).all()]
+    repo = BaseRepository(ProductLabel, session)
+    with count_statements(session) as statements:
+        assert repo.bulk_update(ids, {"is_active": False}) == 1000
+    assert len(statements) == 1
+
+    with count_statements(session) as statements:
+        deleted = labels.delete_product_labels_batch(ids[1:] + [max(ids) + 1])
+    assert sorted(deleted) == sorted(ids[1:])
+    assert len(statements) == 2  # existing IDs, DELETE
+    assert session.query(ProductLabel).count() == 1
+
+
+def test_delete_files_cascades(session, user, tmp_path):
+    files = FileRepository(session)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "filename": f"{i}.wav",
+            "original_filename": f"{i}.wav",
+            "file_path": str(tmp_path / f"{i}.wav"),
+            "file_size": 1,
+            "file_format": FileFormat.WAV,
+            "status": FileStatus.COMPLETED,
+            "uploaded_by": user.id,
+        }
+        for i in range(1200)
+    ]
+    files.bulk_create(rows)
+    session.add(VoiceAnalysis(file_id=rows[0]["id"], sentiment=SentimentType.NEGATIVE, transcript="退貨"))
+    session.commit()
+
+    with count_statements(session) as statements:
+        deleted = files.delete_files([row["id"] for row in rows] + ["missing"])
+    assert deleted == {row["id"]: row["file_path"] for row in rows}
+    assert len(statements) == 4  # two batches of SELECT and DELETE
+    assert session.query(VoiceFile).count() == 0
+    assert session.query(VoiceAnalysis).count() == 0
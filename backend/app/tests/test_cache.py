@@ -0,0 +1,394 @@
+"""
+Memory cache tests.
+"""
+import sys
+import threading
+import time
+from datetime import datetime
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..models.file import VoiceFile
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..models.label import ProductLabel
+from ..repositories.analysis import AnalysisRepository
+from ..config import settings
+from ..utils.cache import MemoryCache, cache, cache_key, create_cache, estimate_size
+from ..utils.cache_invalidation import register_cache_invalidation
+from ..utils.http_cache import conditional_get
+from ..utils.sqlite_cache import SQLiteCache
+
+
+class TestMemoryCache:
+    """Bounded LRU + TTL cache tests."""
+
+    def test_get_set(self):
+        """Test basic set and get."""
+        cache = MemoryCache()
+        cache.set("a", {"value": 1})
+
+        assert cache.get("a") == {"value": 1}
+        assert cache.get("missing") is None
+
+    def test_lru_eviction_by_entries(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert cache.keys() == ["a", "c"]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        """Test that the byte budget caps total size."""
+        cache = MemoryCache(max_bytes=20_000)
+        for i in range(50):
+            cache.set(f"k{i}", "x" * 1000)
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 20_000
+        assert 0 < stats["size"] < 50
+        assert cache.get("k49") is not None
+
+    def test_oversized_value_not_cached(self):
+        """Test that a value larger than the budget is skipped and drops any old entry."""
+        cache = MemoryCache(max_bytes=5_000)
+        cache.set("big", "small")
+        cache.set("big", "x" * 10_000)
+
+        assert cache.get("big") is None
+        assert cache.get_stats()["bytes"] == 0
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are removed by cleanup_expired."""
+        cache = MemoryCache()
+        cache.set("long", 2, ttl=60)
+        cache.set("short", 1, ttl=0.01)
+        time.sleep(0.05)
+
+        assert cache.cleanup_expired() == 1
+        assert cache.keys() == ["long"]
+
+    def test_overwrite_keeps_accounting(self):
+        """Test that overwriting a key replaces its size and its expiry."""
+        cache = MemoryCache()
+        cache.set("a", "x" * 1000, ttl=0.01)
+        cache.set("a", "y", ttl=60)
+        time.sleep(0.05)
+
+        assert cache.cleanup_expired() == 0
+        assert cache.get("a") == "y"
+        assert cache.get_stats()["bytes"] == cache.entries()[0]["size"]
+
+    def test_estimate_size_nested(self):
+        """Test that nested containers are measured, not just the outer object."""
+        flat = estimate_size([])
+        nested = estimate_size([{"name": "水餃" * 100, "values": list(range(100))}])
+
+        assert nested > flat + 1000
+
+    def test_estimate_size_stops_at_objects(self):
+        """Test that pydantic models are walked but other objects are not followed."""
+        class Schema(BaseModel):
+            values: list
+
+        class Row:
+            pass
+
+        huge = list(range(100000))
+        row = Row()
+        row._sa_instance_state = huge
+        row.values = huge
+
+        assert estimate_size(Schema(values=huge)) > sys.getsizeof(huge) * 2
+        assert estimate_size(row) < sys.getsizeof(huge) * 2
+
+    def test_thread_safety(self):
+        """Test concurrent writers keep the cache within its bounds."""
+        cache = MemoryCache(max_entries=100)
+
+        def worker(offset):
+            for i in range(500):
+                cache.set(f"{offset}:{i}", i)
+                cache.get(f"{offset}:{i - 1}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.get_stats()
+        assert stats["size"] == 100
+        assert stats["bytes"] == sum(entry["size"] for entry in cache.entries())
+
+    def test_invalidate_tags(self):
+        """Test that tag invalidation drops only the tagged entries."""
+        cache = MemoryCache()
+        cache.set("dashboard", 1, tags=["voice_analysis", "voice_files"])
+        cache.set("labels", 2, tags=["product_labels"])
+
+        assert cache.invalidate_tags(["voice_files"]) == 1
+        assert cache.get("dashboard") is None
+        assert cache.get("labels") == 2
+
+    def test_data_version_follows_invalidation(self, monkeypatch):
+        """Test that versions change on invalidation and with age, and a per-process cache of several workers has none."""
+        cache = MemoryCache()
+        version = cache.data_version(["voice_files"])
+        cache.invalidate_tags(["voice_files"])
+        assert cache.data_version(["voice_files"]) not in (None, version)
+
+        # Writes the listeners never see still expire the version
+        version = cache.data_version(["voice_files"])
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + settings.DATA_VERSION_MAX_AGE)
+        assert cache.data_version(["voice_files"]) != version
+
+        monkeypatch.setattr(settings, "CACHE_BACKEND", "memory")
+        monkeypatch.setattr(settings, "WORKERS", 4)
+        assert create_cache().data_version(["voice_files"]) is None
+
+    def test_get_or_set_skips_result_invalidated_during_compute(self):
+        """Test that a value computed across an invalidation is not stored."""
+        cache = MemoryCache()
+
+        def compute():
+            cache.invalidate_tags(["voice_analysis"])
+            return "stale"
+
+        assert cache.get_or_set("k", compute, tags=["voice_analysis"]) == "stale"
+        assert cache.get("k") is None
+        assert cache.get_or_set("k", lambda: "fresh", tags=["voice_analysis"]) == "fresh"
+        assert cache.get("k") == "fresh"
+
+    def test_get_or_set_coalesces_concurrent_misses(self):
+        """Test that concurrent misses on one key run a single computation."""
+        cache = MemoryCache()
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "dashboard"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set("dashboard", compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["dashboard"] * 8
+        assert cache.get_stats()["coalesced"] == 7
+
+    def test_get_or_set_serves_stale_while_refreshing(self):
+        """Test that a stale value is returned at once and refreshed in the background."""
+        cache = MemoryCache()
+        refreshed = threading.Event()
+
+        def refresh():
+            # Background refreshes use their own callable (e.g. with their own session)
+            refreshed.set()
+            return "v2"
+
+        assert cache.get_or_set("k", lambda: "v1", ttl=0.01, stale_ttl=60, refresh=refresh) == "v1"
+        time.sleep(0.05)
+
+        assert cache.get_or_set("k", lambda: "v1", ttl=60, stale_ttl=60, refresh=refresh) == "v1"
+        assert refreshed.wait(timeout=2)
+        for _ in range(100):
+            if cache.get_stats()["refreshes"]:
+                break
+            time.sleep(0.01)
+        assert cache.get_or_set("k", lambda: "v1", ttl=60, stale_ttl=60, refresh=refresh) == "v2"
+        assert cache.get_stats()["stale_hits"] == 1
+
+
+class TestCacheKey:
+    """Cache key generation tests."""
+
+    def test_sessions_are_skipped(self, engine):
+        """Test that calls from different request sessions share a key."""
+        first, second = Session(bind=engine), Session(bind=engine)
+
+        assert cache_key(first, limit=10) == cache_key(second, limit=10)
+        assert cache_key(first, limit=10) != cache_key(first, limit=20)
+
+    def test_filters_are_canonicalized(self):
+        """Test that list order, enums and dates do not produce distinct keys for equal filters."""
+        start = datetime(2024, 1, 1, 8, 30)
+
+        assert cache_key(
+            sentiments=[SentimentType.NEGATIVE, SentimentType.POSITIVE], start_date=start
+        ) == cache_key(
+            start_date=datetime(2024, 1, 1, 8, 30), sentiments=["positive", "negative", "positive"]
+        )
+        assert cache_key(uploaders=["a"]) != cache_key(uploaders=["b"])
+        assert cache_key(1) != cache_key(True)
+
+    def test_repository_method_hits_across_sessions(self, engine, db_session: Session, completed_file: VoiceFile):
+        """Test that a decorated repository method is served from cache for a new request's session."""
+        register_cache_invalidation()
+        db_session.add(VoiceAnalysis(file_id=completed_file.id, sentiment=SentimentType.POSITIVE))
+        db_session.commit()
+
+        assert AnalysisRepository(db_session).get_sentiment_distribution() == {"positive": 1}
+        hits = cache.get_stats()["hits"]
+        with Session(bind=engine) as other_request:
+            assert AnalysisRepository(other_request).get_sentiment_distribution() == {"positive": 1}
+        assert cache.get_stats()["hits"] == hits + 1
+
+        db_session.add(VoiceAnalysis(file_id=completed_file.id, sentiment=SentimentType.NEGATIVE))
+        db_session.commit()
+
+        assert AnalysisRepository(db_session).get_sentiment_distribution() == {"positive": 1, "negative": 1}
+
+
+class TestConditionalGet:
+    """ETag / If-None-Match tests."""
+
+    @staticmethod
+    def make_client():
+        app = FastAPI()
+        calls = []
+
+        @app.get("/labels")
+        def labels(request: Request, response: Response, active_only: bool = True):
+            not_modified = conditional_get(request, response, [ProductLabel.__tablename__])
+            if not_modified:
+                return not_modified
+            calls.append(active_only)
+            return ["水餃"]
+
+        return TestClient(app), calls
+
+    def test_unchanged_data_returns_304(self):
+        """Test that a matching If-None-Match skips the endpoint body."""
+        client, calls = self.make_client()
+        first = client.get("/labels")
+        etag = first.headers["etag"]
+
+        second = client.get("/labels", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert calls == [True]
+
+    def test_write_changes_etag(self):
+        """Test that invalidating a table the response reads produces a new ETag."""
+        client, _ = self.make_client()
+        etag = client.get("/labels").headers["etag"]
+
+        cache.invalidate_tags([ProductLabel.__tablename__])
+        response = client.get("/labels", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_etag_depends_on_query(self):
+        """Test that different query parameters get different ETags."""
+        client, _ = self.make_client()
+
+        assert client.get("/labels?active_only=true").headers["etag"] != \
+            client.get("/labels?active_only=false").headers["etag"]
+
+
+class TestCacheInvalidation:
+    """Session-driven cache invalidation tests."""
+
+    def test_commit_invalidates_written_tables(self, db_session: Session, test_user: User):
+        """Test that committing a write drops entries tagged with the written table."""
+        register_cache_invalidation()
+        cache.set("labels", ["old"], tags=[ProductLabel.__tablename__])
+        cache.set("dashboard", {"total": 0}, tags=[VoiceAnalysis.__tablename__])
+
+        db_session.add(ProductLabel(name="新標籤", created_by=test_user.id))
+        db_session.commit()
+
+        assert cache.get("labels") is None
+        assert cache.get("dashboard") == {"total": 0}
+
+    def test_rollback_keeps_cache(self, db_session: Session, test_user: User):
+        """Test that a rolled back write does not invalidate anything."""
+        register_cache_invalidation()
+        cache.set("labels", ["old"], tags=[ProductLabel.__tablename__])
+
+        db_session.add(ProductLabel(name="暫存標籤", created_by=test_user.id))
+        db_session.flush()
+        db_session.rollback()
+
+        assert cache.get("labels") == ["old"]
+
+    def test_file_delete_cascades_to_analysis_tag(self, db_session: Session, completed_file: VoiceFile):
+        """Test that deleting a file also invalidates entries built from its analyses."""
+        register_cache_invalidation()
+        cache.set("statistics", {"total": 1}, tags=[VoiceAnalysis.__tablename__])
+
+        db_session.delete(completed_file)
+        db_session.commit()
+
+        assert cache.get("statistics") is None
+
+
+class TestSQLiteCache:
+    """Shared SQLite cache backend tests."""
+
+    def test_entries_shared_between_instances(self, tmp_path):
+        """Test that two instances on one file (as two workers would) see each other's entries."""
+        path = str(tmp_path / "cache.db")
+        worker_a = SQLiteCache(path)
+        worker_b = SQLiteCache(path)
+
+        worker_a.set("dashboard", {"total": 3}, tags=["voice_analysis"])
+        assert worker_b.get("dashboard") == {"total": 3}
+
+        assert worker_b.invalidate_tags(["voice_analysis"]) == 1
+        assert worker_a.get("dashboard") is None
+
+    def test_lru_budget(self, tmp_path):
+        """Test that the entry budget evicts the least recently used entries."""
+        cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=3)
+        for i in range(5):
+            cache.set(f"k{i}", i)
+
+        stats = cache.get_stats()
+        assert stats["size"] == 3
+        assert stats["bytes"] == sum(entry["size"] for entry in cache.entries())
+        assert cache.get("k4") == 4
+
+    def test_expiry_and_overwrite(self, tmp_path):
+        """Test TTL expiry and that overwriting keeps size accounting exact."""
+        cache = SQLiteCache(str(tmp_path / "cache.db"))
+        cache.set("a", "x" * 1000, ttl=0.01)
+        cache.set("b", "y", ttl=60)
+        cache.set("b", "z", ttl=60)
+        time.sleep(0.05)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == "z"
+        assert cache.get_stats()["size"] == 1
+
+    def test_get_or_set_generation_is_shared(self, tmp_path):
+        """Test that an invalidation from another worker blocks storing a stale result."""
+        path = str(tmp_path / "cache.db")
+        worker_a = SQLiteCache(path)
+        worker_b = SQLiteCache(path)
+
+        def compute():
+            worker_b.invalidate_tags(["voice_files"])
+            return "stale"
+
+        worker_a.get_or_set("files", compute, tags=["voice_files"])
+        assert worker_b.get("files") is None
@@ -0,0 +1,77 @@
+"""
+Response compression tests.
+"""
+import importlib.util
+import os
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..api.v1 import data
+from ..config import settings
+from ..core.security import create_access_token
+from ..models.file import VoiceFile, FileStatus, FileFormat
+from ..models.user import User
+
+# brotli-asgi is optional; without it every client gets gzip
+BROTLI_ENCODING = "br" if importlib.util.find_spec("brotli_asgi") else "gzip"
+
+
+class TestCompression:
+    """Compression middleware tests."""
+
+    def test_large_response_follows_accept_encoding(self, client: TestClient):
+        """Test that a response over the minimum size is encoded as the client asks."""
+        response = client.get("/openapi.json", headers={"Accept-Encoding": "br, gzip"})
+        assert len(response.content) > settings.COMPRESSION_MINIMUM_SIZE
+        assert response.headers["content-encoding"] == BROTLI_ENCODING
+
+        response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+
+        response = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_small_response_is_not_compressed(self, client: TestClient):
+        """Test that a response under the minimum size is sent as is."""
+        response = client.get("/health", headers={"Accept-Encoding": "br, gzip"})
+
+        assert response.status_code == 200
+        assert len(response.content) < settings.COMPRESSION_MINIMUM_SIZE
+        assert "content-encoding" not in response.headers
+
+    def test_compressed_downloads_are_not_recompressed(
+        self, client: TestClient, db_session: Session, admin_user: User, tmp_path, monkeypatch
+    ):
+        """Test that XLSX exports and audio downloads keep Content-Encoding: identity."""
+        headers = {
+            "Authorization": f"Bearer {create_access_token(data={'sub': admin_user.email})}",
+            "Accept-Encoding": "br, gzip",
+        }
+        audio = os.urandom(4 * settings.COMPRESSION_MINIMUM_SIZE)
+        path = tmp_path / "call.mp3"
+        path.write_bytes(audio)
+        file_obj = VoiceFile(
+            filename="call.mp3",
+            original_filename="call.mp3",
+            file_path=str(path),
+            file_size=len(audio),
+            file_format=FileFormat.MP3,
+            status=FileStatus.COMPLETED,
+            uploaded_by=admin_user.id
+        )
+        db_session.add(file_obj)
+        db_session.commit()
+
+        response = client.get(f"/api/files/{file_obj.id}/download", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "identity"
+        assert response.content == audio
+
+        # The streamed export opens its own session
+        monkeypatch.setattr(data, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+        response = client.get("/api/data/export", params={"format": "excel"}, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "identity"
+        assert response.content.startswith(b"PK")
+        assert len(response.content) > settings.COMPRESSION_MINIMUM_SIZE
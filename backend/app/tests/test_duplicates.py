@@ -0,0 +1,120 @@
+"""
+Duplicate upload detection tests.
+"""
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from ..models.file import VoiceFile, FileFormat, FileStatus
+from ..services.duplicate_service import DuplicateService
+from ..utils.fingerprint import AcousticFingerprint, file_content_hash, fingerprint_samples, hamming_distance
+
+
+def synthetic_call(seed: int, seconds: float = 20.0) -> np.ndarray:
+    """Tones and background noise whose pitch and level change every quarter second, like speech."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * 8000)) / 8000
+    step = (t * 4).astype(int)
+    frequencies = rng.uniform(250, 3400, size=(step[-1] + 1, 3))
+    envelope = rng.uniform(0.2, 1.0, size=step[-1] + 1)
+    tones = np.sin(2 * np.pi * frequencies[step] * t[:, None]).sum(axis=1)
+    return ((tones + rng.normal(scale=0.3, size=len(t))) * envelope[step] * 0.1).astype(np.float32)
+
+
+class TestAcousticFingerprint:
+    """Acoustic fingerprint tests."""
+
+    def test_same_audio_matches_and_different_audio_does_not(self):
+        """Test that gain and noise barely change the fingerprint while another call differs."""
+        pytest.importorskip("librosa")
+        samples = synthetic_call(1)
+        original = fingerprint_samples(samples)
+        noisy = fingerprint_samples(
+            samples * 0.5 + np.random.default_rng(2).normal(scale=0.002, size=len(samples)).astype(np.float32)
+        )
+        other = fingerprint_samples(synthetic_call(3))
+
+        assert hamming_distance(original.value, noisy.value) <= 3
+        assert hamming_distance(original.value, other.value) > 12
+        assert original.duration == 20.0
+
+    def test_bands(self):
+        """Test that bands split the fingerprint most significant first."""
+        assert AcousticFingerprint("0001000200030004", 1.0).bands == (1, 2, 3, 4)
+
+
+class TestDuplicateService:
+    """Duplicate lookup tests."""
+
+    def make_file(self, db_session: Session, user_id: str, path: str, status=FileStatus.COMPLETED) -> VoiceFile:
+        file = VoiceFile(
+            filename="call.txt",
+            original_filename="call.txt",
+            file_path=path,
+            file_size=10,
+            file_format=FileFormat.TXT,
+            status=status,
+            uploaded_by=user_id
+        )
+        db_session.add(file)
+        db_session.commit()
+        return file
+
+    def test_exact_duplicate_short_circuits(self, db_session: Session, test_user, tmp_path):
+        """Test that a re-upload with the same bytes resolves to the earlier file."""
+        path = tmp_path / "call.txt"
+        path.write_text("客戶反映水餃退冰")
+        content_hash = file_content_hash(str(path))
+        service = DuplicateService(db_session)
+
+        assert service.find_duplicate(str(path), FileFormat.TXT, content_hash).file is None
+        first = self.make_file(db_session, test_user.id, str(path))
+        service.record(first.id, content_hash, None)
+
+        check = service.find_duplicate(str(path), FileFormat.TXT, content_hash)
+        assert check.file.id == first.id
+        assert check.match_type == "exact"
+
+    def test_record_many_is_best_effort(self, db_session: Session, test_user, tmp_path, monkeypatch):
+        """Test that batch fingerprints are matched later, and failing to store them keeps the files."""
+        path = tmp_path / "call.txt"
+        path.write_text("客戶反映水餃退冰")
+        content_hash = file_content_hash(str(path))
+        service = DuplicateService(db_session)
+        first = self.make_file(db_session, test_user.id, str(path))
+        service.record_many([(first.id, content_hash, None)])
+        assert service.find_duplicate(str(path), FileFormat.TXT, content_hash).file.id == first.id
+
+        def fail(rows, commit=True):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(service.fingerprint_repo, "bulk_create", fail)
+        second = self.make_file(db_session, test_user.id, str(tmp_path / "other.txt"))
+        service.record_many([(second.id, "0" * 64, None)])
+        assert db_session.get(VoiceFile, second.id) is not None
+
+    def test_failed_upload_is_not_reused(self, db_session: Session, test_user, tmp_path):
+        """Test that a re-upload of a failed file is treated as new."""
+        path = tmp_path / "call.txt"
+        path.write_text("客戶反映水餃退冰")
+        content_hash = file_content_hash(str(path))
+        service = DuplicateService(db_session)
+        failed = self.make_file(db_session, test_user.id, str(path), status=FileStatus.FAILED)
+        service.record(failed.id, content_hash, None)
+
+        assert service.find_duplicate(str(path), FileFormat.TXT, content_hash).file is None
+
+    def test_acoustic_duplicate(self, db_session: Session, test_user, completed_file: VoiceFile, tmp_path):
+        """Test that a re-encoded recording matches by fingerprint within the distance and duration limits."""
+        fingerprint = AcousticFingerprint("0123456789abcdef", 20.0)
+        service = DuplicateService(db_session)
+        service.record(completed_file.id, "0" * 64, fingerprint)
+
+        close = AcousticFingerprint(f"{int(fingerprint.value, 16) ^ 0b101:016x}", 20.4)
+        assert service.fingerprint_repo.find_by_acoustic_fingerprint(close, 3, 1.0)[0].id == completed_file.id
+
+        far = AcousticFingerprint(f"{int(fingerprint.value, 16) ^ 0xf0f0:016x}", 20.0)
+        assert service.fingerprint_repo.find_by_acoustic_fingerprint(far, 3, 1.0) is None
+
+        longer = AcousticFingerprint(fingerprint.value, 25.0)
+        assert service.fingerprint_repo.find_by_acoustic_fingerprint(longer, 3, 1.0) is None
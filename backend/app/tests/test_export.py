@@ -0,0 +1,179 @@
+"""
+Streaming export tests.
+"""
+import csv
+import gzip
+import io
+import time
+import zipfile
+from types import SimpleNamespace
+from xml.etree import ElementTree
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models.file import VoiceFile
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..config import settings
+from ..services import export_service
+from ..services.export_service import (
+    ExportService, ExportJobManager, ExportJobStatus, EXPORT_HEADERS, EXPORT_TABLES
+)
+from ..utils.cache import cache
+from ..utils import export
+from ..utils.export import write_csv, write_xlsx
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_xlsx(data: bytes) -> dict:
+    """Sheet name -> list of row values."""
+    sheets = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        for index, sheet in enumerate(workbook.iterfind(".//s:sheet", SHEET_NS), start=1):
+            root = ElementTree.fromstring(archive.read(f"xl/worksheets/sheet{index}.xml"))
+            sheets[sheet.get("name")] = [
+                [cell.findtext("s:is/s:t", default="", namespaces=SHEET_NS) for cell in row]
+                for row in root.iterfind(".//s:row", SHEET_NS)
+            ]
+    return sheets
+
+
+class TestWriters:
+    """CSV and XLSX writer tests."""
+
+    def test_csv_is_streamed_in_chunks(self):
+        """Test that CSV rows are yielded in several chunks and decode to the input."""
+        rows = ([str(i), "水餃, 包子", 'say "hi"'] for i in range(1200))
+
+        chunks = list(write_csv(["id", "products", "note"], rows))
+        parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+
+        assert len(chunks) > 2
+        assert parsed[0] == ["id", "products", "note"]
+        assert parsed[1200] == ["1199", "水餃, 包子", 'say "hi"']
+
+    def test_xlsx_round_trip(self):
+        """Test that the workbook is a valid zip whose sheet holds every row, escaped."""
+        rows = [["1", "<水餃> & 包子"], ["2", "bad\x01char"]]
+
+        sheets = read_xlsx(b"".join(write_xlsx(["id", "name"], rows)))
+
+        assert sheets == {"Sheet1": [["id", "name"], ["1", "<水餃> & 包子"], ["2", "badchar"]]}
+
+    def test_xlsx_rolls_over_to_new_sheet(self, monkeypatch):
+        """Test that rows beyond the sheet limit continue on a new sheet with the header repeated."""
+        monkeypatch.setattr(export, "XLSX_MAX_ROWS", 3)
+
+        sheets = read_xlsx(b"".join(write_xlsx(["id"], ([str(i)] for i in range(5)))))
+
+        assert sheets == {
+            "Sheet1": [["id"], ["0"], ["1"]],
+            "Sheet2": [["id"], ["2"], ["3"]],
+            "Sheet3": [["id"], ["4"]],
+        }
+
+    def test_xlsx_without_rows(self):
+        """Test that an empty export still produces a workbook with the header."""
+        assert read_xlsx(b"".join(write_xlsx(["id"], []))) == {"Sheet1": [["id"]]}
+
+
+class TestExportService:
+    """Analysis export tests."""
+
+    def test_streams_all_matching_rows(self, db_session: Session, completed_file: VoiceFile, monkeypatch):
+        """Test that every matching analysis is exported, fetched in small batches."""
+        monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+        for i in range(5):
+            db_session.add(VoiceAnalysis(
+                file_id=completed_file.id,
+                sentiment=SentimentType.NEGATIVE if i % 2 else SentimentType.POSITIVE,
+                product_names='["水餃", "包子"]',
+                transcript=f"逐字稿 {i}"
+            ))
+        db_session.commit()
+
+        data = b"".join(ExportService(db_session).stream("csv", {"sentiments": [SentimentType.POSITIVE]}))
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+
+        assert rows[0] == EXPORT_HEADERS
+        assert len(rows) == 4
+        assert {row[2] for row in rows[1:]} == {"水餃、包子"}
+        assert {row[3] for row in rows[1:]} == {"positive"}
+
+
+class TestExportJobs:
+    """Background export job tests."""
+
+    @staticmethod
+    def wait(manager: ExportJobManager, job_id: str) -> dict:
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            job = manager._load(job_id)
+            if job["status"] not in (ExportJobStatus.PENDING, ExportJobStatus.RUNNING):
+                return job
+            time.sleep(0.05)
+        raise AssertionError("export job did not finish")
+
+    def make_manager(self, db_session: Session, tmp_path, monkeypatch, ttl: int = 60) -> ExportJobManager:
+        monkeypatch.setattr(export_service, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+        return ExportJobManager(str(tmp_path / "exports"), max_workers=1, ttl=ttl, stale_seconds=60)
+
+    def test_job_writes_gzipped_csv(self, db_session: Session, completed_file: VoiceFile, tmp_path, monkeypatch):
+        """Test that a job reports progress and stores the CSV gzipped."""
+        for i in range(3):
+            db_session.add(VoiceAnalysis(
+                file_id=completed_file.id, sentiment=SentimentType.NEUTRAL, transcript=f"逐字稿 {i}"
+            ))
+        db_session.commit()
+        manager = self.make_manager(db_session, tmp_path, monkeypatch)
+
+        job = self.wait(manager, manager.submit("csv", {})["job_id"])
+
+        assert job["status"] == ExportJobStatus.COMPLETED
+        assert job["processed_rows"] == job["total_rows"] == 3
+        with gzip.open(manager.artifact_path(job), "rt", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == EXPORT_HEADERS
+        assert len(rows) == 4
+
+    def test_identical_export_is_reused_until_data_changes(
+        self, db_session: Session, completed_file: VoiceFile, tmp_path, monkeypatch
+    ):
+        """Test that resubmitting reuses the job, and a write starts a new one."""
+        manager = self.make_manager(db_session, tmp_path, monkeypatch)
+        filters = {"sentiments": [SentimentType.POSITIVE]}
+
+        first = self.wait(manager, manager.submit("excel", filters)["job_id"])
+        assert manager.submit("excel", filters)["job_id"] == first["job_id"]
+        other = self.wait(manager, manager.submit("csv", filters)["job_id"])
+        assert other["job_id"] != first["job_id"]
+
+        cache.invalidate_tags(EXPORT_TABLES)
+        assert self.wait(manager, manager.submit("excel", filters)["job_id"])["job_id"] != first["job_id"]
+
+    def test_expired_jobs_are_removed(self, db_session: Session, completed_file: VoiceFile, tmp_path, monkeypatch):
+        """Test that expired artifacts and manifests are deleted."""
+        manager = self.make_manager(db_session, tmp_path, monkeypatch, ttl=0)
+
+        job = self.wait(manager, manager.submit("excel", {})["job_id"])
+        assert job["status"] == ExportJobStatus.COMPLETED
+
+        assert manager.cleanup_expired() == 1
+        assert list((tmp_path / "exports").iterdir()) == []
+        assert manager.get(job["job_id"]) is None
+
+    def test_queued_job_is_not_restarted(self, db_session: Session, completed_file: VoiceFile, tmp_path, monkeypatch):
+        """Test that a job waiting for a worker is reused, however long it waits."""
+        manager = self.make_manager(db_session, tmp_path, monkeypatch, ttl=86400)
+        monkeypatch.setattr(settings, "DATA_VERSION_MAX_AGE", 10 ** 9)  # same data version throughout
+        queued = []
+        manager._executor = SimpleNamespace(submit=lambda *args: queued.append(args))
+
+        job = manager.submit("csv", {})
+        # Well past stale_seconds without progress
+        monkeypatch.setattr(time, "time", lambda: job["created_at"] + 3600)
+
+        assert manager.submit("csv", {})["run_id"] == job["run_id"]
+        assert len(queued) == 1
@@ -1,14 +1,20 @@
 """
 File management tests.
 """
+import asyncio
+import hashlib
+import io
 import pytest
 import tempfile
 import os
+import threading
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from ..models.file import VoiceFile, FileStatus, FileFormat
 from ..models.user import User
+from ..services.upload_service import ChunkedUploadError, ChunkedUploadManager
+from ..utils.file_handler import UploadTooLargeError, write_upload
 
 
 class TestFileUpload:
@@ -393,4 +399,84 @@ class TestFileValidation:
         )
         
         # Should handle format mismatch appropriately
-        assert response.status_code in [201, 400]
\ No newline at end of file
+        assert response.status_code in [201, 400]
+
+
+class AsyncBytes:
+    """Minimal async reader standing in for an UploadFile."""
+    
+    def __init__(self, data: bytes):
+        self.stream = io.BytesIO(data)
+    
+    async def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size)
+
+
+class TestStreamingUpload:
+    """Streaming upload writer tests."""
+    
+    def test_writes_and_hashes_in_one_pass(self, tmp_path):
+        """Test that the file is renamed into place with its size and SHA-256."""
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        path = str(tmp_path / "call.wav")
+        
+        size, content_hash = asyncio.run(write_upload(AsyncBytes(data), path, max_size=len(data)))
+        
+        assert size == len(data)
+        assert content_hash == hashlib.sha256(data).hexdigest()
+        assert open(path, "rb").read() == data
+        assert os.listdir(tmp_path) == ["call.wav"]
+    
+    def test_stops_at_size_limit(self, tmp_path):
+        """Test that an oversized upload is refused mid-stream and leaves no file behind."""
+        data = b"x" * (3 * 1024 * 1024)
+        path = str(tmp_path / "call.wav")
+        
+        with pytest.raises(UploadTooLargeError):
+            asyncio.run(write_upload(AsyncBytes(data), path, max_size=1024 * 1024))
+        
+        assert os.listdir(tmp_path) == []
+
+
+async def byte_stream(data: bytes):
+    """Request body stand-in yielding data in small pieces."""
+    for start in range(0, len(data), 300):
+        yield data[start:start + 300]
+
+
+class TestChunkedUpload:
+    """Resumable chunked upload tests."""
+    
+    def test_out_of_order_chunks_resume_and_assemble(self, tmp_path):
+        """Test that chunks sent in any order, with a bad one resent, assemble into the original file."""
+        manager = ChunkedUploadManager(str(tmp_path / "chunks"), chunk_size=1000, ttl=3600)
+        data = os.urandom(2500)
+        upload = manager.create("user-1", "call.wav", len(data))
+        assert upload["total_chunks"] == 3
+        assert manager.get(upload["upload_id"], "user-2") is None
+        
+        asyncio.run(manager.write_chunk(upload, 2, byte_stream(data[2000:])))
+        with pytest.raises(ChunkedUploadError):
+            asyncio.run(manager.write_chunk(upload, 0, byte_stream(data[:1000]), checksum="0" * 64))
+        with pytest.raises(ChunkedUploadError):
+            asyncio.run(manager.write_chunk(upload, 1, byte_stream(data[1000:1999])))
+        asyncio.run(manager.write_chunk(
+            upload, 0, byte_stream(data[:1000]), checksum=hashlib.sha256(data[:1000]).hexdigest()
+        ))
+        
+        # A resuming client only needs to send what is missing
+        assert manager.received_chunks(upload) == [0, 2]
+        with pytest.raises(ChunkedUploadError, match="Missing chunks: 1"):
+            asyncio.run(manager.assemble(upload, str(tmp_path / "call.wav")))
+        
+        asyncio.run(manager.write_chunk(upload, 1, byte_stream(data[1000:2000])))
+        remove = manager.remove
+        removed_on = []
+        manager.remove = lambda upload_id: removed_on.append(threading.get_ident()) or remove(upload_id)
+        size, content_hash = asyncio.run(manager.assemble(upload, str(tmp_path / "call.wav")))
+        assert removed_on and removed_on[0] != threading.get_ident()  # chunks removed off the event loop
+        
+        assert size == len(data)
+        assert content_hash == hashlib.sha256(data).hexdigest()
+        assert (tmp_path / "call.wav").read_bytes() == data
+        assert manager.get(upload["upload_id"], "user-1") is None
@@ -0,0 +1,96 @@
+"""
+Bulk import tests.
+"""
+import os
+import tarfile
+import zipfile
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.file import VoiceFile, FileStatus
+from ..services.import_service import ImportService
+from ..utils import cache_invalidation, search_index, vector_index
+from ..utils.cache import cache
+
+
+def stored_files(upload_dir) -> list:
+    """Files in the content store, excluding the staging directory."""
+    return sorted(
+        os.path.join(root, name)
+        for root, dirs, names in os.walk(upload_dir)
+        if os.path.basename(root) != "incoming"
+        for name in names
+    )
+
+
+def make_dump(directory) -> None:
+    (directory / "day1").mkdir(parents=True)
+    (directory / "day1" / "a.txt").write_bytes("客戶反映水餃退冰".encode())
+    (directory / "day1" / "b.wav").write_bytes(b"RIFF" + os.urandom(2000))
+    (directory / "copy-of-a.txt").write_bytes("客戶反映水餃退冰".encode())
+    (directory / "notes.pdf").write_bytes(b"%PDF")
+
+
+class TestImportService:
+    """Directory and archive import tests."""
+
+    def test_directory_import_skips_known_content(self, db_session: Session, test_user, tmp_path, monkeypatch):
+        """Test that a directory imports each distinct content once, and a re-run imports nothing."""
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+        make_dump(tmp_path / "dump")
+        service = ImportService(db_session, workers=2, batch_size=2)
+
+        report = service.import_path(str(tmp_path / "dump"), test_user.id)
+
+        assert (report.total_files, report.imported_count, report.skipped_count, report.failed_count) == (3, 2, 1, 0)
+        files = db_session.query(VoiceFile).filter(VoiceFile.id.in_(report.file_ids)).all()
+        assert {f.status for f in files} == {FileStatus.PENDING}
+        assert stored_files(tmp_path / "uploads") == sorted(f.file_path for f in files)
+
+        again = service.import_path(str(tmp_path / "dump"), test_user.id)
+        assert (again.imported_count, again.skipped_count) == (0, 3)
+        assert len(stored_files(tmp_path / "uploads")) == 2
+        assert os.listdir(tmp_path / "uploads" / "incoming") == []
+
+    def test_archive_import(self, db_session: Session, test_user, tmp_path, monkeypatch):
+        """Test that zip and tar archives import the same files as the directory they contain."""
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+        make_dump(tmp_path / "dump")
+        with zipfile.ZipFile(tmp_path / "dump.zip", "w") as zf:
+            for path in sorted((tmp_path / "dump").rglob("*")):
+                zf.write(path, path.relative_to(tmp_path / "dump"))
+        with tarfile.open(tmp_path / "dump.tar.gz", "w:gz") as tar:
+            tar.add(tmp_path / "dump", arcname="dump")
+
+        report = ImportService(db_session).import_path(str(tmp_path / "dump.zip"), test_user.id)
+        assert (report.imported_count, report.skipped_count) == (2, 1)
+
+        # Archive handles opened to read members are closed with the item list
+        with ImportService(db_session)._zip_items(str(tmp_path / "dump.zip")) as items:
+            items[0].open().close()
+        with pytest.raises(ValueError):
+            items[0].open()
+
+        (tmp_path / "dump" / "day1" / "c.mp3").write_bytes(os.urandom(500))
+        with tarfile.open(tmp_path / "dump2.tar.gz", "w:gz") as tar:
+            tar.add(tmp_path / "dump", arcname="dump")
+        report = ImportService(db_session).import_path(str(tmp_path / "dump2.tar.gz"), test_user.id)
+        assert (report.total_files, report.imported_count, report.skipped_count) == (4, 1, 3)
+        assert len(stored_files(tmp_path / "uploads")) == 3
+        assert os.listdir(tmp_path / "uploads" / "incoming") == []
+
+    def test_import_invalidates_cached_lists(self, db_session: Session, test_user, tmp_path, monkeypatch):
+        """Test that sessions outside the API (scripts) carry the write listeners."""
+        for module in (cache_invalidation, search_index, vector_index):
+            assert event.contains(Session, "after_commit", module._after_commit)
+
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+        make_dump(tmp_path / "dump")
+        cache.set("file-list", ["old"], tags=[VoiceFile.__tablename__])
+
+        ImportService(db_session).import_path(str(tmp_path / "dump"), test_user.id)
+
+        assert cache.get("file-list") is None
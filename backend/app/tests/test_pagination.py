@@ -0,0 +1,79 @@
+"""
+Keyset pagination tests.
+"""
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from ..models.file import VoiceFile
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..utils.pagination import encode_cursor, decode_cursor, page_cursor
+
+
+class TestCursorEncoding:
+    """Cursor encode/decode tests."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the position it was built from."""
+        timestamp = datetime(2025, 7, 28, 18, 17, 32, 191157)
+        cursor = encode_cursor(timestamp, "abc-123")
+
+        assert decode_cursor(cursor) == (timestamp, "abc-123")
+        assert "=" not in cursor
+
+    def test_invalid_cursor(self):
+        """Test that malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_page_cursor_last_page(self):
+        """Test that no cursor is produced when the extra row is missing."""
+        rows = [(datetime(2025, 1, 1), "a")]
+        assert page_cursor(rows, 1, lambda row: row) is None
+
+    def test_page_cursor_points_at_last_returned_row(self):
+        """Test that the cursor points at the last row of the page, not the lookahead row."""
+        rows = [(datetime(2025, 1, 3), "c"), (datetime(2025, 1, 2), "b"), (datetime(2025, 1, 1), "a")]
+        cursor = page_cursor(rows, 2, lambda row: row)
+
+        assert decode_cursor(cursor) == (datetime(2025, 1, 2), "b")
+
+
+class TestCursorEndpoints:
+    """Cursor mode on listing endpoints."""
+
+    def test_analysis_cursor_walks_all_rows(self, client: TestClient, auth_headers: dict, db_session: Session, completed_file: VoiceFile):
+        """Test that following next_cursor visits every analysis exactly once."""
+        base_time = datetime(2025, 1, 1)
+        for i in range(5):
+            db_session.add(VoiceAnalysis(
+                file_id=completed_file.id,
+                transcript=f"測試 {i}",
+                sentiment=SentimentType.NEUTRAL,
+                # Two rows share a timestamp to exercise the id tie-breaker
+                analysis_time=base_time + timedelta(minutes=i // 2)
+            ))
+        db_session.commit()
+
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            response = client.get(
+                "/api/data/analysis",
+                headers=auth_headers,
+                params={"cursor": cursor, "page_size": 2}
+            )
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    def test_invalid_cursor_rejected(self, client: TestClient, auth_headers: dict):
+        """Test that a malformed cursor returns 400."""
+        response = client.get("/api/files/", headers=auth_headers, params={"cursor": "bogus"})
+
+        assert response.status_code == 400
@@ -0,0 +1,55 @@
+"""
+Decoded audio cache tests.
+"""
+import os
+import time
+
+import numpy as np
+
+from ..utils.pcm_cache import PCMCache, to_float32
+
+
+def recording(path, content=b"audio"):
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_load_decodes_once_and_memory_maps(tmp_path):
+    cache = PCMCache(str(tmp_path / "pcm"), max_bytes=10 ** 6)
+    audio_path = recording(tmp_path / "call.mp3")
+    waveform = np.sin(np.linspace(0, 100, 16000)).astype(np.float32) * 0.5
+    decoded = []
+
+    def decode(path):
+        decoded.append(path)
+        return waveform
+
+    first = cache.load(audio_path, decode)
+    again = cache.load(audio_path, decode)
+    assert decoded == [audio_path]
+    assert isinstance(again, np.memmap) and again.dtype == np.int16
+    np.testing.assert_allclose(to_float32(again[:100]), waveform[:100], atol=1 / 32768)
+    assert np.array_equal(first, again)
+
+    # A changed file is decoded again
+    recording(audio_path, b"edited audio")
+    cache.load(audio_path, decode)
+    assert len(decoded) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    entry_bytes = 4000 * 2 + 128  # samples plus .npy header
+    cache = PCMCache(str(tmp_path / "pcm"), max_bytes=entry_bytes * 2)
+    paths = [recording(tmp_path / f"{i}.wav", f"audio {i}".encode()) for i in range(3)]
+    silence = np.zeros(4000, dtype=np.float32)
+
+    for i, path in enumerate(paths[:2]):
+        cache.put(path, silence)
+        past = time.time() - 100 + i
+        os.utime(cache.path(cache.key(path)), (past, past))
+    assert cache.get(paths[0]) is not None  # now more recent than paths[1]
+
+    cache.put(paths[2], silence)
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) is not None and cache.get(paths[2]) is not None
@@ -0,0 +1,303 @@
+"""
+Query-plan regression tests for repository filter combinations.
+
+Each repository query is captured as it executes against a seeded SQLite
+database carrying the composite-index migration, then re-run under
+EXPLAIN QUERY PLAN. Any ``SCAN`` of voice_analysis or voice_files, including
+a walk over a whole index (``USING INDEX``/``USING COVERING INDEX``), fails
+the test unless it is one of the intended scans listed below.
+"""
+import importlib.util
+import itertools
+import re
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from ..database import Base
+from ..models.user import User, UserRole
+from ..models.file import VoiceFile, FileStatus, FileFormat
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..repositories.analysis import AnalysisRepository
+from ..repositories.file import FileRepository
+
+
+MIGRATION_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "migrations" / "versions" / "5c2e9a7d41b3_add_composite_filter_indexes.py"
+)
+
+# Tables that must never be read with a full scan
+WATCHED_TABLES = ("voice_analysis", "voice_files")
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?P<table>\w+)")
+
+# Whole-index scans that are intended for unfiltered queries: listings walk
+# their ordering index under LIMIT, counts and aggregates read a covering index
+UNFILTERED_SCANS = frozenset({
+    "SCAN voice_analysis USING INDEX ix_voice_analysis_time_id",
+    "SCAN voice_analysis USING INDEX ix_voice_analysis_analysis_time",
+    "SCAN voice_analysis USING COVERING INDEX ix_voice_analysis_analysis_time",
+    "SCAN voice_analysis USING COVERING INDEX ix_voice_analysis_sentiment_time",
+    "SCAN voice_files USING INDEX ix_voice_files_created_id",
+    "SCAN voice_files USING COVERING INDEX ix_voice_files_created_at",
+})
+# Two of the five seeded categories match 40% of the rows, so the planner pages
+# them by walking the listing-order index under LIMIT (about 50 rows, no sort)
+BROAD_CATEGORY_SCANS = frozenset({"SCAN voice_analysis USING INDEX ix_voice_analysis_time_id"})
+
+SEED_USERS = 5
+SEED_FILES = 2000
+CATEGORIES = ["口味研發", "物流配送", "保存方式", "價格", "包裝"]
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def _run_migration(connection) -> None:
+    """Apply the composite-index migration to an existing schema."""
+    spec = importlib.util.spec_from_file_location("composite_index_migration", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    context = MigrationContext.configure(connection)
+    with Operations.context(context):
+        migration.upgrade()
+
+
+def _seed(connection) -> list:
+    """Insert enough rows for the planner to prefer indexes."""
+    user_ids = [str(uuid.uuid4()) for _ in range(SEED_USERS)]
+    connection.execute(insert(User), [
+        {
+            "id": user_id,
+            "email": f"plan{i}@example.com",
+            "password_hash": "x",
+            "role": UserRole.OPERATOR,
+            "name": f"Plan User {i}",
+            "is_active": True,
+            "created_at": BASE_TIME,
+            "updated_at": BASE_TIME,
+        }
+        for i, user_id in enumerate(user_ids)
+    ])
+
+    files, analyses = [], []
+    sentiments = list(SentimentType)
+    statuses = list(FileStatus)
+    formats = list(FileFormat)
+    for i in range(SEED_FILES):
+        file_id = str(uuid.uuid4())
+        created_at = BASE_TIME + timedelta(minutes=i * 7)
+        files.append({
+            "id": file_id,
+            "filename": f"{file_id}.wav",
+            "original_filename": f"call_{i}.wav",
+            "file_path": f"/tmp/{file_id}.wav",
+            "file_size": 1024,
+            "file_format": formats[i % len(formats)],
+            "status": statuses[i % len(statuses)],
+            "uploaded_by": user_ids[i % SEED_USERS],
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+        analyses.append({
+            "id": str(uuid.uuid4()),
+            "file_id": file_id,
+            "transcript": "測試逐字稿",
+            "sentiment": sentiments[i % len(sentiments)],
+            "feedback_category": CATEGORIES[i % len(CATEGORIES)],
+            "feedback_summary": "測試摘要",
+            "product_names": None,
+            "analysis_time": created_at + timedelta(minutes=3),
+            "created_at": created_at,
+        })
+    connection.execute(insert(VoiceFile), files)
+    connection.execute(insert(VoiceAnalysis), analyses)
+    connection.exec_driver_sql("ANALYZE")
+    return user_ids
+
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    """SQLite engine with the full schema, composite indexes and seed data."""
+    db_path = tmp_path_factory.mktemp("query_plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        _run_migration(connection)
+        engine.user_ids = _seed(connection)
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def captured(plan_engine):
+    """Record every SELECT issued through the engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(plan_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(plan_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def plan_session(plan_engine):
+    """Session bound to the query-plan database."""
+    session = sessionmaker(bind=plan_engine)()
+    yield session
+    session.close()
+
+
+def assert_no_full_scan(engine, statements, allow_sort: bool = True, allowed_scans=frozenset()) -> None:
+    """
+    Run EXPLAIN QUERY PLAN for each captured statement and reject full scans.
+
+    Args:
+        engine: Engine the statements were captured from
+        statements: (sql, parameters) pairs recorded by the captured fixture
+        allow_sort: Whether a temporary B-tree for ORDER BY is acceptable
+        allowed_scans: Plan details of intended scans (see intended_scans)
+    """
+    assert statements, "No queries were captured"
+
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            for detail in plan:
+                match = FULL_SCAN.match(detail)
+                if match and match.group("table") in WATCHED_TABLES and detail not in allowed_scans:
+                    pytest.fail(f"Full scan of {match.group('table')}:\n{statement}\nPlan: {plan}")
+                if not allow_sort and detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+                    pytest.fail(f"Sort not served by an index:\n{statement}\nPlan: {plan}")
+
+
+def intended_scans(filters) -> frozenset:
+    """Scans intended for a query with the given filters."""
+    if not filters:
+        return UNFILTERED_SCANS
+    if list(filters) == ["feedback_categories"]:
+        return BROAD_CATEGORY_SCANS
+    return frozenset()
+
+
+def analysis_filter_combinations(user_ids):
+    """Every combination of the indexed analysis filter dimensions."""
+    dimensions = {
+        "sentiments": [SentimentType.NEGATIVE],
+        "feedback_categories": [CATEGORIES[0], CATEGORIES[1]],
+        "uploaders": user_ids[:1],
+        "date_range": (BASE_TIME + timedelta(days=3), BASE_TIME + timedelta(days=4)),
+    }
+    for size in range(len(dimensions) + 1):
+        for names in itertools.combinations(dimensions, size):
+            filters = {}
+            for name in names:
+                if name == "date_range":
+                    filters["start_date"], filters["end_date"] = dimensions[name]
+                else:
+                    filters[name] = dimensions[name]
+            yield filters
+
+
+def file_filter_combinations(user_ids):
+    """Every combination of the file listing filter dimensions."""
+    dimensions = {
+        "status": FileStatus.FAILED,
+        "format": FileFormat.MP3,
+        "uploaded_by": user_ids[0],
+    }
+    for size in range(len(dimensions) + 1):
+        for names in itertools.combinations(dimensions, size):
+            yield {name: dimensions[name] for name in names}
+
+
+class TestAnalysisQueryPlans:
+    """Analysis repository queries must use indexes for every filter combination."""
+
+    def test_list_with_file_info(self, plan_engine, plan_session, captured):
+        """Test the list projection for page and keyset modes."""
+        repo = AnalysisRepository(plan_session)
+        after = (BASE_TIME + timedelta(days=5), "zzzzzzzz")
+        for filters in analysis_filter_combinations(plan_engine.user_ids):
+            repo.get_list_with_file_info(skip=0, limit=20, **filters)
+            repo.get_list_with_file_info(limit=21, after=after, **filters)
+            assert_no_full_scan(plan_engine, captured, allowed_scans=intended_scans(filters))
+            captured.clear()
+
+    def test_multi_with_file_info(self, plan_engine, plan_session, captured):
+        """Test the full-row listing used by exports."""
+        repo = AnalysisRepository(plan_session)
+        for filters in analysis_filter_combinations(plan_engine.user_ids):
+            repo.get_multi_with_file_info(skip=0, limit=20, **filters)
+            assert_no_full_scan(plan_engine, captured, allowed_scans=intended_scans(filters))
+            captured.clear()
+
+    def test_count_with_filters(self, plan_engine, plan_session, captured):
+        """Test filtered counts."""
+        repo = AnalysisRepository(plan_session)
+        for filters in analysis_filter_combinations(plan_engine.user_ids):
+            repo.count_with_filters(**filters)
+            assert_no_full_scan(plan_engine, captured, allowed_scans=intended_scans(filters))
+            captured.clear()
+
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"sentiments": [SentimentType.NEGATIVE]},
+        {"feedback_categories": [CATEGORIES[0]]},
+    ])
+    def test_listing_order_uses_index(self, plan_engine, plan_session, captured, filters):
+        """Test that single-value filters are paged in index order without a sort."""
+        AnalysisRepository(plan_session).get_list_with_file_info(skip=0, limit=20, **filters)
+
+        assert_no_full_scan(plan_engine, captured, allow_sort=False, allowed_scans=intended_scans(filters))
+
+    def test_dashboard_aggregates(self, plan_engine, plan_session, captured):
+        """Test the sentiment and trend aggregates behind the dashboard."""
+        repo = AnalysisRepository(plan_session)
+        repo.get_sentiment_distribution()
+        repo.get_category_distribution(limit=10)
+        repo.get_recent_analyses(limit=10)
+
+        assert_no_full_scan(plan_engine, captured, allowed_scans=UNFILTERED_SCANS)
+
+
+class TestFileQueryPlans:
+    """File repository queries must use indexes for every filter combination."""
+
+    def test_multi_with_uploader(self, plan_engine, plan_session, captured):
+        """Test the file listing for page and keyset modes."""
+        repo = FileRepository(plan_session)
+        after = (BASE_TIME + timedelta(days=5), "zzzzzzzz")
+        for filters in file_filter_combinations(plan_engine.user_ids):
+            repo.get_multi_with_uploader(skip=0, limit=20, **filters)
+            repo.get_multi_with_uploader(limit=21, after=after, **filters)
+            assert_no_full_scan(plan_engine, captured, allowed_scans=intended_scans(filters))
+            captured.clear()
+
+    @pytest.mark.parametrize("filter_name", [None, "status", "format", "uploaded_by"])
+    def test_listing_order_uses_index(self, plan_engine, plan_session, captured, filter_name):
+        """Test that each single filter is paged in index order without a sort."""
+        filters = {}
+        if filter_name:
+            filters = next(f for f in file_filter_combinations(plan_engine.user_ids) if list(f) == [filter_name])
+        FileRepository(plan_session).get_multi_with_uploader(skip=0, limit=20, **filters)
+
+        assert_no_full_scan(plan_engine, captured, allow_sort=False, allowed_scans=intended_scans(filters))
+
+    def test_count_with_filters(self, plan_engine, plan_session, captured):
+        """Test filtered file counts."""
+        repo = FileRepository(plan_session)
+        for filters in file_filter_combinations(plan_engine.user_ids):
+            repo.count_with_filters(**filters)
+            assert_no_full_scan(plan_engine, captured, allowed_scans=intended_scans(filters))
+            captured.clear()
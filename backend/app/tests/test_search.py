@@ -0,0 +1,86 @@
+"""
+Full-text search tests.
+"""
+from sqlalchemy.orm import Session
+
+from ..models.file import VoiceFile
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..services.search_service import SearchService
+from ..utils import search_index as search_index_module
+from ..utils.search_index import SearchIndex, highlight, match_expression, register_search_indexing, tokenize
+
+
+class TestTokenizer:
+    """Tokenizer and query builder tests."""
+
+    def test_han_text_is_indexed_as_bigrams(self):
+        """Test that Han runs become overlapping bigrams and words are lowercased."""
+        assert tokenize("退貨水餃，SKU A12 包") == "退貨 貨水 水餃 sku a12 包"
+
+    def test_query_terms_become_phrases(self):
+        """Test that every term is required and a single character matches as a prefix."""
+        assert match_expression("退貨 水餃") == '"退貨" AND "水餃"'
+        assert match_expression("冷凍水餃") == '"冷凍 凍水 水餃"'
+        assert match_expression("餃") == '"餃"*'
+        assert match_expression("  ，。 ") is None
+
+    def test_highlight_escapes_and_marks_matches(self):
+        """Test that snippets mark every match and escape the surrounding text."""
+        snippet = highlight("<b>客戶</b>要求退貨，水餃退冰", "退貨 水餃", length=80)
+        assert snippet == "&lt;b&gt;客戶&lt;/b&gt;要求<mark>退貨</mark>，<mark>水餃</mark>退冰"
+        assert highlight("沒有相關內容", "水餃", length=80) is None
+
+
+class TestSearchIndex:
+    """Index maintenance and ranking tests."""
+
+    def test_ranking_and_removal(self, tmp_path):
+        """Test that phrase matches are found, summary hits rank first and removed documents disappear."""
+        index = SearchIndex(str(tmp_path / "search.db"))
+        index.update([
+            ("a1", "f1", "客戶說水餃退冰了，想要退貨", None),
+            ("a2", "f2", "詢問包子的保存期限", "退貨 水餃"),
+            ("a3", "f3", "水的問題，貨也有問題", None),
+        ])
+
+        total, hits = index.search("退貨 水餃", limit=10)
+        assert total == 2
+        assert [analysis_id for analysis_id, _ in hits] == ["a2", "a1"]
+        assert index.search("貨水", limit=10)[0] == 0
+
+        index.update(removed_files=["f2"])
+        assert [analysis_id for analysis_id, _ in index.search("退貨", limit=10)[1]] == ["a1"]
+        assert index.count() == 2
+
+    def test_committed_writes_are_indexed(
+        self, db_session: Session, completed_file: VoiceFile, tmp_path, monkeypatch
+    ):
+        """Test that analyses are indexed on commit and searchable with highlights."""
+        index = SearchIndex(str(tmp_path / "search.db"))
+        monkeypatch.setattr(search_index_module, "search_index", index)
+        register_search_indexing()
+
+        analysis = VoiceAnalysis(
+            file_id=completed_file.id,
+            sentiment=SentimentType.NEGATIVE,
+            transcript="客戶反映冷凍水餃退冰，要求退貨",
+            feedback_summary="要求退貨"
+        )
+        db_session.add(analysis)
+        db_session.commit()
+
+        result = SearchService(db_session, index).search("退貨 水餃")
+        assert result.total == 1
+        hit = result.items[0]
+        assert hit.id == analysis.id
+        assert hit.filename == completed_file.original_filename
+        assert "<mark>水餃</mark>" in hit.highlights["transcript"]
+
+        analysis.transcript = "客戶詢問包子價格"
+        analysis.feedback_summary = None
+        db_session.commit()
+        assert SearchService(db_session, index).search("水餃").total == 0
+
+        db_session.delete(analysis)
+        db_session.commit()
+        assert index.count() == 0
@@ -0,0 +1,149 @@
+"""
+Similarity search tests.
+"""
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..ai.embedding import EmbeddingService, HashingEmbedder
+from ..models.file import VoiceFile
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..services.similarity_service import SimilarityService
+from ..utils import vector_index as vector_index_module
+from ..repositories.file import FileRepository
+from ..utils.vector_index import VectorIndex, register_vector_cleanup
+
+
+def unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestHashingEmbedder:
+    """Fallback embedder tests."""
+
+    def test_shared_wording_is_closer(self):
+        """Test that calls with shared wording score above unrelated ones."""
+        a, b, c = HashingEmbedder().encode(["冷凍水餃退冰要求退貨", "水餃退冰了想退貨", "詢問門市營業時間"])
+        assert abs(np.linalg.norm(a) - 1) < 1e-5
+        assert a @ b > a @ c
+
+
+class TestVectorIndex:
+    """Vector store and IVF index tests."""
+
+    def test_exact_search_replace_and_remove(self, tmp_path):
+        """Test neighbours before training, replacing a vector and removing one."""
+        index = VectorIndex(str(tmp_path))
+        index.add("test", [("a", unit([1, 0, 0])), ("b", unit([1, 0.2, 0])), ("c", unit([0, 1, 0]))])
+
+        assert [analysis_id for analysis_id, _ in index.similar("a")] == ["b", "c"]
+        assert index.similar("missing") is None
+
+        index.add("test", [("b", unit([0, 1, 0.1]))])
+        assert index.similar("c")[0][0] == "b"
+
+        assert index.remove(["c"]) == 1
+        assert [analysis_id for analysis_id, _ in index.similar("b")] == ["a"]
+        assert index.info()["vectors"] == 2
+
+    def test_trained_index_finds_neighbours(self, tmp_path, monkeypatch):
+        """Test that the IVF index returns the same top neighbours as an exact scan on clustered data."""
+        monkeypatch.setattr(vector_index_module, "MIN_TRAIN_VECTORS", 100)
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(20, 32))
+        vectors = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.1, size=(1000, 32))
+        index = VectorIndex(str(tmp_path))
+        index.add("test", [(f"v{i}", vector) for i, vector in enumerate(vectors)])
+
+        assert index.train(nlist=20) == 20
+        index.add("test", [("new", vectors[0])])
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        for i in (0, 500, 999):
+            exact = np.argsort(-(normalized @ normalized[i]))[1:6]
+            found = [analysis_id for analysis_id, _ in index.similar(f"v{i}", limit=6, nprobe=3)]
+            assert {f"v{j}" for j in exact} <= set(found)
+        assert index.similar("v0", limit=1)[0][0] == "new"
+
+    def test_other_workers_apply_removals_without_reloading(self, tmp_path):
+        """Test that a reader drops vectors removed or replaced by another process and still fills the limit."""
+        reader = VectorIndex(str(tmp_path))
+        writer = VectorIndex(str(tmp_path))
+        writer.add("test", [(f"v{i}", unit([1, i / 10, 0])) for i in range(6)])
+        assert len(reader.similar("v0", limit=3)) == 3
+        generation = reader._generation
+
+        writer.remove(["v1", "v2"])
+        writer.add("test", [("v3", unit([0, 0, 1]))])
+
+        assert [analysis_id for analysis_id, _ in reader.similar("v0", limit=2)] == ["v4", "v5"]
+        assert reader._generation == generation
+
+    def test_other_workers_follow_a_rebuild(self, tmp_path):
+        """Test that a reader stops using the old vectors file once the store is cleared and rebuilt."""
+        reader = VectorIndex(str(tmp_path))
+        writer = VectorIndex(str(tmp_path))
+        writer.add("test", [("a", unit([1, 0, 0])), ("b", unit([1, 0.1, 0])), ("c", unit([0, 1, 0]))])
+        assert reader.similar("a", limit=1)[0][0] == "b"
+
+        # Same number of rows as before
+        writer.clear()
+        writer.add("test", [("a", unit([1, 0, 0])), ("b", unit([0, 1, 0])), ("c", unit([1, 0.1, 0]))])
+
+        assert reader.similar("a", limit=1)[0][0] == "c"
+
+    def test_model_change_is_rejected(self, tmp_path):
+        """Test that vectors from another model cannot be mixed into the store."""
+        index = VectorIndex(str(tmp_path))
+        index.add("model-a", [("a", unit([1, 0]))])
+        try:
+            index.add("model-b", [("b", unit([0, 1]))])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+        index.clear()
+        index.add("model-b", [("b", unit([0, 1]))])
+        assert index.info()["model"] == "model-b"
+
+
+class TestSimilarityService:
+    """Similarity service tests."""
+
+    def test_similar_calls(self, db_session: Session, completed_file: VoiceFile, tmp_path):
+        """Test that analyses are embedded and returned most similar first, with list columns."""
+        texts = ["冷凍水餃退冰要求退貨", "水餃退冰了想要退貨", "詢問門市營業時間"]
+        analyses = [
+            VoiceAnalysis(file_id=completed_file.id, sentiment=SentimentType.NEUTRAL, transcript=text)
+            for text in texts
+        ]
+        db_session.add_all(analyses)
+        db_session.commit()
+
+        embedder = EmbeddingService()
+        embedder._embedder = HashingEmbedder()
+        service = SimilarityService(db_session, VectorIndex(str(tmp_path)), embedder)
+        assert service.backfill() == 3
+        assert service.backfill() == 0
+
+        similar = service.similar(analyses[0].id, limit=2)
+        assert [item.id for item in similar] == [analyses[1].id, analyses[2].id]
+        assert similar[0].similarity > similar[1].similarity
+        assert similar[0].filename == completed_file.original_filename
+
+    def test_deleted_files_lose_their_vectors(
+        self, db_session: Session, completed_file: VoiceFile, tmp_path, monkeypatch
+    ):
+        """Test that deleting a file removes its analyses' vectors on commit."""
+        index = VectorIndex(str(tmp_path))
+        monkeypatch.setattr(vector_index_module, "vector_index", index)
+        register_vector_cleanup()
+        analysis = VoiceAnalysis(file_id=completed_file.id, sentiment=SentimentType.NEUTRAL, transcript="水餃")
+        db_session.add(analysis)
+        db_session.commit()
+        analysis_id, file_id = analysis.id, completed_file.id
+        index.add("test", [(analysis_id, unit([1, 0])), ("other", unit([0, 1]))])
+
+        assert list(FileRepository(db_session).delete_files([file_id])) == [file_id]
+        assert index.missing([analysis_id, "other"]) == [analysis_id]
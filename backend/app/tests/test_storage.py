@@ -0,0 +1,197 @@
+"""
+Tests for background file deletion, the storage sweep and audio retention.
+"""
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..config import settings
+from ..models.analysis import VoiceAnalysis, SentimentType
+from ..models.file import VoiceFile, FileStatus, FileFormat
+from ..services import retention_service
+from ..services.retention_service import RetentionService
+from ..services.storage_service import FileDeletionQueue, StorageService
+from ..utils.cache import cache
+from ..utils import content_store
+from ..utils.content_store import content_path, store_file
+
+
+def write_file(path, age=0):
+    with open(path, "wb") as f:
+        f.write(b"audio")
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+    return str(path)
+
+
+def test_deletion_queue_drains_batches(tmp_path, monkeypatch):
+    paths = [write_file(tmp_path / f"{i}.wav", age=7200) for i in range(4)]
+    # The last file is stored content another record still points to
+    queue = FileDeletionQueue(str(tmp_path / "gc"), stale_seconds=600, references=lambda batch: {paths[3]})
+
+    os.makedirs(queue.directory)
+    # A batch claimed by a worker that died long ago is taken over
+    stale = os.path.join(queue.directory, f"{time.time_ns() - 3600 * 10**9:020d}-dead.json.1.claimed")
+    with open(stale, "w") as f:
+        f.write(f'["{paths[2]}"]')
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+
+    monkeypatch.setattr(queue, "start", lambda: None)  # drain explicitly below
+    assert queue.enqueue(paths[:2] + [paths[3], str(tmp_path / "gone.wav")]) == 4
+
+    assert queue.drain() == 3
+    assert not any(os.path.exists(path) for path in paths[:3])
+    assert os.path.exists(paths[3])
+    assert os.listdir(queue.directory) == []
+
+
+def test_deletion_queue_keeps_files_stored_again(tmp_path, monkeypatch):
+    path = write_file(tmp_path / "same.wav", age=7200)
+
+    def references(batch):
+        # An upload of the same content refreshes the file after references were checked
+        os.utime(path)
+        return set()
+
+    queue = FileDeletionQueue(str(tmp_path / "gc"), stale_seconds=600, references=references)
+    monkeypatch.setattr(queue, "start", lambda: None)
+    queue.enqueue([path])
+
+    assert queue.drain() == 0
+    assert sorted(os.listdir(tmp_path)) == ["gc", "same.wav"]  # put back, no tombstone left
+
+
+def test_store_file_recreates_a_file_removed_meanwhile(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    content_hash = hashlib.sha256(b"audio").hexdigest()
+    target = content_path(content_hash, ".wav")
+    os.makedirs(os.path.dirname(target))
+    write_file(target)
+    utime = os.utime
+
+    def removed_before_utime(path, *args, **kwargs):
+        # The deletion queue takes the file between the existence check and the touch
+        if path == target and os.path.exists(target):
+            os.remove(target)
+        return utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(content_store.os, "utime", removed_before_utime)
+    stored, created = store_file(write_file(tmp_path / "upload.wav"), content_hash)
+
+    assert (stored, created) == (target, True)
+    assert open(target, "rb").read() == b"audio"
+
+
+def record(db_session, user, path):
+    file_obj = VoiceFile(
+        id=str(uuid.uuid4()),
+        filename=os.path.basename(path),
+        original_filename="call.wav",
+        file_path=path,
+        file_size=5,
+        file_format=FileFormat.WAV,
+        status=FileStatus.COMPLETED,
+        uploaded_by=user.id
+    )
+    db_session.add(file_obj)
+    return file_obj
+
+
+def test_sweep_removes_orphans_and_reports_missing_files(db_session, test_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    record_file = lambda path: record(db_session, test_user, path)
+
+    kept = record_file(write_file(tmp_path / "kept.wav", age=7200))
+    missing = record_file(str(tmp_path / "missing.wav"))
+    db_session.commit()
+    orphan = write_file(tmp_path / "orphan.wav", age=7200)
+    recent = write_file(tmp_path / "recent.wav")  # record not inserted yet
+    write_file(tmp_path / ".gitkeep", age=7200)
+
+    service = StorageService(db_session)
+    report = service.sweep(dry_run=True)
+    assert report.orphaned_files == [os.path.abspath(orphan)]
+    assert report.missing_file_ids == [missing.id]
+    assert os.path.exists(orphan)
+
+    report = service.sweep(delete_missing=True)
+    assert report.deleted_records == 1
+    assert not os.path.exists(orphan)
+    assert os.path.exists(recent) and os.path.exists(kept.file_path)
+    assert db_session.query(VoiceFile).count() == 1
+
+
+def test_migration_merges_identical_files(db_session, test_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    first = record(db_session, test_user, write_file(tmp_path / f"{uuid.uuid4()}.wav"))
+    second = record(db_session, test_user, write_file(tmp_path / f"{uuid.uuid4()}.wav"))
+    missing = record(db_session, test_user, str(tmp_path / f"{uuid.uuid4()}.wav"))
+    db_session.commit()
+    legacy_paths = [first.file_path, second.file_path]
+    cache.set("file-list", legacy_paths, tags=[VoiceFile.__tablename__])
+
+    report = StorageService(db_session).migrate_to_content_store(batch_size=2)
+    assert cache.get("file-list") is None  # bulk path updates invalidate cached lists
+    assert (report.total_files, report.moved_files, report.deduplicated_files) == (3, 1, 1)
+    assert report.saved_bytes == 5
+    assert report.missing_file_ids == [missing.id]
+
+    db_session.expire_all()
+    stored = content_path(hashlib.sha256(b"audio").hexdigest(), ".wav")
+    assert first.file_path == second.file_path == stored
+    assert first.filename == os.path.basename(stored)
+    assert os.path.exists(stored)
+    assert not any(os.path.exists(path) for path in legacy_paths)
+
+    again = StorageService(db_session).migrate_to_content_store()
+    assert (again.total_files, again.moved_files) == (1, 0)
+
+
+def test_retention_transcodes_analyzed_recordings(db_session, test_user, tmp_path, monkeypatch):
+    sf = pytest.importorskip("soundfile")
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    queued = []
+    monkeypatch.setattr(retention_service.deletion_queue, "enqueue", queued.extend)
+
+    wav_path = str(tmp_path / "call.wav")
+    seconds = np.arange(16000 * 5) / 16000
+    sf.write(wav_path, 0.3 * np.sin(2 * np.pi * 220 * seconds), 16000, subtype="PCM_16")
+    wav_size = os.path.getsize(wav_path)
+
+    old = record(db_session, test_user, wav_path)
+    recent = record(db_session, test_user, write_file(tmp_path / "recent.wav"))
+    pending = record(db_session, test_user, wav_path)  # same content, being reprocessed
+    pending.status = FileStatus.ANALYZING
+    db_session.flush()
+    analyzed = datetime.utcnow() - timedelta(days=60)
+    db_session.add_all([
+        VoiceAnalysis(file_id=old.id, sentiment=SentimentType.NEUTRAL, transcript="", analysis_time=analyzed),
+        VoiceAnalysis(file_id=recent.id, sentiment=SentimentType.NEUTRAL, transcript="", analysis_time=datetime.utcnow()),
+    ])
+    db_session.commit()
+
+    service = RetentionService(db_session)
+    report = service.run(action="opus", older_than_days=30, dry_run=True)
+    assert (report.files, report.bytes_before, report.stored_files) == (1, wav_size, 0)
+
+    cache.set("file-list", [wav_path], tags=[VoiceFile.__tablename__])
+    report = service.run(action="opus", older_than_days=30, workers=1)
+    assert (report.files, report.stored_files, report.failed) == (1, 1, [])
+    assert cache.get("file-list") is None  # bulk path and size updates invalidate cached lists
+    assert report.bytes_after * 5 < report.bytes_before
+
+    db_session.expire_all()
+    assert old.file_path.endswith(".opus") and os.path.exists(old.file_path)
+    assert old.file_size == report.bytes_after == os.path.getsize(old.file_path)
+    assert pending.file_path == wav_path  # keeps the original until it is done
+    assert queued == [wav_path]
+    assert sf.info(old.file_path).duration == pytest.approx(5, abs=0.1)
+    assert not os.listdir(tmp_path / "incoming")
+
+    assert service.run(action="opus", older_than_days=30).files == 0
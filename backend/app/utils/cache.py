@@ -2,36 +2,395 @@
 Caching utilities for performance optimization.
 """
 import functools
+import heapq
+import os
+import sys
+import threading
 import time
 import json
 import hashlib
 import logging
-from typing import Any, Callable, Dict, Optional, Union
-from datetime import datetime, timedelta
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+from datetime import date, datetime, time as dt_time, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - falls back to hashlib
+    xxhash = None
+
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
 
-class MemoryCache:
-    """Simple in-memory cache implementation."""
+# Attributes holding ORM bookkeeping (instance state, and through it the session and engine)
+_SKIPPED_ATTRIBUTES = ("_sa_instance_state",)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a value in bytes.
+
+    Walks dicts, lists, tuples, sets and pydantic models recursively and
+    counts each object once, so shared references are not double counted.
+    Any other object (e.g. an ORM instance) gets a flat estimate: its own
+    size plus the shallow size of each attribute, without following them,
+    so a cached row is not charged for its session, identity map or engine.
+
+    Args:
+        value: Value to measure
+
+    Returns:
+        Approximate size in bytes
+    """
+    seen = set()
+    size = 0
+    stack = [value]
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, BaseModel):
+            stack.append(obj.__dict__)
+        else:
+            attributes = getattr(obj, "__dict__", None) or {}
+            for name, attribute in attributes.items():
+                if name not in _SKIPPED_ATTRIBUTES and id(attribute) not in seen:
+                    seen.add(id(attribute))
+                    size += sys.getsizeof(attribute)
+
+    return size
+
+
+class StaleWhileRevalidate(NamedTuple):
+    """Cached value stored together with the time it stops being fresh."""
+    value: Any
+    fresh_until: float
+
+
+class CacheBackend:
+    """
+    Interface shared by cache backends.
+
+    Backends store values with a TTL and optional tags, and keep a per-tag
+    invalidation counter so get_or_set can refuse to store a value computed
+    while one of its tags was invalidated.
+
+    get_or_set also coalesces concurrent misses on the same key within a
+    process (single-flight) and can serve stale values while a background
+    thread refreshes them.
+    """
+
+    # Whether data_version stamps are valid for every worker process serving requests
+    versioned = True
+
+    def __init__(self):
+        self._flights: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+        self._flights_lock = threading.Lock()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        raise NotImplementedError
+
+    def cleanup_expired(self) -> int:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def keys(self) -> list:
+        raise NotImplementedError
+
+    def entries(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Increment a statistics counter."""
+        raise NotImplementedError
+
+    def _tag_generation(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Current invalidation counters of the given tags."""
+        raise NotImplementedError
+
+    def _set_if_current(
+        self, key: str, value: Any, ttl: Optional[int], tags: Tuple[str, ...], generation: Tuple[int, ...]
+    ) -> None:
+        """Store the value only if none of its tags was invalidated since generation was read."""
+        raise NotImplementedError
+
+    def data_version(self, tags: Iterable[str]) -> Optional[str]:
+        """
+        Version stamp of the data behind the given tags.
+        
+        The stamp changes whenever any of the tags is invalidated, and
+        includes the backend's epoch so counters restarting from zero
+        (a new process, a recreated cache file) never repeat an old stamp.
+        It also changes every DATA_VERSION_MAX_AGE seconds, so a write the
+        invalidation listeners never saw (raw SQL, an external tool) is
+        picked up within that time.
+        
+        Args:
+            tags: Tags (table names) the data depends on
+            
+        Returns:
+            Version string, or None if the counters cannot be read
+        """
+        if not self.versioned:
+            return None
+        tags = tuple(sorted(set(tags)))
+        generation = self._tag_generation(tags)
+        if any(value < 0 for value in generation):
+            return None
+        period = int(time.time() // settings.DATA_VERSION_MAX_AGE)
+        return ".".join([self.epoch, str(period), *(str(value) for value in generation)])
+    
+    def _flight_lock(self, key: str) -> threading.Lock:
+        """Lock shared by all callers computing the same key; dropped once unused."""
+        with self._flights_lock:
+            lock = self._flights.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._flights[key] = lock
+            return lock
+
+    def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int],
+        tags: Tuple[str, ...],
+        stale_ttl: int
+    ) -> Any:
+        generation = self._tag_generation(tags)
+        value = compute()
+        if stale_ttl:
+            fresh_ttl = self.default_ttl if ttl is None else ttl
+            entry = StaleWhileRevalidate(value, time.time() + fresh_ttl)
+            self._set_if_current(key, entry, fresh_ttl + stale_ttl, tags, generation)
+        else:
+            self._set_if_current(key, value, ttl, tags, generation)
+        return value
+
+    def _refresh(self, key: str, lock: threading.Lock, compute: Callable[[], Any], ttl, tags, stale_ttl) -> None:
+        try:
+            self._compute_and_store(key, compute, ttl, tags, stale_ttl)
+            self._count("refreshes")
+        except Exception as e:
+            logger.error(f"Background cache refresh failed for {key}: {e}")
+        finally:
+            lock.release()
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Any], ttl, tags, stale_ttl) -> None:
+        """Start a refresh unless one for this key is already running."""
+        lock = self._flight_lock(key)
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            with self._flights_lock:
+                if self._refresh_executor is None:
+                    self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+            self._refresh_executor.submit(self._refresh, key, lock, compute, ttl, tags, stale_ttl)
+        except Exception:
+            lock.release()
+            raise
+
+    @staticmethod
+    def _unwrap(cached: Any, stale_ttl: int) -> Tuple[Any, bool]:
+        """Return (value, is_fresh) for a stored value."""
+        if stale_ttl and isinstance(cached, StaleWhileRevalidate):
+            return cached.value, cached.fresh_until > time.time()
+        return cached, True
+
+    def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        stale_ttl: int = 0,
+        refresh: Optional[Callable[[], Any]] = None
+    ) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        
+        Concurrent misses on the same key wait for a single computation.
+        With stale_ttl, a value older than ttl is still returned for up to
+        stale_ttl more seconds while one background thread recomputes it
+        with refresh, which runs after the request and so must not depend
+        on request-scoped resources such as the request's database session.
+        
+        Args:
+            key: Cache key
+            compute: Callable producing the value on a miss
+            ttl: Time-to-live in seconds (uses default if None)
+            tags: Tags attached to a newly stored entry
+            stale_ttl: Seconds a value may be served stale after ttl
+            refresh: Callable producing the value in the background (default compute)
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        tags = tuple(tags or ())
+        cached = self.get(key)
+        if cached is not None:
+            value, fresh = self._unwrap(cached, stale_ttl)
+            if not fresh:
+                self._count("stale_hits")
+                self._refresh_in_background(key, refresh or compute, ttl, tags, stale_ttl)
+            return value
+
+        with self._flight_lock(key):
+            # Another caller may have stored the value while this one waited
+            cached = self.get(key)
+            if cached is not None:
+                self._count("coalesced")
+                return self._unwrap(cached, stale_ttl)[0]
+            return self._compute_and_store(key, compute, ttl, tags, stale_ttl)
+
+
+class _CacheEntry:
+    """Single cache entry."""
+
+    __slots__ = ("value", "expires_at", "created_at", "size", "tags")
+
+    def __init__(self, value: Any, expires_at: float, created_at: float, size: int, tags: Tuple[str, ...] = ()):
+        self.value = value
+        self.expires_at = expires_at
+        self.created_at = created_at
+        self.size = size
+        self.tags = tags
+
+
+class MemoryCache(CacheBackend):
+    """
+    Bounded in-memory LRU cache with per-entry TTL.
+
+    Entries are kept in access order, so the least recently used entry is
+    evicted in O(1) once max_entries or max_bytes is exceeded. Expiry times
+    sit in a min-heap, letting cleanup pop only the entries that are due.
+    All operations are guarded by a lock because the cache is shared between
+    request handlers and background task threads.
+
+    Entries can carry tags (for example the tables a result was computed
+    from); invalidate_tags drops every entry with a given tag without
+    scanning the whole key space.
+    """
     
-    def __init__(self, default_ttl: int = 3600):
+    def __init__(
+        self,
+        default_ttl: int = 3600,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        versioned: bool = True
+    ):
         """
         Initialize memory cache.
         
         Args:
             default_ttl: Default time-to-live in seconds
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum estimated size of all cached values in bytes
+            versioned: Provide data versions; only valid when this is the only process serving requests
         """
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        super().__init__()
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._expiry: List[Tuple[float, str]] = []
+        self._tags: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        # Generations live in this process only, so version stamps are per process
+        self.epoch = os.urandom(6).hex()
+        self.versioned = versioned
+        self._lock = threading.RLock()
+        self._bytes = 0
         self.default_ttl = default_ttl
-        self.stats = {
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = self._empty_stats()
+    
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {
             "hits": 0,
             "misses": 0,
             "sets": 0,
             "deletes": 0,
-            "expires": 0
+            "expires": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "coalesced": 0,
+            "stale_hits": 0,
+            "refreshes": 0
         }
     
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+    
+    def _remove(self, key: str) -> _CacheEntry:
+        """Remove an entry and release its size. Caller holds the lock."""
+        entry = self._cache.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return entry
+    
+    def _pop_expired(self, now: float) -> int:
+        """Remove entries whose expiry is due. Caller holds the lock."""
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self._cache.get(key)
+            # Heap items are not removed on overwrite/delete, so skip stale ones
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                removed += 1
+        self.stats["expires"] += removed
+        return removed
+    
+    def _compact_expiry(self) -> None:
+        """Rebuild the expiry heap when stale items dominate. Caller holds the lock."""
+        if len(self._expiry) > 2 * len(self._cache) + 64:
+            self._expiry = [(entry.expires_at, key) for key, entry in self._cache.items()]
+            heapq.heapify(self._expiry)
+    
     def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache.
@@ -42,40 +401,93 @@ class MemoryCache:
         Returns:
             Cached value or None if not found/expired
         """
-        if key not in self._cache:
-            self.stats["misses"] += 1
-            return None
-        
-        cache_entry = self._cache[key]
-        
-        # Check if expired
-        if cache_entry["expires_at"] < time.time():
-            del self._cache[key]
-            self.stats["expires"] += 1
-            self.stats["misses"] += 1
-            return None
-        
-        self.stats["hits"] += 1
-        return cache_entry["value"]
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            
+            # Check if expired
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                self.stats["expires"] += 1
+                self.stats["misses"] += 1
+                return None
+            
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry.value
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None) -> None:
         """
         Set value in cache.
         
+        Values larger than the whole byte budget are not cached.
+        
         Args:
             key: Cache key
             value: Value to cache
             ttl: Time-to-live in seconds (uses default if None)
+            tags: Tags used to invalidate the entry together with related ones
         """
         if ttl is None:
             ttl = self.default_ttl
         
-        self._cache[key] = {
-            "value": value,
-            "expires_at": time.time() + ttl,
-            "created_at": time.time()
-        }
-        self.stats["sets"] += 1
+        size = estimate_size(value) + sys.getsizeof(key)
+        now = time.time()
+        
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            
+            if size > self.max_bytes:
+                logger.debug(f"Not caching {key}: {size} bytes exceeds the cache budget")
+                return
+            
+            entry = _CacheEntry(value, now + ttl, now, size, tuple(set(tags or ())))
+            self._cache[key] = entry
+            self._bytes += size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            heapq.heappush(self._expiry, (entry.expires_at, key))
+            self.stats["sets"] += 1
+            
+            self._pop_expired(now)
+            while len(self._cache) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._cache)))
+                self.stats["evictions"] += 1
+            self._compact_expiry()
+    
+    def _tag_generation(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+    
+    def _set_if_current(
+        self, key: str, value: Any, ttl: Optional[int], tags: Tuple[str, ...], generation: Tuple[int, ...]
+    ) -> None:
+        with self._lock:
+            if self._tag_generation(tags) == generation:
+                self.set(key, value, ttl, tags)
+    
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Delete every entry carrying any of the given tags.
+        
+        Args:
+            tags: Tags to invalidate
+            
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in keys:
+                self._remove(key)
+            self.stats["invalidations"] += len(keys)
+            return len(keys)
     
     def delete(self, key: str) -> bool:
         """
@@ -87,22 +499,21 @@ class MemoryCache:
         Returns:
             True if key existed, False otherwise
         """
-        if key in self._cache:
-            del self._cache[key]
-            self.stats["deletes"] += 1
-            return True
-        return False
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+                self.stats["deletes"] += 1
+                return True
+            return False
     
     def clear(self) -> None:
         """Clear all cache entries."""
-        self._cache.clear()
-        self.stats = {
-            "hits": 0,
-            "misses": 0,
-            "sets": 0,
-            "deletes": 0,
-            "expires": 0
-        }
+        with self._lock:
+            self._cache.clear()
+            self._expiry.clear()
+            self._tags.clear()
+            self._bytes = 0
+            self.stats = self._empty_stats()
     
     def cleanup_expired(self) -> int:
         """
@@ -111,47 +522,139 @@ class MemoryCache:
         Returns:
             Number of expired entries removed
         """
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if entry["expires_at"] < current_time
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
-        self.stats["expires"] += len(expired_keys)
-        return len(expired_keys)
+        with self._lock:
+            removed = self._pop_expired(time.time())
+            self._compact_expiry()
+            return removed
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        total_requests = self.stats["hits"] + self.stats["misses"]
-        hit_rate = (self.stats["hits"] / total_requests * 100) if total_requests > 0 else 0
-        
-        return {
-            **self.stats,
-            "hit_rate": round(hit_rate, 2),
-            "size": len(self._cache),
-            "total_requests": total_requests
-        }
+        with self._lock:
+            total_requests = self.stats["hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] / total_requests * 100) if total_requests > 0 else 0
+            
+            return {
+                **self.stats,
+                "hit_rate": round(hit_rate, 2),
+                "size": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "total_requests": total_requests,
+                "backend": "memory"
+            }
     
     def keys(self) -> list:
         """Get all cache keys."""
-        return list(self._cache.keys())
+        with self._lock:
+            return list(self._cache.keys())
+    
+    def entries(self) -> List[Dict[str, Any]]:
+        """Get a snapshot of entry metadata, least recently used first."""
+        with self._lock:
+            return [
+                {
+                    "key": key,
+                    "size": entry.size,
+                    "created_at": entry.created_at,
+                    "expires_at": entry.expires_at,
+                    "tags": list(entry.tags)
+                }
+                for key, entry in self._cache.items()
+            ]
     
     def exists(self, key: str) -> bool:
         """Check if key exists and is not expired."""
-        return self.get(key) is not None
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and entry.expires_at > time.time()
+
+
+def create_cache() -> CacheBackend:
+    """
+    Create the cache backend selected by settings.CACHE_BACKEND.
+    
+    "sqlite" shares one store between all worker processes; "memory" keeps a
+    private cache per process. Falls back to memory if the shared store
+    cannot be opened. A private cache does not see writes handled by other
+    workers, so with several workers it provides no data versions (no
+    ETags, no reuse of export jobs).
+    
+    Returns:
+        CacheBackend instance
+    """
+    if settings.CACHE_BACKEND == "sqlite":
+        from .sqlite_cache import SQLiteCache
+        try:
+            return SQLiteCache(
+                settings.CACHE_SQLITE_PATH,
+                default_ttl=3600,
+                max_entries=settings.CACHE_MAX_ENTRIES,
+                max_bytes=settings.CACHE_MAX_BYTES
+            )
+        except Exception as e:
+            logger.error(f"Failed to open shared cache at {settings.CACHE_SQLITE_PATH}, using memory cache: {e}")
+    elif settings.CACHE_BACKEND != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}, using memory cache")
+    
+    return MemoryCache(
+        default_ttl=3600,  # 1 hour default TTL
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_bytes=settings.CACHE_MAX_BYTES,
+        versioned=settings.RELOAD or settings.WORKERS <= 1
+    )
 
 
 # Global cache instance
-cache = MemoryCache(default_ttl=3600)  # 1 hour default TTL
+cache = create_cache()
+
+
+def _is_infrastructure(value: Any) -> bool:
+    """Whether an argument is a per-request resource that does not affect the result."""
+    return isinstance(value, (Session, Request))
+
+
+def _canonical(value: Any) -> Any:
+    """
+    Reduce an argument to a JSON-serializable form that is equal for equal queries.
+
+    Lists, tuples and sets are filter values here, so their order and
+    duplicates are ignored. Objects holding a database session (repositories)
+    are identified by their class only.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = {json.dumps(_canonical(item), sort_keys=True, ensure_ascii=False) for item in value}
+        return sorted(items)
+    if hasattr(value, "__table__"):  # Database models
+        return f"{type(value).__name__}:{getattr(value, 'id', None)}"
+    if isinstance(getattr(value, "db", None), Session):  # Repositories
+        return type(value).__name__
+    if hasattr(value, "model_dump"):  # Pydantic models
+        return _canonical(value.model_dump())
+    return str(value)
+
+
+def _hash_key(key_string: str) -> str:
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(key_string.encode())
+    return hashlib.blake2b(key_string.encode(), digest_size=16).hexdigest()
 
 
 def cache_key(*args, **kwargs) -> str:
     """
     Generate cache key from function arguments.
     
+    Database sessions and requests are skipped, and filter values are
+    canonicalized, so equal calls from different requests share a key.
+    
     Args:
         *args: Function positional arguments
         **kwargs: Function keyword arguments
@@ -159,35 +662,26 @@ def cache_key(*args, **kwargs) -> str:
     Returns:
         Cache key string
     """
-    # Create a string representation of arguments
-    key_parts = []
-    
-    # Add positional arguments
-    for arg in args:
-        if hasattr(arg, 'id'):  # Database models
-            key_parts.append(f"{type(arg).__name__}:{arg.id}")
-        else:
-            key_parts.append(str(arg))
-    
-    # Add keyword arguments
-    for k, v in sorted(kwargs.items()):
-        if hasattr(v, 'id'):  # Database models
-            key_parts.append(f"{k}={type(v).__name__}:{v.id}")
-        else:
-            key_parts.append(f"{k}={v}")
-    
-    # Create hash of the key parts
-    key_string = "|".join(key_parts)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    key_parts = [
+        [_canonical(arg) for arg in args if not _is_infrastructure(arg)],
+        {k: _canonical(v) for k, v in kwargs.items() if not _is_infrastructure(v)}
+    ]
+    key_string = json.dumps(key_parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return _hash_key(key_string)
 
 
-def cached(ttl: int = 3600, key_prefix: str = ""):
+def cached(ttl: int = 3600, key_prefix: str = "", tags: Optional[Iterable[str]] = None, stale_ttl: int = 0):
     """
     Decorator for caching function results.
     
+    Concurrent calls with the same arguments share one execution.
+    
     Args:
         ttl: Cache time-to-live in seconds
         key_prefix: Optional prefix for cache keys
+        tags: Tags attached to cached results for invalidation
+        stale_ttl: Seconds a result may be served stale while it is refreshed
+            in the background (only for functions that open their own resources)
         
     Returns:
         Decorated function
@@ -196,21 +690,14 @@ def cached(ttl: int = 3600, key_prefix: str = ""):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key
-            func_name = f"{func.__module__}.{func.__name__}"
+            func_name = f"{func.__module__}.{func.__qualname__}"
             key = f"{key_prefix}{func_name}:{cache_key(*args, **kwargs)}"
             
-            # Try to get from cache
-            cached_result = cache.get(key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for {func_name}")
-                return cached_result
-            
-            # Execute function and cache result
-            logger.debug(f"Cache miss for {func_name}, executing function")
-            result = func(*args, **kwargs)
-            cache.set(key, result, ttl)
+            def compute():
+                logger.debug(f"Cache miss for {func_name}, executing function")
+                return func(*args, **kwargs)
             
-            return result
+            return cache.get_or_set(key, compute, ttl, tags, stale_ttl)
         
         # Add cache management methods to the wrapper
         wrapper.cache_clear = lambda: cache.clear()
@@ -282,61 +769,76 @@ class CacheManager:
         
         return count
     
+    @staticmethod
+    def invalidate_tags(tags: Iterable[str]) -> int:
+        """
+        Invalidate cache entries carrying any of the given tags.
+        
+        Args:
+            tags: Tags to invalidate (table names for query results)
+            
+        Returns:
+            Number of entries invalidated
+        """
+        tags = list(tags)
+        count = cache.invalidate_tags(tags)
+        if count > 0:
+            logger.debug(f"Invalidated {count} cache entries tagged {tags}")
+        return count
+    
     @staticmethod
     def get_cache_info() -> Dict[str, Any]:
         """Get detailed cache information."""
         stats = cache.get_stats()
+        now = time.time()
         
-        # Calculate memory usage estimation
-        memory_usage = 0
-        entry_details = []
-        
-        for key in cache.keys():
-            entry = cache._cache[key]
-            entry_size = len(str(entry["value"]))  # Rough estimate
-            memory_usage += entry_size
-            
-            entry_details.append({
-                "key": key,
-                "size_estimate": entry_size,
+        entry_details = [
+            {
+                "key": entry["key"],
+                "size_estimate": entry["size"],
                 "created_at": datetime.fromtimestamp(entry["created_at"]).isoformat(),
                 "expires_at": datetime.fromtimestamp(entry["expires_at"]).isoformat(),
-                "ttl_remaining": max(0, entry["expires_at"] - time.time())
-            })
+                "ttl_remaining": max(0, entry["expires_at"] - now),
+                "tags": entry["tags"]
+            }
+            for entry in cache.entries()
+        ]
         
         return {
             "stats": stats,
-            "memory_usage_estimate": memory_usage,
+            "memory_usage_estimate": stats["bytes"],
             "entries": entry_details
         }
 
 
 # Specialized cache decorators for common use cases
 
-def cache_database_query(ttl: int = 1800):
+def cache_database_query(ttl: int = 1800, tags: Optional[Iterable[str]] = None):
     """
     Cache decorator for database queries (30 minutes default).
     
     Args:
         ttl: Cache time-to-live in seconds
+        tags: Tables the result depends on, for write invalidation
         
     Returns:
         Decorated function
     """
-    return cached(ttl=ttl, key_prefix="db:")
+    return cached(ttl=ttl, key_prefix="db:", tags=tags)
 
 
-def cache_api_response(ttl: int = 300):
+def cache_api_response(ttl: int = 300, tags: Optional[Iterable[str]] = None):
     """
     Cache decorator for API responses (5 minutes default).
     
     Args:
         ttl: Cache time-to-live in seconds
+        tags: Tables the result depends on, for write invalidation
         
     Returns:
         Decorated function
     """
-    return cached(ttl=ttl, key_prefix="api:")
+    return cached(ttl=ttl, key_prefix="api:", tags=tags)
 
 
 def cache_computation(ttl: int = 3600):
@@ -368,14 +870,12 @@ def cache_file_operation(ttl: int = 600):
 # Background task for cache maintenance
 def setup_cache_maintenance():
     """Setup background cache maintenance."""
-    import threading
-    import time
-    
     def cleanup_task():
         while True:
             try:
+                # Only entries that are due are popped from the expiry heap, so this is cheap
                 cache.cleanup_expired()
-                time.sleep(300)  # Run every 5 minutes
+                time.sleep(60)  # Run every minute
             except Exception as e:
                 logger.error(f"Cache cleanup error: {e}")
                 time.sleep(60)  # Wait 1 minute before retry
@@ -0,0 +1,116 @@
+"""
+Write-driven cache invalidation.
+
+Cached query results are tagged with the names of the tables they read.
+Session event listeners record which tables a transaction wrote to and
+invalidate those tags once the transaction commits, so cached dashboards and
+label lists stay fresh without polling or pattern scans.
+"""
+import functools
+import logging
+from typing import Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the tables written in the current transaction
+PENDING_TAGS_KEY = "cache_invalidation_tags"
+
+
+@functools.lru_cache(maxsize=None)
+def _cascade_targets(table_name: str) -> frozenset:
+    """Tables whose rows are removed by ON DELETE CASCADE when rows of table_name are deleted."""
+    from ..database import Base
+
+    targets = set()
+    pending = [table_name]
+    while pending:
+        parent = pending.pop()
+        for table in Base.metadata.tables.values():
+            for fk in table.foreign_keys:
+                if (fk.ondelete or "").upper() == "CASCADE" and fk.column.table.name == parent \
+                        and table.name not in targets:
+                    targets.add(table.name)
+                    pending.append(table.name)
+    return frozenset(targets)
+
+
+def _pending_tags(session: Session) -> Set[str]:
+    return session.info.setdefault(PENDING_TAGS_KEY, set())
+
+
+def _table_name(obj) -> Optional[str]:
+    table = getattr(obj, "__table__", None)
+    return table.name if table is not None else None
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Record tables touched by the flush (session state is still pre-flush here)."""
+    tags = _pending_tags(session)
+
+    for obj in session.new:
+        tags.add(_table_name(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tags.add(_table_name(obj))
+    for obj in session.deleted:
+        name = _table_name(obj)
+        tags.add(name)
+        if name:
+            tags.update(_cascade_targets(name))
+
+    tags.discard(None)
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    """Record tables written by bulk INSERT/UPDATE/DELETE statements."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if not name:
+        return
+
+    tags = _pending_tags(orm_execute_state.session)
+    tags.add(name)
+    if orm_execute_state.is_delete:
+        tags.update(_cascade_targets(name))
+
+
+def _after_commit(session: Session) -> None:
+    """Invalidate cache entries tagged with tables written by the committed transaction."""
+    tags = session.info.pop(PENDING_TAGS_KEY, None)
+    if tags:
+        count = cache.invalidate_tags(tags)
+        logger.debug(f"Invalidated {count} cache entries after write to {sorted(tags)}")
+
+
+def _after_rollback(session: Session) -> None:
+    """Discard recorded tables; nothing was written."""
+    session.info.pop(PENDING_TAGS_KEY, None)
+
+
+def register_cache_invalidation(session_class=Session) -> None:
+    """
+    Attach the invalidation listeners to a Session class.
+
+    Safe to call more than once.
+
+    Args:
+        session_class: Session class (or sessionmaker) to listen on
+    """
+    listeners = (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    )
+    for name, listener in listeners:
+        if not event.contains(session_class, name, listener):
+            event.listen(session_class, name, listener)
+
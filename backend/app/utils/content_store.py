@@ -0,0 +1,129 @@
+"""
+Content-addressed storage for uploaded files.
+
+A file is stored once per content under UPLOAD_DIR/ab/cd/<sha256><ext>,
+where ab and cd are the first two byte pairs of its SHA-256. Two levels of
+256 shards keep every directory small (a few dozen files per directory at
+millions of files), and identical uploads share one file. Several
+VoiceFile rows can point to the same file; the rows pointing to a path are
+its references, and the file is only removed once none is left (see
+FileDeletionQueue). New uploads are written to UPLOAD_DIR/incoming first,
+since their hash is only known once the whole file was read.
+"""
+import os
+import re
+import shutil
+from typing import Optional, Tuple
+
+from ..config import settings
+
+STAGING_DIR_NAME = "incoming"
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+_CONTENT_NAME = re.compile(r"^[0-9a-f]{64}(\.\w+)?$")
+
+
+def staging_dir() -> str:
+    """Directory where uploads are written before they are hashed."""
+    return os.path.join(settings.UPLOAD_DIR, STAGING_DIR_NAME)
+
+
+def content_path(content_hash: str, extension: str, root: Optional[str] = None) -> str:
+    """
+    Path of the stored file for a content hash.
+
+    Args:
+        content_hash: SHA-256 hex of the content
+        extension: File extension including the dot (kept so decoders can tell the format)
+        root: Storage root (default UPLOAD_DIR)
+    """
+    content_hash = content_hash.lower()
+    shards = [content_hash[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return os.path.join(root or settings.UPLOAD_DIR, *shards, f"{content_hash}{extension.lower()}")
+
+
+def stored_content_hash(path: str) -> Optional[str]:
+    """Content hash in a stored file's name, or None for other names."""
+    name = os.path.basename(path)
+    return name[:64] if _CONTENT_NAME.match(name) else None
+
+
+def is_content_path(path: str, root: Optional[str] = None) -> bool:
+    """Whether a path already follows the content-addressed layout."""
+    content_hash = stored_content_hash(path)
+    if not content_hash:
+        return False
+    expected = content_path(content_hash, os.path.splitext(path)[1], root)
+    return os.path.abspath(path) == os.path.abspath(expected)
+
+
+def store_file(
+    source_path: str,
+    content_hash: str,
+    keep_source: bool = False,
+    link: bool = True,
+    root: Optional[str] = None
+) -> Tuple[str, bool]:
+    """
+    Put a file into the content store.
+
+    When the content is already stored, the source is dropped (or kept) and
+    the stored file's mtime is refreshed, which tells a pending removal that
+    the file gained a reference since it was queued.
+
+    Args:
+        source_path: File to store; moved unless keep_source
+        content_hash: SHA-256 hex of the file
+        keep_source: Keep the source file instead of moving it
+        link: With keep_source, hard-link the file when possible instead of copying it
+        root: Storage root (default UPLOAD_DIR; e.g. the cold storage directory)
+
+    Returns:
+        Tuple[str, bool]: Stored path, and whether it was created by this call
+    """
+    target = content_path(content_hash, os.path.splitext(source_path)[1], root)
+    if os.path.abspath(source_path) == os.path.abspath(target):
+        return target, False
+
+    if os.path.exists(target):
+        try:
+            os.utime(target)
+        except FileNotFoundError:
+            pass  # removed by the deletion queue meanwhile; stored anew below
+        else:
+            if not keep_source:
+                os.remove(source_path)
+            return target, False
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if not keep_source:
+        try:
+            os.replace(source_path, target)
+            return target, True
+        except OSError:
+            if not os.path.exists(source_path):
+                raise
+            # Another file system: copy below, then drop the source
+            link = False
+
+    if link:
+        try:
+            os.link(source_path, target)
+            return target, True
+        except FileExistsError:
+            try:
+                os.utime(target)
+                return target, False
+            except FileNotFoundError:
+                pass  # removed meanwhile; copied below
+        except OSError:
+            pass  # different file system or no hard links
+
+    # Copy, then move into place atomically
+    temp_path = f"{target}.{os.getpid()}.part"
+    shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, target)
+    if not keep_source:
+        os.remove(source_path)
+    return target, True
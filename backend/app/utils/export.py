@@ -0,0 +1,205 @@
+"""
+Streaming CSV and XLSX writers.
+
+Both writers take a header row and an iterable of rows and yield the file as
+byte chunks while rows are still being read, so an export of any size is
+produced in constant memory.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Sequence
+from xml.sax.saxutils import escape
+
+# Rows written between yielded chunks
+CHUNK_ROWS = 500
+
+# Excel limits: rows per sheet (including the header) and characters per cell
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_CELL_LENGTH = 32767
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Characters not allowed in XML 1.0 documents
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def write_csv(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    Yield a UTF-8 CSV file in chunks.
+
+    A byte order mark is written first so Excel detects the encoding of
+    Chinese text.
+
+    Args:
+        headers: Column titles
+        rows: Row values
+
+    Yields:
+        bytes: Consecutive pieces of the file
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_cell_text(value) for value in row])
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that collects what zipfile writes until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _xlsx_row(values: Sequence[Any]) -> str:
+    cells = []
+    for value in values:
+        text = _ILLEGAL_XML_CHARS.sub("", _cell_text(value))[:XLSX_MAX_CELL_LENGTH]
+        cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = "</sheetData></worksheet>"
+
+
+def _workbook_parts(sheet_count: int) -> List[tuple]:
+    """Package parts describing a workbook with sheet_count worksheets."""
+    sheet_ids = range(1, sheet_count + 1)
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in sheet_ids
+        )
+        + "</Types>"
+    )
+    root_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + "".join(f'<sheet name="Sheet{i}" sheetId="{i}" r:id="rId{i}"/>' for i in sheet_ids)
+        + "</sheets></workbook>"
+    )
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in sheet_ids
+        )
+        + "</Relationships>"
+    )
+    return [
+        ("[Content_Types].xml", content_types),
+        ("_rels/.rels", root_rels),
+        ("xl/workbook.xml", workbook),
+        ("xl/_rels/workbook.xml.rels", workbook_rels),
+    ]
+
+
+def write_xlsx(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    Yield an XLSX workbook in chunks.
+
+    Worksheets are written straight into a deflated zip stream with inline
+    strings, so no part of the workbook is held in memory. Rows beyond
+    Excel's per-sheet limit continue on further sheets, each repeating the
+    header row; the workbook index is written last, once the sheet count
+    is known.
+
+    Args:
+        headers: Column titles
+        rows: Row values
+
+    Yields:
+        bytes: Consecutive pieces of the file
+    """
+    sink = _ChunkSink()
+    header_xml = _xlsx_row(headers)
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        sheet_count = 0
+        sheet = None
+        sheet_rows = XLSX_MAX_ROWS
+
+        try:
+            for row in rows:
+                if sheet_rows >= XLSX_MAX_ROWS:
+                    if sheet is not None:
+                        sheet.write(_SHEET_END.encode("utf-8"))
+                        sheet.close()
+                    sheet_count += 1
+                    sheet = archive.open(f"xl/worksheets/sheet{sheet_count}.xml", "w", force_zip64=True)
+                    sheet.write((_SHEET_START + header_xml).encode("utf-8"))
+                    sheet_rows = 1
+
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                sheet_rows += 1
+                if sheet_rows % CHUNK_ROWS == 0:
+                    yield sink.drain()
+
+            if sheet is None:
+                # No rows: a single sheet with the header only
+                sheet_count = 1
+                sheet = archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+                sheet.write((_SHEET_START + header_xml).encode("utf-8"))
+            sheet.write(_SHEET_END.encode("utf-8"))
+        finally:
+            if sheet is not None:
+                sheet.close()
+
+        for name, content in _workbook_parts(sheet_count):
+            archive.writestr(name, content)
+
+    yield sink.drain()
@@ -1,11 +1,122 @@
 """
 File handling utilities.
 """
+import contextlib
 import os
 import shutil
 import uuid
-from typing import Optional, Tuple
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from starlette.responses import JSONResponse
+
 from ..config import settings
+from .fingerprint import content_hasher
+
+# Bytes read from an upload per write
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Suffix of uploads still being written; renamed away once complete
+PARTIAL_SUFFIX = ".part"
+
+# Multipart boundaries and headers sent along with a single file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload passes the size limit while it is being written."""
+
+
+async def read_chunks(source, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Chunks of an object with an async read(size) method (e.g. an UploadFile)."""
+    while chunk := await source.read(chunk_size):
+        yield chunk
+
+
+async def write_stream(chunks: AsyncIterable[bytes], file_path: str, max_size: int) -> Tuple[int, str]:
+    """
+    Stream chunks to disk without blocking the event loop.
+    
+    Chunks are written to a temporary file next to file_path, hashed in the
+    same pass, and the file is renamed into place only once complete, so a
+    half-written file is never visible under its final name. Writing stops
+    as soon as the limit is passed.
+    
+    Args:
+        chunks: Async iterable of bytes (e.g. read_chunks(upload) or request.stream())
+        file_path: Final file path
+        max_size: Maximum size in bytes
+        
+    Returns:
+        Tuple[int, str]: File size and SHA-256 hex digest of the content
+        
+    Raises:
+        UploadTooLargeError: The stream is larger than max_size (nothing is kept)
+    """
+    temp_path = f"{file_path}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}"
+    hasher = content_hasher()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"File too large. Maximum size: {max_size} bytes")
+                hasher.update(chunk)
+                await out.write(chunk)
+        await aiofiles.os.replace(temp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            await aiofiles.os.remove(temp_path)
+        raise
+    return size, hasher.hexdigest()
+
+
+async def write_upload(source, file_path: str, max_size: int) -> Tuple[int, str]:
+    """
+    Stream an upload to disk; see write_stream.
+    
+    Args:
+        source: Object with an async read(size) method (e.g. an UploadFile)
+        file_path: Final file path
+        max_size: Maximum size in bytes
+        
+    Returns:
+        Tuple[int, str]: File size and SHA-256 hex digest of the content
+    """
+    return await write_stream(read_chunks(source), file_path, max_size)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Refuse single-file uploads whose declared Content-Length is over the limit.
+    
+    Multipart bodies are spooled to a temporary file before the endpoint
+    runs, so without this a huge upload is received in full before
+    write_stream can refuse it. Requests without a Content-Length are left
+    to write_stream.
+    """
+    
+    def __init__(self, app, paths: Tuple[str, ...], max_size: int):
+        self.app = app
+        self.paths = paths
+        self.max_body_size = max_size + MULTIPART_OVERHEAD
+        self.max_size = max_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in self.paths:
+            headers = dict(scope["headers"])
+            content_length = headers.get(b"content-length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+                response = JSONResponse(
+                    status_code=400,
+                    content={"detail": f"File too large. Maximum size: {self.max_size} bytes"},
+                    headers={"Connection": "close"}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
 
 
 class FileHandler:
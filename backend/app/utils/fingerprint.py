@@ -0,0 +1,149 @@
+"""
+Content hashes and acoustic fingerprints for duplicate upload detection.
+
+The content hash (SHA-256 of the uploaded bytes) finds exact re-uploads and
+is computed while the upload is copied to disk. The acoustic fingerprint
+finds the same recording re-encoded, converted or re-gained: the whole
+recording's band energies, reduced to a fixed 16 x 128 time-frequency grid
+with each band's mean removed, are projected onto 64 random hyperplanes.
+Recordings that sound the same get fingerprints a few bits apart; unrelated
+calls differ in about half the bits. Each fingerprint is also split into
+four 16-bit bands stored in indexed columns, so candidates are found by
+equality lookups (any recording within 3 bits shares at least one band).
+"""
+import functools
+import hashlib
+import logging
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+N_FFT = 1024
+HOP_LENGTH = 512
+N_BANDS = 16
+N_SEGMENTS = 128
+FMIN, FMAX = 200, 3600
+
+HASH_BITS = 64
+BAND_BITS = 16
+BAND_COUNT = HASH_BITS // BAND_BITS
+
+# Fixed so fingerprints stay comparable across processes and releases
+PROJECTION_SEED = 20250804
+
+# Recordings shorter than this carry too little signal to match on
+MIN_DURATION = 1.0
+
+
+class AcousticFingerprint(NamedTuple):
+    """64-bit acoustic fingerprint (hex) and the recording's duration in seconds."""
+    value: str
+    duration: float
+
+    @property
+    def bands(self) -> Tuple[int, ...]:
+        """The fingerprint split into BAND_COUNT integers, most significant first."""
+        number = int(self.value, 16)
+        mask = (1 << BAND_BITS) - 1
+        return tuple(
+            (number >> (BAND_BITS * (BAND_COUNT - 1 - i))) & mask for i in range(BAND_COUNT)
+        )
+
+
+def content_hasher():
+    """New hash object for upload content; feed it each chunk as it is written."""
+    return hashlib.sha256()
+
+
+def file_content_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file on disk."""
+    hasher = content_hasher()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hamming_distance(a: str, b: str) -> int:
+    """Number of differing bits between two hex fingerprints."""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+@functools.lru_cache(maxsize=1)
+def _projection() -> np.ndarray:
+    rng = np.random.default_rng(PROJECTION_SEED)
+    return rng.standard_normal((HASH_BITS, N_BANDS * N_SEGMENTS)).astype(np.float32)
+
+
+def fingerprint_samples(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> Optional[AcousticFingerprint]:
+    """
+    Fingerprint mono samples at SAMPLE_RATE.
+
+    Args:
+        samples: Mono audio samples
+        sample_rate: Sample rate of samples (only used for the duration)
+
+    Returns:
+        Optional[AcousticFingerprint]: Fingerprint, or None if the audio is too short or silent
+    """
+    import librosa
+
+    duration = len(samples) / sample_rate
+    if duration < MIN_DURATION:
+        return None
+
+    power = np.abs(librosa.stft(samples, n_fft=N_FFT, hop_length=HOP_LENGTH)) ** 2
+    mel = librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_BANDS, fmin=FMIN, fmax=FMAX)
+    energy = np.log10(mel @ power + 1e-10)
+
+    # Average every band over a fixed number of equal time segments
+    frames = energy.shape[1]
+    if frames >= N_SEGMENTS:
+        edges = np.linspace(0, frames, N_SEGMENTS + 1).astype(int)
+        sums = np.concatenate([np.zeros((N_BANDS, 1)), np.cumsum(energy, axis=1)], axis=1)
+        features = (sums[:, edges[1:]] - sums[:, edges[:-1]]) / np.diff(edges)
+    else:
+        grid = np.linspace(0, frames - 1, N_SEGMENTS)
+        features = np.stack([np.interp(grid, np.arange(frames), band) for band in energy])
+
+    # Remove per-band level so volume and equalization changes do not matter
+    features -= features.mean(axis=1, keepdims=True)
+    if not np.any(features):
+        return None
+
+    bits = (_projection() @ features.ravel().astype(np.float32)) > 0
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return AcousticFingerprint(f"{value:016x}", round(duration, 2))
+
+
+def acoustic_fingerprint(file_path: str) -> Optional[AcousticFingerprint]:
+    """
+    Fingerprint an audio file.
+
+    Decoding needs librosa (and ffmpeg for MP3); without them, or for a file
+    that cannot be decoded, None is returned and only exact duplicates are
+    detected.
+
+    Args:
+        file_path: Audio file path
+
+    Returns:
+        Optional[AcousticFingerprint]: Fingerprint, or None if unavailable
+    """
+    try:
+        import librosa
+    except ImportError:
+        logger.warning("librosa is not installed; acoustic fingerprints are disabled")
+        return None
+
+    try:
+        samples, _ = librosa.load(file_path, sr=SAMPLE_RATE, mono=True)
+        return fingerprint_samples(samples)
+    except Exception as e:
+        logger.warning(f"Could not fingerprint {file_path}: {e}")
+        return None
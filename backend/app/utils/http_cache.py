@@ -0,0 +1,78 @@
+"""
+Conditional GET support for read endpoints.
+
+An endpoint's ETag is derived from the data version of the tables it reads
+(bumped by write invalidation, and at the latest every DATA_VERSION_MAX_AGE
+seconds), the request URL and the caller. A client repeating a request with
+a matching If-None-Match gets 304 Not Modified before the endpoint runs any
+of its queries.
+"""
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+
+from .cache import cache, cache_key
+
+# Browsers may store responses but must revalidate each time; shared caches must not store them
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, tags: Iterable[str], *extra: Any) -> Optional[str]:
+    """
+    Build a weak ETag for the current request.
+
+    Args:
+        request: Incoming request (path and query parameters are part of the tag)
+        tags: Tables the response is built from
+        *extra: Additional values the response depends on, e.g. the user ID
+
+    Returns:
+        Optional[str]: ETag header value, or None if the data version is unavailable
+    """
+    version = cache.data_version(tags)
+    if version is None:
+        return None
+
+    params = {name: request.query_params.getlist(name) for name in request.query_params.keys()}
+    return f'W/"{cache_key(version, request.url.path, params, *extra)}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches etag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def conditional_get(request: Request, response: Response, tags: Iterable[str], *extra: Any) -> Optional[Response]:
+    """
+    Answer a conditional GET.
+
+    Call this at the start of an endpoint, before any queries run. If the
+    client's copy is current, the returned 304 response should be returned
+    as is; otherwise the ETag is set on response and None is returned.
+
+    Args:
+        request: Incoming request
+        response: Response whose headers FastAPI merges into the endpoint result
+        tags: Tables the response is built from
+        *extra: Additional values the response depends on, e.g. the user ID
+
+    Returns:
+        Optional[Response]: 304 response when the client's copy is current
+    """
+    etag = make_etag(request, tags, *extra)
+    if etag is None:
+        return None
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination helpers.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .cache import cache, cache_key
+
+# Cached totals are dropped on writes; the TTL only bounds drift from writes made by other processes
+CURSOR_TOTAL_TTL = 60
+
+
+def encode_cursor(timestamp: datetime, record_id: str) -> str:
+    """
+    Encode a (timestamp, id) keyset position as an opaque cursor.
+
+    Args:
+        timestamp: Sort timestamp of the last row on the page
+        record_id: Primary key of the last row on the page
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    payload = json.dumps([timestamp.isoformat(), str(record_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode an opaque cursor back into its (timestamp, id) keyset position.
+
+    Args:
+        cursor: Cursor produced by encode_cursor
+
+    Returns:
+        Tuple of (timestamp, record_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, record_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), str(record_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def cached_total(
+    namespace: str,
+    filters: Dict[str, Any],
+    compute: Callable[[], int],
+    tags: Iterable[str] = ()
+) -> int:
+    """
+    Return a short-lived cached total for cursor-mode listings.
+
+    Args:
+        namespace: Listing name used to separate cache entries
+        filters: Filter values the total depends on
+        compute: Callable running the actual count query
+        tags: Tables the count reads, so writes to them drop the cached total
+
+    Returns:
+        int: Total number of matching records (may be up to CURSOR_TOTAL_TTL seconds old)
+    """
+    key = f"total:{namespace}:{cache_key(**filters)}"
+    return cache.get_or_set(key, compute, CURSOR_TOTAL_TTL, tags)
+
+
+def page_cursor(items: list, limit: int, position: Callable[[Any], Tuple[datetime, str]]) -> Optional[str]:
+    """
+    Build the next-page cursor for a keyset page fetched with limit + 1 rows.
+
+    Args:
+        items: Rows fetched for this page (at most limit + 1)
+        limit: Requested page size
+        position: Callable returning the (timestamp, id) of a row
+
+    Returns:
+        Optional[str]: Cursor for the next page, or None on the last page
+    """
+    if len(items) <= limit:
+        return None
+    return encode_cursor(*position(items[limit - 1]))
@@ -0,0 +1,171 @@
+"""
+Cache of decoded audio for speech recognition.
+
+Decoding a recording (MP3, Opus) and resampling it to 16 kHz takes a
+noticeable share of every ASR run, and is repeated whenever a file is
+reprocessed. The decoded samples are kept as 16 kHz mono int16 .npy files
+under PCM_CACHE_DIR (a quarter of the WAV size of float32 samples, and
+lossless for 16-bit sources) and memory-mapped when read again, so a re-run
+reads the audio straight from the page cache without decoding or copying it.
+
+Entries are keyed by content: stored files by the SHA-256 in their name
+(shared by every record with that content), other files by path, size and
+mtime. The directory is kept under PCM_CACHE_MAX_BYTES by removing the
+least recently used entries; a hit refreshes the entry's mtime. Entries are
+plain files, so every worker process shares the cache, and removing an
+entry another process still has mapped is safe.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from typing import Callable, Optional
+
+import numpy as np
+
+from ..config import settings
+from .content_store import stored_content_hash
+
+logger = logging.getLogger(__name__)
+
+PCM_SAMPLE_RATE = 16000
+PCM_SUFFIX = ".npy"
+
+_INT16_SCALE = 32768.0
+
+
+def to_int16(waveform: np.ndarray) -> np.ndarray:
+    """Float samples in [-1, 1] as int16 (int16 input is returned as is)."""
+    if waveform.dtype == np.int16:
+        return waveform
+    return np.clip(np.rint(np.asarray(waveform, dtype=np.float32) * _INT16_SCALE), -32768, 32767).astype(np.int16)
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """int16 samples as float32 in [-1, 1] (float input is returned as float32)."""
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / _INT16_SCALE
+    return np.asarray(samples, dtype=np.float32)
+
+
+class PCMCache:
+    """Memory-mapped cache of 16 kHz int16 decoded audio under a disk budget."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, audio_path: str) -> str:
+        """Cache key of a recording."""
+        content_hash = stored_content_hash(audio_path)
+        if content_hash:
+            return content_hash
+        stat = os.stat(audio_path)
+        identity = f"{os.path.abspath(audio_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{PCM_SUFFIX}")
+
+    def get(self, audio_path: str) -> Optional[np.ndarray]:
+        """Memory-mapped int16 samples of a recording, or None if not cached."""
+        path = self.path(self.key(audio_path))
+        try:
+            samples = np.load(path, mmap_mode="r")
+            os.utime(path)  # most recently used
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable PCM cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        return samples
+
+    def put(self, audio_path: str, waveform: np.ndarray) -> np.ndarray:
+        """
+        Cache decoded 16 kHz samples of a recording.
+
+        Returns:
+            np.ndarray: The samples as int16, memory-mapped from the cache when stored
+        """
+        samples = to_int16(waveform)
+        if samples.nbytes > self.max_bytes:
+            return samples
+
+        path = self.path(self.key(audio_path))
+        temp_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                np.save(f, samples)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache decoded audio of {audio_path}: {e}")
+            self._remove(temp_path)
+            return samples
+
+        self.evict(keep=path)
+        try:
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return samples
+
+    def load(self, audio_path: str, decode: Callable[[str], np.ndarray]) -> np.ndarray:
+        """
+        16 kHz int16 samples of a recording, decoding (and caching) them on a miss.
+
+        Args:
+            audio_path: Recording to read
+            decode: Decoder returning 16 kHz mono float samples (e.g. dolphin.load_audio)
+        """
+        samples = self.get(audio_path)
+        if samples is not None:
+            return samples
+        return self.put(audio_path, decode(audio_path))
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits PCM_CACHE_MAX_BYTES.
+
+        Args:
+            keep: Entry that is never removed (the one just written)
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(PCM_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                removed += 1
+            total -= size
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+# Global decoded audio cache
+pcm_cache = PCMCache(settings.PCM_CACHE_DIR, settings.PCM_CACHE_MAX_BYTES)
@@ -0,0 +1,12 @@
+"""
+JSON response class used across the API.
+"""
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the standard library encoder
+    orjson = None
+
+# orjson encodes several times faster than json.dumps and handles datetimes natively
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
@@ -0,0 +1,370 @@
+"""
+Full-text index over analysis transcripts and feedback summaries.
+
+Chinese text has no word boundaries, so it is indexed as overlapping
+character bigrams ("退貨水餃" -> 退貨 貨水 水餃); Latin letters and digits
+are indexed as lowercase words. Tokens are stored space-separated in a
+SQLite FTS5 table, which gives BM25 ranking and a posting-list lookup
+instead of a LIKE scan over every transcript. A query term matches when its
+bigrams appear as a consecutive phrase.
+
+The index is a SQLite file shared by all worker processes on a host, like
+the shared cache. Session listeners keep it in step with committed writes
+to analyses; scripts/rebuild_search_index.py builds it from the database.
+"""
+import html
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_documents (
+    id INTEGER PRIMARY KEY,
+    analysis_id TEXT NOT NULL UNIQUE,
+    file_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_search_documents_file_id ON search_documents (file_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_text USING fts5(
+    transcript,
+    feedback_summary,
+    tokenize = 'unicode61 remove_diacritics 0'
+);
+
+CREATE TRIGGER IF NOT EXISTS search_documents_after_delete AFTER DELETE ON search_documents BEGIN
+    DELETE FROM search_text WHERE rowid = old.id;
+END;
+"""
+
+# BM25 column weights: a hit in the summary ranks above one in the transcript
+TRANSCRIPT_WEIGHT = 1.0
+SUMMARY_WEIGHT = 2.0
+
+# Han ideographs (CJK unified, extension A and compatibility blocks)
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_RUN_RE = re.compile(f"([{_CJK}]+)|([0-9a-z]+)")
+
+
+def _runs(text: str) -> List[str]:
+    """Han and alphanumeric runs of text, lowercased."""
+    return [cjk or word for cjk, word in _RUN_RE.findall(text.lower())]
+
+
+def _run_tokens(run: str) -> List[str]:
+    if len(run) > 1 and run[0] >= "\u3400":
+        return [run[i:i + 2] for i in range(len(run) - 1)]
+    return [run]
+
+
+def tokenize(text: Optional[str]) -> str:
+    """
+    Index tokens of text, space-separated.
+
+    Args:
+        text: Text to index
+
+    Returns:
+        str: Bigrams of every Han run and each alphanumeric word
+    """
+    if not text:
+        return ""
+    return " ".join(token for run in _runs(text) for token in _run_tokens(run))
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Build an FTS5 MATCH expression requiring every term of a search query.
+
+    A multi-character run becomes a phrase of its bigrams; a single Han
+    character matches any bigram it starts.
+
+    Args:
+        query: User query, terms separated by whitespace
+
+    Returns:
+        Optional[str]: MATCH expression, or None if the query has no searchable terms
+    """
+    phrases = []
+    for run in _runs(query):
+        phrase = '"' + " ".join(_run_tokens(run)) + '"'
+        if len(run) == 1 and run >= "\u3400":
+            phrase += "*"
+        phrases.append(phrase)
+    return " AND ".join(phrases) or None
+
+
+def highlight(text: Optional[str], query: str, length: int, tag: str = "mark") -> Optional[str]:
+    """
+    HTML snippet of text around the first query match, with matches wrapped in tag.
+
+    Args:
+        text: Original text
+        query: Search query
+        length: Approximate snippet length in characters
+        tag: Element wrapped around each match
+
+    Returns:
+        Optional[str]: Escaped snippet, or None if no term occurs in text
+    """
+    if not text:
+        return None
+
+    terms = sorted(set(_runs(query)), key=len, reverse=True)
+    if not terms:
+        return None
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return None
+
+    start = max(0, min(matches[0].start() - length // 4, len(text) - length))
+    end = min(len(text), start + length)
+    parts = ["…" if start > 0 else ""]
+    position = start
+    for match in matches:
+        if match.start() < position:
+            continue
+        if match.end() > end:
+            break
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<{tag}>{html.escape(match.group())}</{tag}>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    if end < len(text):
+        parts.append("…")
+    return "".join(parts)
+
+
+class SearchIndex:
+    """
+    FTS5 index of analysis documents stored in a SQLite file.
+
+    search_documents maps each analysis to the FTS rowid of its tokens, so
+    documents can be replaced or removed by analysis or file ID without
+    scanning the full-text table.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the index.
+
+        Args:
+            path: Database file shared by all workers
+        """
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened after a fork."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def update(
+        self,
+        documents: Iterable[Tuple[str, str, Optional[str], Optional[str]]] = (),
+        removed: Iterable[str] = (),
+        removed_files: Iterable[str] = ()
+    ) -> None:
+        """
+        Apply changes in one transaction.
+
+        Args:
+            documents: (analysis_id, file_id, transcript, feedback_summary) to add or replace
+            removed: Analysis IDs to remove
+            removed_files: File IDs whose analyses are removed
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "DELETE FROM search_documents WHERE analysis_id = ?", [(analysis_id,) for analysis_id in removed]
+            )
+            connection.executemany(
+                "DELETE FROM search_documents WHERE file_id = ?", [(file_id,) for file_id in removed_files]
+            )
+            for analysis_id, file_id, transcript, summary in documents:
+                connection.execute("DELETE FROM search_documents WHERE analysis_id = ?", (analysis_id,))
+                rowid = connection.execute(
+                    "INSERT INTO search_documents (analysis_id, file_id) VALUES (?, ?)", (analysis_id, file_id)
+                ).lastrowid
+                connection.execute(
+                    "INSERT INTO search_text (rowid, transcript, feedback_summary) VALUES (?, ?, ?)",
+                    (rowid, tokenize(transcript), tokenize(summary))
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def search(self, query: str, limit: int, offset: int = 0) -> Tuple[int, List[Tuple[str, float]]]:
+        """
+        Rank documents matching every term of query.
+
+        Args:
+            query: User query
+            limit: Maximum hits returned
+            offset: Hits to skip
+
+        Returns:
+            Tuple[int, List[Tuple[str, float]]]: Total matches and (analysis_id, score) pairs,
+            best first; higher scores are better
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return 0, []
+
+        connection = self._connection()
+        total = connection.execute(
+            "SELECT count(*) FROM search_text WHERE search_text MATCH ?", (expression,)
+        ).fetchone()[0]
+        if not total:
+            return 0, []
+
+        rows = connection.execute(
+            "SELECT d.analysis_id, -bm25(search_text, ?, ?) AS score "
+            "FROM search_text JOIN search_documents d ON d.id = search_text.rowid "
+            "WHERE search_text MATCH ? ORDER BY score DESC LIMIT ? OFFSET ?",
+            (TRANSCRIPT_WEIGHT, SUMMARY_WEIGHT, expression, limit, offset)
+        ).fetchall()
+        return total, rows
+
+    def count(self) -> int:
+        """Number of indexed documents."""
+        return self._connection().execute("SELECT count(*) FROM search_documents").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove every document."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM search_documents")
+        connection.execute("DELETE FROM search_text")
+        connection.execute("COMMIT")
+
+    def optimize(self) -> None:
+        """Merge the index's segments; run after a bulk rebuild."""
+        self._connection().execute("INSERT INTO search_text (search_text) VALUES ('optimize')")
+
+
+def create_search_index() -> Optional[SearchIndex]:
+    """
+    Open the index at settings.SEARCH_INDEX_PATH.
+
+    Returns:
+        Optional[SearchIndex]: Index, or None if it cannot be opened (e.g. SQLite without FTS5)
+    """
+    try:
+        return SearchIndex(settings.SEARCH_INDEX_PATH)
+    except Exception as e:
+        logger.error(f"Failed to open search index at {settings.SEARCH_INDEX_PATH}, full-text search is disabled: {e}")
+        return None
+
+
+# Global search index
+search_index = create_search_index()
+
+
+# Session.info key holding index changes made by the current transaction
+PENDING_CHANGES_KEY = "search_index_changes"
+
+# Analysis attributes whose change requires re-indexing
+_INDEXED_ATTRIBUTES = ("transcript", "feedback_summary", "file_id")
+
+
+def _pending_changes(session: Session) -> dict:
+    return session.info.setdefault(PENDING_CHANGES_KEY, {"documents": {}, "removed": set(), "removed_files": set()})
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Record analyses written or deleted by the flush (attribute history is still available here)."""
+    from ..models.analysis import VoiceAnalysis
+    from ..models.file import VoiceFile
+
+    changes = _pending_changes(session)
+
+    def index(analysis) -> None:
+        changes["removed"].discard(analysis.id)
+        changes["documents"][analysis.id] = (
+            analysis.id, analysis.file_id, analysis.transcript, analysis.feedback_summary
+        )
+
+    for obj in session.new:
+        if isinstance(obj, VoiceAnalysis):
+            index(obj)
+    for obj in session.dirty:
+        if isinstance(obj, VoiceAnalysis):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _INDEXED_ATTRIBUTES):
+                index(obj)
+    for obj in session.deleted:
+        if isinstance(obj, VoiceAnalysis):
+            changes["documents"].pop(obj.id, None)
+            changes["removed"].add(obj.id)
+        elif isinstance(obj, VoiceFile):
+            changes["removed_files"].add(obj.id)
+
+
+def record_removed_files(session: Session, file_ids: Iterable[str]) -> None:
+    """Remove files' documents when the session commits (for bulk deletes the listeners do not see)."""
+    _pending_changes(session)["removed_files"].update(file_ids)
+
+
+def _after_commit(session: Session) -> None:
+    """Apply the committed transaction's changes to the index."""
+    changes = session.info.pop(PENDING_CHANGES_KEY, None)
+    if not changes or search_index is None:
+        return
+    if not (changes["documents"] or changes["removed"] or changes["removed_files"]):
+        return
+
+    try:
+        search_index.update(changes["documents"].values(), changes["removed"], changes["removed_files"])
+    except sqlite3.Error as e:
+        # The database write already committed; a rebuild brings the index back in step
+        logger.error(f"Failed to update search index: {e}")
+
+
+def _after_rollback(session: Session) -> None:
+    """Discard recorded changes; nothing was written."""
+    session.info.pop(PENDING_CHANGES_KEY, None)
+
+
+def register_search_indexing(session_class=Session) -> None:
+    """
+    Attach the index maintenance listeners to a Session class.
+
+    Bulk UPDATE/DELETE statements bypass these listeners (bulk file deletes
+    call record_removed_files); searches skip hits whose analysis no longer
+    exists, and a rebuild reconciles the rest.
+    Safe to call more than once.
+
+    Args:
+        session_class: Session class (or sessionmaker) to listen on
+    """
+    listeners = (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    )
+    for name, listener in listeners:
+        if not event.contains(session_class, name, listener):
+            event.listen(session_class, name, listener)
@@ -0,0 +1,422 @@
+"""
+SQLite-backed cache shared by all worker processes on a host.
+
+Every uvicorn worker opens the same database file, so an entry computed by one
+worker is a hit for the others, and deleting entries on invalidation is seen
+by every worker at once. WAL mode lets readers proceed while one worker writes.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_last_access ON cache_entries (last_access);
+
+CREATE TABLE IF NOT EXISTS cache_entry_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entry_tags_key ON cache_entry_tags (key);
+
+CREATE TABLE IF NOT EXISTS cache_generations (
+    tag TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_meta (id, entries, bytes) VALUES (1, 0, 0);
+
+CREATE TABLE IF NOT EXISTS cache_epoch (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    token TEXT NOT NULL
+);
+INSERT OR IGNORE INTO cache_epoch (id, token) VALUES (1, lower(hex(randomblob(6))));
+
+CREATE TRIGGER IF NOT EXISTS cache_entries_after_insert AFTER INSERT ON cache_entries BEGIN
+    UPDATE cache_meta SET entries = entries + 1, bytes = bytes + new.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_after_delete AFTER DELETE ON cache_entries BEGIN
+    UPDATE cache_meta SET entries = entries - 1, bytes = bytes - old.size WHERE id = 1;
+    DELETE FROM cache_entry_tags WHERE key = old.key;
+END;
+"""
+
+# Refresh last_access at most this often per entry, so hits rarely write
+ACCESS_RESOLUTION = 1.0
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cross-process LRU + TTL cache stored in a SQLite database.
+
+    Values are pickled; an entry's size is its pickled length. Entry and byte
+    totals are maintained by triggers, so enforcing the budget never scans
+    the table. Hit/miss counters are per process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default_ttl: int = 3600,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Initialize the SQLite cache.
+
+        Args:
+            path: Database file shared by all workers
+            default_ttl: Default time-to-live in seconds
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total pickled size of cached values in bytes
+        """
+        super().__init__()
+        self.path = path
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.stats = self._empty_stats()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        # Created with the file and shared by every worker using it
+        self.epoch = connection.execute("SELECT token FROM cache_epoch WHERE id = 1").fetchone()[0]
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "expires": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "coalesced": 0,
+            "stale_hits": 0,
+            "refreshes": 0,
+            "errors": 0
+        }
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened after a fork."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _transaction(self):
+        """Open a write transaction that takes the database lock immediately."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get value from cache.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None if not found/expired
+        """
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value, expires_at, last_access FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+
+            value, expires_at, last_access = row
+            if expires_at <= now:
+                connection.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+                self._count("expires")
+                self._count("misses")
+                return None
+
+            if now - last_access > ACCESS_RESOLUTION:
+                connection.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            return pickle.loads(value)
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            self._count("errors")
+            return None
+
+    def _write(self, connection: sqlite3.Connection, key: str, blob: bytes, ttl: int, tags: Tuple[str, ...]) -> None:
+        """Replace an entry inside an open transaction."""
+        now = time.time()
+        connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        connection.execute(
+            "INSERT INTO cache_entries (key, value, expires_at, created_at, last_access, size) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, blob, now + ttl, now, now, len(blob))
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO cache_entry_tags (tag, key) VALUES (?, ?)",
+            [(tag, key) for tag in tags]
+        )
+        self._enforce_budget(connection, now)
+        self._count("sets")
+
+    def _enforce_budget(self, connection: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones, until within budget."""
+        entries, total_bytes = connection.execute("SELECT entries, bytes FROM cache_meta WHERE id = 1").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        expired = connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,)).rowcount
+        self._count("expires", expired)
+
+        while True:
+            entries, total_bytes = connection.execute("SELECT entries, bytes FROM cache_meta WHERE id = 1").fetchone()
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            # Evict in small batches; the byte overshoot is unknown in entries
+            batch = max(entries - self.max_entries, 1, entries // 100)
+            evicted = connection.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY last_access LIMIT ?)",
+                (batch,)
+            ).rowcount
+            self._count("evictions", evicted)
+            if not evicted:
+                break
+
+    def _serialize(self, key: str, value: Any) -> Optional[bytes]:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            logger.debug(f"Not caching {key}: {len(blob)} bytes exceeds the cache budget")
+            return None
+        return blob
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None) -> None:
+        """
+        Set value in cache.
+
+        Args:
+            key: Cache key
+            value: Value to cache (must be picklable)
+            ttl: Time-to-live in seconds (uses default if None)
+            tags: Tags used to invalidate the entry together with related ones
+        """
+        self._set_if_current(key, value, ttl, tuple(set(tags or ())), None)
+
+    def _tag_generation(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        if not tags:
+            return ()
+        try:
+            rows = dict(self._connection().execute(
+                f"SELECT tag, generation FROM cache_generations WHERE tag IN ({','.join('?' * len(tags))})",
+                tags
+            ).fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"Cache generation read failed: {e}")
+            self._count("errors")
+            return (-1,) * len(tags)
+        return tuple(rows.get(tag, 0) for tag in tags)
+
+    def _set_if_current(
+        self, key: str, value: Any, ttl: Optional[int], tags: Tuple[str, ...], generation: Optional[Tuple[int, ...]]
+    ) -> None:
+        if ttl is None:
+            ttl = self.default_ttl
+
+        try:
+            blob = self._serialize(key, value)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(f"Cannot cache {key}: {e}")
+            self._count("errors")
+            return
+
+        try:
+            connection = self._transaction()
+            try:
+                if blob is None:
+                    connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                elif generation is None or self._tag_generation(tags) == generation:
+                    self._write(connection, key, blob, ttl, tags)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+            self._count("errors")
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Delete every entry carrying any of the given tags, in all workers.
+
+        Args:
+            tags: Tags to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        tags = tuple(set(tags))
+        if not tags:
+            return 0
+
+        placeholders = ",".join("?" * len(tags))
+        try:
+            connection = self._transaction()
+            try:
+                connection.executemany(
+                    "INSERT INTO cache_generations (tag, generation) VALUES (?, 1) "
+                    "ON CONFLICT(tag) DO UPDATE SET generation = generation + 1",
+                    [(tag,) for tag in tags]
+                )
+                removed = connection.execute(
+                    f"DELETE FROM cache_entries WHERE key IN "
+                    f"(SELECT key FROM cache_entry_tags WHERE tag IN ({placeholders}))",
+                    tags
+                ).rowcount
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.error(f"Cache invalidation failed for {tags}: {e}")
+            self._count("errors")
+            return 0
+
+        self._count("invalidations", removed)
+        return removed
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete value from cache.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if key existed, False otherwise
+        """
+        try:
+            deleted = self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+            self._count("errors")
+            return False
+        if deleted:
+            self._count("deletes")
+        return bool(deleted)
+
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        connection = self._transaction()
+        try:
+            connection.execute("DELETE FROM cache_entries")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        with self._stats_lock:
+            self.stats = self._empty_stats()
+
+    def cleanup_expired(self) -> int:
+        """
+        Remove expired entries from cache.
+
+        Returns:
+            Number of expired entries removed
+        """
+        removed = self._connection().execute(
+            "DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        self._count("expires", removed)
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics (counters are for this process, size is shared)."""
+        entries, total_bytes = self._connection().execute(
+            "SELECT entries, bytes FROM cache_meta WHERE id = 1"
+        ).fetchone()
+        with self._stats_lock:
+            stats = dict(self.stats)
+
+        total_requests = stats["hits"] + stats["misses"]
+        hit_rate = (stats["hits"] / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            **stats,
+            "hit_rate": round(hit_rate, 2),
+            "size": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "total_requests": total_requests,
+            "backend": "sqlite",
+            "path": self.path
+        }
+
+    def keys(self) -> list:
+        """Get all cache keys."""
+        return [row[0] for row in self._connection().execute("SELECT key FROM cache_entries")]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Get a snapshot of entry metadata, least recently used first."""
+        connection = self._connection()
+        tags: Dict[str, List[str]] = {}
+        for tag, key in connection.execute("SELECT tag, key FROM cache_entry_tags"):
+            tags.setdefault(key, []).append(tag)
+
+        return [
+            {
+                "key": key,
+                "size": size,
+                "created_at": created_at,
+                "expires_at": expires_at,
+                "tags": tags.get(key, [])
+            }
+            for key, size, created_at, expires_at in connection.execute(
+                "SELECT key, size, created_at, expires_at FROM cache_entries ORDER BY last_access"
+            )
+        ]
+
+    def exists(self, key: str) -> bool:
+        """Check if key exists and is not expired."""
+        row = self._connection().execute(
+            "SELECT 1 FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row is not None
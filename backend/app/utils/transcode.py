@@ -0,0 +1,95 @@
+"""
+Audio transcoding for long-term retention of analyzed recordings.
+
+Recordings are re-encoded with libsndfile (through soundfile, which reads
+WAV, FLAC, Ogg and MP3): Opus in an Ogg container for compact lossy speech,
+or FLAC for lossless compression. Channels are kept. Opus only takes a few
+sample rates, so other rates are resampled (with librosa) to the next one up.
+"""
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Codec -> (file extension, soundfile format, soundfile subtype)
+CODECS: Dict[str, tuple] = {
+    "opus": (".opus", "OGG", "OPUS"),
+    "flac": (".flac", "FLAC", "PCM_16"),
+}
+
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# libsndfile maps compression_level 0..1 linearly onto these Opus bitrates (per channel)
+_OPUS_MAX_BITRATE = 256000
+_OPUS_MIN_BITRATE = 6000
+
+BLOCK_FRAMES = 65536
+
+
+class TranscodeError(RuntimeError):
+    """Raised when a recording cannot be decoded or encoded."""
+
+
+def codec_extension(codec: str) -> str:
+    """File extension (with dot) of a codec's output."""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+    return CODECS[codec][0]
+
+
+def opus_compression_level(bitrate: int, channels: int) -> float:
+    """soundfile compression_level giving about the requested Opus bitrate (bits per second)."""
+    per_channel = bitrate / max(channels, 1)
+    level = (_OPUS_MAX_BITRATE - per_channel) / (_OPUS_MAX_BITRATE - _OPUS_MIN_BITRATE)
+    return min(max(level, 0.0), 1.0)
+
+
+def transcode(source_path: str, target_path: str, codec: str, bitrate: int = 16000) -> None:
+    """
+    Re-encode a recording.
+
+    Args:
+        source_path: Recording to read
+        target_path: File to write (overwritten)
+        codec: "opus" or "flac"
+        bitrate: Target Opus bitrate in bits per second (ignored for FLAC)
+
+    Raises:
+        TranscodeError: The recording cannot be decoded or encoded
+    """
+    import soundfile as sf
+
+    _, format, subtype = CODECS[codec]
+    try:
+        with sf.SoundFile(source_path) as source:
+            channels, sample_rate = source.channels, source.samplerate
+            options = {}
+            if codec == "opus":
+                options["compression_level"] = opus_compression_level(bitrate, channels)
+                if sample_rate not in OPUS_SAMPLE_RATES:
+                    _write_resampled(source, target_path, format, subtype, options)
+                    return
+
+            with sf.SoundFile(
+                target_path, "w", samplerate=sample_rate, channels=channels,
+                format=format, subtype=subtype, **options
+            ) as target:
+                for block in source.blocks(BLOCK_FRAMES, dtype="float32", always_2d=True):
+                    target.write(block)
+    except TranscodeError:
+        raise
+    except Exception as e:
+        raise TranscodeError(f"Could not transcode {source_path}: {e}") from e
+
+
+def _write_resampled(source, target_path: str, format: str, subtype: str, options: dict) -> None:
+    import soundfile as sf
+    try:
+        import librosa
+    except ImportError:
+        raise TranscodeError(f"Resampling {source.samplerate} Hz audio for Opus needs librosa")
+
+    sample_rate = next((rate for rate in OPUS_SAMPLE_RATES if rate >= source.samplerate), OPUS_SAMPLE_RATES[-1])
+    samples = source.read(dtype="float32", always_2d=True)
+    resampled = librosa.resample(samples.T, orig_sr=source.samplerate, target_sr=sample_rate).T
+    sf.write(target_path, resampled, sample_rate, format=format, subtype=subtype, **options)
@@ -0,0 +1,584 @@
+"""
+Compact vector store with an IVF approximate nearest-neighbour index.
+
+Vectors are L2-normalized and stored as float16 rows of one flat file
+(vectors.f16), read through a memory map, so 1M 384-dimensional vectors
+take 768MB on disk and only the pages a query touches are loaded. A SQLite
+file maps analysis IDs to rows and records each row's inverted list.
+
+The index is an inverted file (IVF): k-means centroids split the vectors
+into lists, and a query scores only the vectors of the SIMILARITY_NPROBE
+lists whose centroids are closest to it instead of scanning every row.
+Until train() has run, every query is an exact scan, which is fine for
+small stores. New vectors are assigned to their nearest centroid as they
+are added; retrain after the store has grown a lot.
+
+Every worker process opens the same files. Writes are serialized by the
+SQLite write lock. Rows of removed or replaced vectors are logged, and
+readers drop them from their in-memory lists; a generation counter tells
+readers to reload the lists after retraining or clearing.
+
+Vectors of deleted analyses are removed when the deleting transaction
+commits (see register_vector_cleanup).
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    row INTEGER PRIMARY KEY,
+    analysis_id TEXT NOT NULL UNIQUE,
+    list INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS removed_rows (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    row INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS vector_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO vector_meta (key, value) VALUES ('generation', '0');
+INSERT OR IGNORE INTO vector_meta (key, value) VALUES ('next_row', '0');
+"""
+
+DTYPE = np.dtype("<f2")
+
+# Stores smaller than this are always scanned exactly
+MIN_TRAIN_VECTORS = 1000
+
+# Vectors sampled to fit the centroids, per list
+TRAIN_SAMPLE_PER_LIST = 64
+MAX_TRAIN_SAMPLE = 100000
+
+# Rows added or removed since the lists were loaded are kept aside until there are this many
+MERGE_THRESHOLD = 10000
+
+# IDs per statement when removing vectors
+REMOVE_BATCH_SIZE = 500
+
+ASSIGN_BATCH_SIZE = 50000
+
+
+class VectorIndex:
+    """
+    Float16 vector store keyed by analysis ID, searchable by cosine similarity.
+
+    The model name and dimension are fixed by the first vectors added; adding
+    vectors from a different model raises ValueError until the store is cleared.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Open (and create if needed) the store.
+
+        Args:
+            directory: Directory shared by all workers
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f16")
+        self.centroids_path = os.path.join(directory, "centroids.npy")
+        self._db_path = os.path.join(directory, "index.db")
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+        # Per-process view of the index, refreshed from the shared files
+        self._generation = None
+        self._centroids: Optional[np.ndarray] = None
+        self._list_rows = np.zeros(0, dtype=np.int64)
+        self._list_bounds = np.zeros(1, dtype=np.int64)
+        self._delta_rows = np.zeros(0, dtype=np.int64)
+        self._delta_lists = np.zeros(0, dtype=np.int64)
+        self._dead_rows = np.zeros(0, dtype=np.int64)
+        self._loaded_row = -1
+        self._removed_seq = 0
+        self._map: Optional[np.memmap] = None
+        self._map_inode: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened after a fork."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _meta(self, connection: sqlite3.Connection) -> Dict[str, str]:
+        return dict(connection.execute("SELECT key, value FROM vector_meta").fetchall())
+
+    @staticmethod
+    def _set_meta(connection: sqlite3.Connection, **values) -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO vector_meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+
+    def info(self) -> Dict[str, object]:
+        """Model, dimension, vector count and list count of the store."""
+        connection = self._connection()
+        meta = self._meta(connection)
+        centroids = self._read_centroids()
+        return {
+            "model": meta.get("model"),
+            "dim": int(meta["dim"]) if "dim" in meta else None,
+            "vectors": connection.execute("SELECT count(*) FROM vectors").fetchone()[0],
+            "lists": len(centroids) if centroids is not None else 0,
+        }
+
+    def _read_centroids(self) -> Optional[np.ndarray]:
+        try:
+            return np.load(self.centroids_path)
+        except (OSError, ValueError):
+            return None
+
+    def _vectors(self, dim: int) -> np.ndarray:
+        """Memory map of every stored row, remapped when the file has grown or been recreated."""
+        try:
+            stat = os.stat(self.vectors_path)
+            size, inode = stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            size, inode = 0, None
+        rows = size // (dim * DTYPE.itemsize)
+        if self._map is None or self._map.shape != (rows, dim) or self._map_inode != inode:
+            if rows:
+                self._map = np.memmap(self.vectors_path, dtype=DTYPE, mode="r", shape=(rows, dim))
+            else:
+                self._map = np.zeros((0, dim), dtype=DTYPE)
+            self._map_inode = inode
+        return self._map
+
+    def add(self, model: str, items: Sequence[Tuple[str, np.ndarray]]) -> None:
+        """
+        Add or replace vectors.
+
+        Args:
+            model: Name of the model that produced the vectors
+            items: (analysis_id, vector) pairs; vectors are normalized before storing
+        """
+        if not items:
+            return
+
+        vectors = np.stack([np.asarray(vector, dtype=np.float32) for _, vector in items])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        dim = vectors.shape[1]
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            meta = self._meta(connection)
+            if "model" not in meta:
+                self._set_meta(connection, model=model, dim=dim)
+            elif meta["model"] != model or int(meta["dim"]) != dim:
+                raise ValueError(
+                    f"Vector store holds {meta['model']} ({meta['dim']} dims), not {model} ({dim} dims); rebuild it"
+                )
+
+            centroids = self._read_centroids()
+            lists = np.argmax(vectors @ centroids.T, axis=1) if centroids is not None else np.zeros(len(items), int)
+
+            ids = [analysis_id for analysis_id, _ in items]
+            self._delete(connection, ids)
+
+            first_row = int(meta["next_row"])
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(first_row * dim * DTYPE.itemsize)
+                f.write(vectors.astype(DTYPE).tobytes())
+            connection.executemany(
+                "INSERT INTO vectors (row, analysis_id, list) VALUES (?, ?, ?)",
+                [(first_row + i, analysis_id, int(lists[i])) for i, analysis_id in enumerate(ids)]
+            )
+            self._set_meta(connection, next_row=first_row + len(items))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def remove(self, analysis_ids: Iterable[str]) -> int:
+        """
+        Remove vectors; their rows stay in the file until the store is rebuilt.
+
+        Returns:
+            int: Number of vectors removed
+        """
+        analysis_ids = list(analysis_ids)
+        if not analysis_ids:
+            return 0
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            removed = 0
+            for start in range(0, len(analysis_ids), REMOVE_BATCH_SIZE):
+                removed += self._delete(connection, analysis_ids[start:start + REMOVE_BATCH_SIZE])
+            connection.execute("COMMIT")
+            return removed
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, analysis_ids: List[str]) -> int:
+        """Delete vectors and log their rows for readers (inside a write transaction)."""
+        placeholders = ",".join("?" * len(analysis_ids))
+        rows = connection.execute(
+            f"SELECT row FROM vectors WHERE analysis_id IN ({placeholders})", analysis_ids
+        ).fetchall()
+        if rows:
+            connection.execute(f"DELETE FROM vectors WHERE analysis_id IN ({placeholders})", analysis_ids)
+            connection.executemany("INSERT INTO removed_rows (row) VALUES (?)", rows)
+        return len(rows)
+
+    def missing(self, analysis_ids: Sequence[str]) -> List[str]:
+        """IDs among analysis_ids that have no vector."""
+        if not analysis_ids:
+            return []
+        found = {
+            row[0] for row in self._connection().execute(
+                f"SELECT analysis_id FROM vectors WHERE analysis_id IN ({','.join('?' * len(analysis_ids))})",
+                list(analysis_ids)
+            )
+        }
+        return [analysis_id for analysis_id in analysis_ids if analysis_id not in found]
+
+    def clear(self) -> None:
+        """Remove every vector, the centroids and the model binding."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            generation = int(self._meta(connection)["generation"])
+            connection.execute("DELETE FROM vectors")
+            connection.execute("DELETE FROM removed_rows")
+            connection.execute("DELETE FROM vector_meta WHERE key IN ('model', 'dim')")
+            self._set_meta(connection, next_row=0, generation=generation + 1)
+            for path in (self.vectors_path, self.centroids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0) -> int:
+        """
+        Fit the IVF centroids with spherical k-means and reassign every vector.
+
+        Holds the write lock while reassigning; run it off-peak on large stores.
+
+        Args:
+            nlist: Number of lists (default: about 4 * sqrt(vector count))
+            iterations: k-means iterations
+            seed: Random seed for sampling
+
+        Returns:
+            int: Number of lists, or 0 if the store is too small to need an index
+        """
+        connection = self._connection()
+        meta = self._meta(connection)
+        rows = np.array([row for row, in connection.execute("SELECT row FROM vectors ORDER BY row")], dtype=np.int64)
+        if len(rows) < MIN_TRAIN_VECTORS:
+            return 0
+
+        dim = int(meta["dim"])
+        vectors = self._vectors(dim)
+        nlist = nlist or min(65536, int(4 * math.sqrt(len(rows))))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(rows), max(nlist * TRAIN_SAMPLE_PER_LIST, 1), MAX_TRAIN_SAMPLE)
+        sample = vectors[np.sort(rng.choice(rows, sample_size, replace=False))].astype(np.float32)
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+        centroids = centroids.astype(np.float32)
+
+        temp_path = f"{self.centroids_path}.{os.getpid()}.tmp.npy"
+        np.save(temp_path, centroids)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Rows added since the sample was taken are assigned as well
+            rows = np.array(
+                [row for row, in connection.execute("SELECT row FROM vectors ORDER BY row")], dtype=np.int64
+            )
+            vectors = self._vectors(dim)
+            for start in range(0, len(rows), ASSIGN_BATCH_SIZE):
+                batch = rows[start:start + ASSIGN_BATCH_SIZE]
+                lists = np.argmax(vectors[batch].astype(np.float32) @ centroids.T, axis=1)
+                connection.executemany(
+                    "UPDATE vectors SET list = ? WHERE row = ?", zip(lists.tolist(), batch.tolist())
+                )
+            os.replace(temp_path, self.centroids_path)
+            # Readers reload every list, so the removal log can start over
+            connection.execute("DELETE FROM removed_rows")
+            self._set_meta(connection, generation=int(self._meta(connection)["generation"]) + 1)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        logger.info(f"Trained vector index: {len(rows)} vectors in {nlist} lists")
+        return nlist
+
+    def _refresh(self, connection: sqlite3.Connection) -> None:
+        """Bring the in-memory lists up to date with the shared store (call with self._lock held)."""
+        # One read transaction, so the lists and the removal log are from the same snapshot
+        connection.execute("BEGIN")
+        try:
+            generation = int(self._meta(connection)["generation"])
+            if generation != self._generation:
+                self._reload(connection, generation)
+                return
+
+            added = np.array(
+                connection.execute("SELECT row, list FROM vectors WHERE row > ?", (self._loaded_row,)).fetchall(),
+                dtype=np.int64
+            ).reshape(-1, 2)
+            removed = connection.execute(
+                "SELECT seq, row FROM removed_rows WHERE seq > ? ORDER BY seq", (self._removed_seq,)
+            ).fetchall()
+        finally:
+            connection.execute("COMMIT")
+
+        if len(added):
+            self._delta_rows = np.concatenate([self._delta_rows, added[:, 0]])
+            self._delta_lists = np.concatenate([self._delta_lists, added[:, 1]])
+            self._loaded_row = int(added[:, 0].max())
+        if removed:
+            self._removed_seq = removed[-1][0]
+            rows = np.array([row for _, row in removed], dtype=np.int64)
+            kept = ~np.isin(self._delta_rows, rows)
+            self._delta_rows = self._delta_rows[kept]
+            self._delta_lists = self._delta_lists[kept]
+            self._dead_rows = np.union1d(self._dead_rows, rows)
+        if len(self._delta_rows) >= MERGE_THRESHOLD or len(self._dead_rows) >= MERGE_THRESHOLD:
+            self._merge()
+
+    def _reload(self, connection: sqlite3.Connection, generation: int) -> None:
+        """Load every list from the shared store."""
+        self._centroids = self._read_centroids()
+        pairs = np.array(connection.execute("SELECT row, list FROM vectors").fetchall(), dtype=np.int64)
+        pairs = pairs.reshape(-1, 2)
+        self._set_lists(pairs[:, 0], pairs[:, 1])
+        self._delta_rows = np.zeros(0, dtype=np.int64)
+        self._delta_lists = np.zeros(0, dtype=np.int64)
+        self._dead_rows = np.zeros(0, dtype=np.int64)
+        self._loaded_row = int(pairs[:, 0].max()) if len(pairs) else -1
+        self._removed_seq = connection.execute("SELECT coalesce(max(seq), 0) FROM removed_rows").fetchone()[0]
+        # clear() recreates the vectors file; never pair the new rows with the old file
+        self._map = None
+        self._generation = generation
+
+    def _merge(self) -> None:
+        """Fold added rows into the lists and drop removed ones."""
+        loaded_lists = np.repeat(np.arange(len(self._list_bounds) - 1), np.diff(self._list_bounds))
+        rows = np.concatenate([self._list_rows, self._delta_rows])
+        lists = np.concatenate([loaded_lists, self._delta_lists])
+        kept = ~np.isin(rows, self._dead_rows)
+        self._set_lists(rows[kept], lists[kept])
+        self._delta_rows = np.zeros(0, dtype=np.int64)
+        self._delta_lists = np.zeros(0, dtype=np.int64)
+        self._dead_rows = np.zeros(0, dtype=np.int64)
+
+    def _set_lists(self, rows: np.ndarray, lists: np.ndarray) -> None:
+        """Store rows grouped by list: the rows of list i are _list_rows[_list_bounds[i]:_list_bounds[i + 1]]."""
+        nlist = len(self._centroids) if self._centroids is not None else 1
+        order = np.argsort(lists, kind="stable")
+        self._list_rows = rows[order]
+        self._list_bounds = np.searchsorted(lists[order], np.arange(nlist + 1))
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the lists closest to query (call with self._lock held)."""
+        if self._centroids is None:
+            candidates = np.concatenate([self._list_rows, self._delta_rows])
+        else:
+            probes = np.argsort(-(self._centroids @ query))[:nprobe]
+            parts = [self._list_rows[self._list_bounds[p]:self._list_bounds[p + 1]] for p in probes]
+            parts.append(self._delta_rows[np.isin(self._delta_lists, probes)])
+            candidates = np.concatenate(parts)
+        if len(self._dead_rows):
+            candidates = candidates[~np.isin(candidates, self._dead_rows)]
+        return candidates
+
+    def search(
+        self, query: np.ndarray, limit: int = 10, nprobe: Optional[int] = None, exclude: Iterable[str] = ()
+    ) -> List[Tuple[str, float]]:
+        """
+        Approximate nearest neighbours of a vector by cosine similarity.
+
+        Args:
+            query: Query vector
+            limit: Maximum neighbours returned
+            nprobe: Lists scanned (default settings.SIMILARITY_NPROBE)
+            exclude: Analysis IDs left out of the results
+
+        Returns:
+            List[Tuple[str, float]]: (analysis_id, similarity) pairs, most similar first
+        """
+        connection = self._connection()
+        meta = self._meta(connection)
+        if "dim" not in meta:
+            return []
+
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+        exclude = set(exclude)
+
+        with self._lock:
+            self._refresh(connection)
+            candidates = self._candidates(query, nprobe or settings.SIMILARITY_NPROBE)
+            vectors = self._vectors(int(meta["dim"]))
+        candidates = candidates[candidates < len(vectors)]
+        if not len(candidates):
+            return []
+
+        candidates.sort()
+        scores = vectors[candidates].astype(np.float32) @ query
+        wanted = min(len(candidates), limit + len(exclude))
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])]
+
+        top_rows = candidates[top].tolist()
+        ids = dict(connection.execute(
+            f"SELECT row, analysis_id FROM vectors WHERE row IN ({','.join('?' * len(top_rows))})", top_rows
+        ).fetchall())
+        results = []
+        for row, score in zip(top_rows, scores[top].tolist()):
+            analysis_id = ids.get(row)
+            if analysis_id is not None and analysis_id not in exclude:
+                results.append((analysis_id, score))
+        return results[:limit]
+
+    def vector(self, analysis_id: str) -> Optional[np.ndarray]:
+        """Stored vector of an analysis, or None if it has none."""
+        connection = self._connection()
+        meta = self._meta(connection)
+        found = connection.execute("SELECT row FROM vectors WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        if found is None:
+            return None
+        with self._lock:
+            vectors = self._vectors(int(meta["dim"]))
+        return vectors[found[0]].astype(np.float32)
+
+    def similar(
+        self, analysis_id: str, limit: int = 10, nprobe: Optional[int] = None
+    ) -> Optional[List[Tuple[str, float]]]:
+        """
+        Analyses most similar to one already stored.
+
+        Returns:
+            Optional[List[Tuple[str, float]]]: (analysis_id, similarity) pairs, or None if the
+            analysis has no vector
+        """
+        query = self.vector(analysis_id)
+        if query is None:
+            return None
+        return self.search(query, limit=limit, nprobe=nprobe, exclude=(analysis_id,))
+
+
+def create_vector_index() -> Optional[VectorIndex]:
+    """
+    Open the store at settings.EMBEDDING_DIR.
+
+    Returns:
+        Optional[VectorIndex]: Store, or None if it cannot be opened
+    """
+    try:
+        return VectorIndex(settings.EMBEDDING_DIR)
+    except Exception as e:
+        logger.error(f"Failed to open vector store at {settings.EMBEDDING_DIR}, similarity search is disabled: {e}")
+        return None
+
+
+# Global vector store
+vector_index = create_vector_index()
+
+
+# Session.info key holding analyses whose vectors go when the transaction commits
+PENDING_REMOVALS_KEY = "vector_index_removals"
+
+
+def record_removed_analyses(session: Session, analysis_ids: Iterable[str]) -> None:
+    """Remove analyses' vectors when the session commits (for bulk deletes the listeners do not see)."""
+    session.info.setdefault(PENDING_REMOVALS_KEY, set()).update(analysis_ids)
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    """Record analyses deleted by the flush, including those of deleted files (removed by ON DELETE CASCADE)."""
+    from ..models.analysis import VoiceAnalysis
+    from ..models.file import VoiceFile
+
+    analysis_ids = [obj.id for obj in session.deleted if isinstance(obj, VoiceAnalysis)]
+    file_ids = [obj.id for obj in session.deleted if isinstance(obj, VoiceFile)]
+    if file_ids:
+        with session.no_autoflush:
+            analysis_ids += [
+                analysis_id for analysis_id, in
+                session.query(VoiceAnalysis.id).filter(VoiceAnalysis.file_id.in_(file_ids))
+            ]
+    if analysis_ids:
+        record_removed_analyses(session, analysis_ids)
+
+
+def _after_commit(session: Session) -> None:
+    """Remove the committed transaction's deleted analyses from the store."""
+    analysis_ids = session.info.pop(PENDING_REMOVALS_KEY, None)
+    if not analysis_ids or vector_index is None:
+        return
+    try:
+        vector_index.remove(analysis_ids)
+    except sqlite3.Error as e:
+        # Searches skip vectors whose analysis is gone; a rebuild removes them
+        logger.error(f"Failed to remove vectors of deleted analyses: {e}")
+
+
+def _after_rollback(session: Session) -> None:
+    """Discard recorded removals; nothing was deleted."""
+    session.info.pop(PENDING_REMOVALS_KEY, None)
+
+
+def register_vector_cleanup(session_class=Session) -> None:
+    """
+    Attach the listeners removing deleted analyses' vectors to a Session class.
+
+    Bulk DELETE statements bypass them (bulk file deletes call
+    record_removed_analyses). Safe to call more than once.
+
+    Args:
+        session_class: Session class (or sessionmaker) to listen on
+    """
+    listeners = (
+        ("before_flush", _before_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    )
+    for name, listener in listeners:
+        if not event.contains(session_class, name, listener):
+            event.listen(session_class, name, listener)
@@ -0,0 +1,48 @@
+"""Add composite indexes for analysis and file filter/sort combinations
+
+Revision ID: 5c2e9a7d41b3
+Revises: 128711c8492e
+Create Date: 2025-08-04 10:12:45.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e9a7d41b3'
+down_revision: Union[str, None] = '128711c8492e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Listing order (analysis_time DESC, id DESC) for offset and keyset pagination
+    op.create_index('ix_voice_analysis_time_id', 'voice_analysis', ['analysis_time', 'id'], unique=False)
+    # Sentiment / feedback category filters combined with the listing order
+    op.create_index('ix_voice_analysis_sentiment_time', 'voice_analysis', ['sentiment', 'analysis_time', 'id'], unique=False)
+    op.create_index('ix_voice_analysis_category_time', 'voice_analysis', ['feedback_category', 'analysis_time', 'id'], unique=False)
+    # Time-series and trend queries reach analyses through the file join and filter by sentiment
+    op.create_index('ix_voice_analysis_file_sentiment', 'voice_analysis', ['file_id', 'sentiment'], unique=False)
+
+    # File listing order (created_at DESC, id DESC) and upload date ranges
+    op.create_index('ix_voice_files_created_id', 'voice_files', ['created_at', 'id'], unique=False)
+    # Uploader / status / format filters combined with the listing order or a date range
+    op.create_index('ix_voice_files_uploader_created', 'voice_files', ['uploaded_by', 'created_at', 'id'], unique=False)
+    op.create_index('ix_voice_files_status_created', 'voice_files', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_voice_files_format_created', 'voice_files', ['file_format', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('ix_voice_files_format_created', table_name='voice_files')
+    op.drop_index('ix_voice_files_status_created', table_name='voice_files')
+    op.drop_index('ix_voice_files_uploader_created', table_name='voice_files')
+    op.drop_index('ix_voice_files_created_id', table_name='voice_files')
+    op.drop_index('ix_voice_analysis_file_sentiment', table_name='voice_analysis')
+    op.drop_index('ix_voice_analysis_category_time', table_name='voice_analysis')
+    op.drop_index('ix_voice_analysis_sentiment_time', table_name='voice_analysis')
+    op.drop_index('ix_voice_analysis_time_id', table_name='voice_analysis')
@@ -0,0 +1,50 @@
+"""Add voice file fingerprints for duplicate upload detection
+
+Revision ID: 8d41f0c27a6e
+Revises: 5c2e9a7d41b3
+Create Date: 2025-08-11 15:02:37.804512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f0c27a6e'
+down_revision: Union[str, None] = '5c2e9a7d41b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.create_table('voice_file_fingerprints',
+    sa.Column('file_id', sa.String(length=50), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('acoustic_hash', sa.String(length=16), nullable=True),
+    sa.Column('band_0', sa.Integer(), nullable=True),
+    sa.Column('band_1', sa.Integer(), nullable=True),
+    sa.Column('band_2', sa.Integer(), nullable=True),
+    sa.Column('band_3', sa.Integer(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['voice_files.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('file_id')
+    )
+    op.create_index(op.f('ix_voice_file_fingerprints_content_hash'), 'voice_file_fingerprints', ['content_hash'], unique=False)
+    op.create_index(op.f('ix_voice_file_fingerprints_band_0'), 'voice_file_fingerprints', ['band_0'], unique=False)
+    op.create_index(op.f('ix_voice_file_fingerprints_band_1'), 'voice_file_fingerprints', ['band_1'], unique=False)
+    op.create_index(op.f('ix_voice_file_fingerprints_band_2'), 'voice_file_fingerprints', ['band_2'], unique=False)
+    op.create_index(op.f('ix_voice_file_fingerprints_band_3'), 'voice_file_fingerprints', ['band_3'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index(op.f('ix_voice_file_fingerprints_band_3'), table_name='voice_file_fingerprints')
+    op.drop_index(op.f('ix_voice_file_fingerprints_band_2'), table_name='voice_file_fingerprints')
+    op.drop_index(op.f('ix_voice_file_fingerprints_band_1'), table_name='voice_file_fingerprints')
+    op.drop_index(op.f('ix_voice_file_fingerprints_band_0'), table_name='voice_file_fingerprints')
+    op.drop_index(op.f('ix_voice_file_fingerprints_content_hash'), table_name='voice_file_fingerprints')
+    op.drop_table('voice_file_fingerprints')
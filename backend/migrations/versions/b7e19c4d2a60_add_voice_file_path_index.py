@@ -0,0 +1,29 @@
+"""Add an index on voice_files.file_path for content-addressed storage references
+
+Revision ID: b7e19c4d2a60
+Revises: 8d41f0c27a6e
+Create Date: 2025-08-13 09:41:12.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e19c4d2a60'
+down_revision: Union[str, None] = '8d41f0c27a6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Files with identical content share one stored file; its references are the rows with its path
+    op.create_index('ix_voice_files_file_path', 'voice_files', ['file_path'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('ix_voice_files_file_path', table_name='voice_files')
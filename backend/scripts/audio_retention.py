@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+錄音檔保存週期
+Transcode (Opus/FLAC) or move to cold storage the recordings analyzed more
+than AUDIO_RETENTION_DAYS ago, then remove the originals no record needs.
+
+Records still being analyzed keep the original until they are done.
+Meant to run nightly from cron.
+
+Usage:
+    python scripts/audio_retention.py --dry-run
+    python scripts/audio_retention.py --action opus --days 30
+    python scripts/audio_retention.py --action cold
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.retention_service import RETENTION_ACTIONS, RetentionService
+from app.services.storage_service import deletion_queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcode or archive analyzed recordings")
+    parser.add_argument(
+        "--action", choices=RETENTION_ACTIONS, default=settings.AUDIO_RETENTION_ACTION or None,
+        help="Codec to transcode to, or cold to move files to AUDIO_COLD_DIR (default AUDIO_RETENTION_ACTION)"
+    )
+    parser.add_argument(
+        "--days", type=int, default=settings.AUDIO_RETENTION_DAYS,
+        help="Minimum days since analysis"
+    )
+    parser.add_argument("--workers", type=int, default=settings.AUDIO_RETENTION_WORKERS, help="Files processed in parallel")
+    parser.add_argument("--batch-size", type=int, default=500, help="Records per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the files that would be processed")
+    args = parser.parse_args()
+
+    if not args.action:
+        print("未設定 AUDIO_RETENTION_ACTION，請以 --action 指定")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        report = RetentionService(db).run(
+            action=args.action, older_than_days=args.days, batch_size=args.batch_size,
+            workers=args.workers, dry_run=args.dry_run
+        )
+    finally:
+        db.close()
+
+    if args.dry_run:
+        print(f"符合條件的記錄: {report.files} 筆 ({report.bytes_before} bytes)")
+        return
+
+    removed = deletion_queue.drain()
+    print(f"符合條件的記錄: {report.files} 筆")
+    print(f"已處理檔案: {report.stored_files} 個，未縮小而保留: {report.skipped_files} 個，失敗: {len(report.failed)} 個")
+    for failure in report.failed:
+        print(f"  {failure['path']}: {failure['reason']}")
+    print(f"容量: {report.bytes_before} -> {report.bytes_after} bytes (節省 {report.saved_bytes} bytes)")
+    print(f"已移除原始檔案: {removed}")
+
+
+if __name__ == "__main__":
+    main()
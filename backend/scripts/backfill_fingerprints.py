@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+補建檔案指紋
+Hash and fingerprint files uploaded before duplicate detection.
+
+Run once after deploying duplicate detection so re-uploads of older files
+are recognized. Duplicates already in the database are listed but left in
+place; review them before removing any.
+
+Usage:
+    python scripts/backfill_fingerprints.py
+    python scripts/backfill_fingerprints.py --batch-size 500
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.duplicate_service import DuplicateService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint existing uploads and list duplicates")
+    parser.add_argument("--batch-size", type=int, default=100, help="Files loaded per query")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count, duplicates = DuplicateService(db).backfill(batch_size=args.batch_size)
+        print(f"已建立 {count} 個檔案指紋，耗時 {time.perf_counter() - started:.1f} 秒")
+
+        if duplicates:
+            print(f"\n發現 {len(duplicates)} 個重複檔案:")
+            for file_id, earlier_id, match_type in duplicates:
+                print(f"  {file_id} -> {earlier_id} ({match_type})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
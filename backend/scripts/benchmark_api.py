@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark the main dashboard API endpoints.
+API 效能基準測試：回報 p50/p95/p99 延遲與吞吐量
+
+Each scenario is fired at a fixed concurrency for a fixed number of requests
+after a short warm-up. Results can be saved as JSON and compared against an
+earlier run to track the effect of every performance change.
+
+Usage:
+    python scripts/benchmark_api.py --base-url http://localhost:8000 \\
+        --email admin@chimei.com --password admin123 --requests 200 --concurrency 8
+    python scripts/benchmark_api.py --output after.json --baseline before.json
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+# (name, path, query params)
+SCENARIOS = [
+    ("dashboard", "/api/data/dashboard", {}),
+    ("analysis", "/api/data/analysis", {"page": 1, "page_size": 20}),
+    ("analysis_filtered", "/api/data/analysis", {
+        "page": 1,
+        "page_size": 20,
+        "sentiments": ["negative"],
+        "feedback_categories": ["物流配送", "包裝問題"],
+    }),
+    ("analysis_date_range", "/api/data/analysis", {
+        "page": 1,
+        "page_size": 20,
+        "start_date": (datetime.utcnow() - timedelta(days=30)).isoformat(),
+        "end_date": datetime.utcnow().isoformat(),
+    }),
+    ("analysis_deep_page", "/api/data/analysis", {"page": 500, "page_size": 20}),
+    ("analysis_cursor", "/api/data/analysis", {"cursor": "", "page_size": 20}),
+    ("analysis_page_100", "/api/data/analysis", {"page": 1, "page_size": 100}),
+    ("export", "/api/data/export", {"format": "csv"}),
+    ("files", "/api/files/", {"page": 1, "page_size": 20}),
+    ("files_completed", "/api/files/", {"page": 1, "page_size": 20, "status": "completed"}),
+    ("time_series", "/api/data/time-series", {
+        "product_names": ["水餃", "包子"],
+        "sentiments": ["positive", "negative"],
+        "time_period": "month",
+    }),
+]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    """Log in and return a bearer token."""
+    response = requests.post(f"{base_url}/api/auth/login", json={"email": email, "password": password}, timeout=30)
+    response.raise_for_status()
+    return response.json()["data"]["token"]
+
+
+def run_scenario(session: requests.Session, base_url: str, path: str, params: dict,
+                 total: int, concurrency: int, warmup: int) -> dict:
+    """Run one scenario and return its latency statistics."""
+    url = f"{base_url}{path}"
+
+    def call(_):
+        started = time.perf_counter()
+        try:
+            response = session.get(url, params=params, timeout=120)
+            ok = response.status_code < 400
+            # Bytes on the wire: compressed responses report their encoded length
+            size = int(response.headers.get("content-length", len(response.content)))
+        except requests.RequestException:
+            ok, size = False, 0
+        return (time.perf_counter() - started) * 1000, ok, size
+
+    for i in range(warmup):
+        call(i)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(total)))
+    wall = time.perf_counter() - wall_started
+
+    latencies = sorted(latency for latency, ok, _ in results if ok)
+    errors = sum(1 for _, ok, _ in results if not ok)
+    sizes = [size for _, ok, size in results if ok]
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "avg_bytes": int(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+def print_report(results: dict, baseline: dict = None):
+    """Print a results table, with p95 change against a baseline when given."""
+    header = f"{'scenario':<22}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'err':>6}{'bytes':>10}"
+    if baseline:
+        header += f"{'Δp95':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for name, stats in results.items():
+        line = (
+            f"{name:<22}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+            f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}{stats['errors']:>6}{stats['avg_bytes']:>10}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous and previous.get("p95_ms"):
+            change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"{change:>+9.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard API endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API server base URL")
+    parser.add_argument("--email", default="admin@chimei.com", help="Login email")
+    parser.add_argument("--password", default="admin123", help="Login password")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up requests per scenario")
+    parser.add_argument("--scenario", action="append", help="Only run the named scenario (repeatable)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a JSON file from an earlier run")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {login(base_url, args.email, args.password)}"
+    # Keep enough pooled connections for every client thread
+    adapter = requests.adapters.HTTPAdapter(pool_connections=args.concurrency, pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    selected = [s for s in SCENARIOS if not args.scenario or s[0] in args.scenario]
+    if not selected:
+        print(f"Unknown scenario. Available: {', '.join(s[0] for s in SCENARIOS)}")
+        sys.exit(1)
+
+    results = {}
+    for name, path, params in selected:
+        print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...", flush=True)
+        results[name] = run_scenario(session, base_url, path, params, args.requests, args.concurrency, args.warmup)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print()
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": datetime.utcnow().isoformat(),
+                "base_url": base_url,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization and compression.
+回應序列化與壓縮基準測試：比較 JSON 編碼耗時與傳輸位元組
+
+Builds a large export-sized payload (10k analysis rows, as the JSON export
+used to return) and a list endpoint page, then
+times the standard JSONResponse against the orjson-based response class and
+measures the body size raw, gzipped and brotli-compressed with the
+configured levels. No server or database is needed.
+
+Usage:
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --export-rows 10000 --page-size 100 --repeat 20
+"""
+import argparse
+import gzip
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.models.analysis import SentimentType
+from app.schemas.analysis import AnalysisListItem
+from app.schemas.common import PaginatedResponse
+from app.utils.responses import FastJSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRODUCTS = ["水餃", "包子", "燒賣", "鍋貼", "饅頭", "蔥油餅"]
+CATEGORIES = ["產品品質", "物流配送", "包裝問題", "客服態度", "價格反饋"]
+TRANSCRIPT = "客戶表示上週購買的冷凍水餃在運送過程中退冰，收到時包裝已經破損，希望能夠退換貨並了解後續處理流程。"
+
+
+def export_payload(rows: int) -> dict:
+    """Bulk payload of export rows, as the JSON version of GET /api/data/export returned."""
+    base = datetime(2025, 1, 1)
+    data = [
+        {
+            "分析ID": str(uuid.uuid4()),
+            "文件名": f"call_{i:06d}.wav",
+            "產品名稱": f'["{random.choice(PRODUCTS)}"]',
+            "情緒傾向": random.choice(list(SentimentType)).value,
+            "反饋分類": random.choice(CATEGORIES),
+            "反饋摘要": "客戶反映產品問題並要求處理",
+            "上傳者": "客服人員",
+            "分析時間": (base + timedelta(minutes=i)).isoformat(),
+            "轉錄內容": TRANSCRIPT[:100] + "...",
+        }
+        for i in range(rows)
+    ]
+    return {
+        "format": "csv",
+        "total_records": len(data),
+        "export_time": datetime.utcnow().isoformat(),
+        "data": data,
+        "message": "Data exported successfully in csv format",
+    }
+
+
+def list_payload(page_size: int) -> dict:
+    """Payload shaped like a GET /api/data/analysis page, encoded as FastAPI does for response models."""
+    base = datetime(2025, 1, 1)
+    items = [
+        AnalysisListItem(
+            id=str(uuid.uuid4()),
+            file_id=str(uuid.uuid4()),
+            sentiment=random.choice(list(SentimentType)),
+            feedback_category=random.choice(CATEGORIES),
+            feedback_summary="客戶反映產品問題並要求處理",
+            product_names=[random.choice(PRODUCTS)],
+            transcript_preview=TRANSCRIPT[:settings.TRANSCRIPT_PREVIEW_LENGTH],
+            analysis_time=base + timedelta(minutes=i),
+            created_at=base + timedelta(minutes=i),
+            filename=f"call_{i:06d}.wav",
+            uploader_name="客服人員",
+            upload_time=base + timedelta(minutes=i),
+        )
+        for i in range(page_size)
+    ]
+    page = PaginatedResponse.create(items=items, total=1_000_000, page=1, page_size=page_size)
+    return jsonable_encoder(page)
+
+
+def time_render(response_class, content, repeat: int) -> float:
+    """Median time in milliseconds to render content with a response class."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response_class(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure(name: str, content: dict, repeat: int) -> dict:
+    """Serialization time and body sizes for one payload."""
+    body = FastJSONResponse(content).body
+    return {
+        "name": name,
+        "stdlib_ms": time_render(JSONResponse, content, repeat),
+        "fast_ms": time_render(FastJSONResponse, content, repeat),
+        "raw_bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=settings.GZIP_LEVEL)),
+        "brotli_bytes": len(brotli.compress(body, quality=settings.BROTLI_QUALITY)) if brotli else None,
+    }
+
+
+def print_report(results: list):
+    """Print timing and size columns for every payload."""
+    header = (
+        f"{'payload':<16}{'json ms':>10}{'fast ms':>10}{'speedup':>9}"
+        f"{'raw KB':>10}{'gzip KB':>10}{'br KB':>10}{'saved':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        compressed = r["brotli_bytes"] if r["brotli_bytes"] is not None else r["gzip_bytes"]
+        br = f"{r['brotli_bytes'] / 1024:>10.1f}" if r["brotli_bytes"] is not None else f"{'-':>10}"
+        print(
+            f"{r['name']:<16}{r['stdlib_ms']:>10.2f}{r['fast_ms']:>10.2f}"
+            f"{r['stdlib_ms'] / r['fast_ms']:>8.1f}x"
+            f"{r['raw_bytes'] / 1024:>10.1f}{r['gzip_bytes'] / 1024:>10.1f}{br}"
+            f"{(1 - compressed / r['raw_bytes']) * 100:>7.0f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization and compression")
+    parser.add_argument("--export-rows", type=int, default=10000, help="Rows in the export payload")
+    parser.add_argument("--page-size", type=int, default=100, help="Items in the list page payload")
+    parser.add_argument("--repeat", type=int, default=20, help="Renders per measurement (median is reported)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    if FastJSONResponse is JSONResponse:
+        print("orjson is not installed; both columns use the standard library encoder\n")
+
+    results = [
+        measure(f"export ({args.export_rows})", export_payload(args.export_rows), args.repeat),
+        measure(f"list ({args.page_size})", list_payload(args.page_size), args.repeat),
+    ]
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
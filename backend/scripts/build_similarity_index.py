@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+建立相似通話索引
+Embed analyses that have no vector yet and retrain the IVF index.
+
+Run once after deploying similarity search, after changing EMBEDDING_MODEL
+(with --rebuild), and periodically as the number of calls grows so the
+inverted lists stay balanced. Retraining holds the index's write lock;
+run it off-peak on large stores.
+
+Usage:
+    python scripts/build_similarity_index.py
+    python scripts/build_similarity_index.py --rebuild --nlist 4096
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.similarity_service import SimilarityService
+from app.utils.vector_index import vector_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed analyses and train the similarity index")
+    parser.add_argument("--rebuild", action="store_true", help="Clear the store and embed every analysis")
+    parser.add_argument("--batch-size", type=int, default=256, help="Analyses embedded per batch")
+    parser.add_argument("--nlist", type=int, default=None, help="Inverted lists (default: about 4 * sqrt(count))")
+    parser.add_argument("--skip-train", action="store_true", help="Only embed missing analyses")
+    args = parser.parse_args()
+
+    if vector_index is None:
+        print(f"無法開啟向量索引: {settings.EMBEDDING_DIR}")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = SimilarityService(db).backfill(batch_size=args.batch_size, rebuild=args.rebuild)
+        print(f"已向量化 {count} 筆分析結果，耗時 {time.perf_counter() - started:.1f} 秒")
+    finally:
+        db.close()
+
+    if not args.skip_train:
+        started = time.perf_counter()
+        nlist = vector_index.train(nlist=args.nlist)
+        if nlist:
+            print(f"索引訓練完成: {nlist} 個列表，耗時 {time.perf_counter() - started:.1f} 秒")
+        else:
+            print("向量數量較少，使用精確搜索，無需訓練")
+
+    print(vector_index.info())
+
+
+if __name__ == "__main__":
+    main()
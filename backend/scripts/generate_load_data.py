@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Generate production-scale synthetic data for performance testing.
+批量生成壓力測試用的語音文件與分析數據
+
+Rows are written with executemany-style bulk INSERTs in batches, bypassing the
+ORM unit of work, so a million files can be seeded in minutes.
+
+Usage:
+    python scripts/generate_load_data.py --files 1000000
+    python scripts/generate_load_data.py --clear
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, delete, select
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.file import VoiceFile, FileStatus, FileFormat
+from app.models.analysis import VoiceAnalysis, SentimentType
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Generated files live under this path so they can be told apart and cleared
+LOAD_PATH_PREFIX = "./storage/loadtest/"
+
+# (value, weight) pairs; a few products and categories dominate like real call logs
+PRODUCTS = [
+    ("水餃", 30), ("包子", 22), ("湯圓", 12), ("饅頭", 10), ("鍋貼", 8), ("餛飩", 6),
+    ("湯包", 5), ("燒餅", 3), ("餡餅", 2), ("春捲", 1.5), ("年糕", 1), ("蒸餃", 0.5),
+]
+CATEGORIES = [
+    ("口味研發", 28), ("物流配送", 20), ("包裝問題", 14), ("客服諮詢", 12), ("保存方式", 8),
+    ("調理方式", 6), ("退換貨", 5), ("活動價惠", 4), ("營養成分", 3),
+]
+SENTIMENTS = [(SentimentType.POSITIVE, 45), (SentimentType.NEUTRAL, 35), (SentimentType.NEGATIVE, 20)]
+STATUSES = [(FileStatus.COMPLETED, 94), (FileStatus.FAILED, 3), (FileStatus.PENDING, 2), (FileStatus.ANALYZING, 1)]
+FORMATS = [(FileFormat.WAV, 60), (FileFormat.MP3, 38), (FileFormat.TXT, 2)]
+# Number of products mentioned in one call
+PRODUCT_COUNTS = [(0, 8), (1, 70), (2, 18), (3, 4)]
+
+TRANSCRIPT_TEMPLATES = {
+    SentimentType.POSITIVE: "你好，我上週買了你們的{product}，{category}方面真的很滿意，家人都很喜歡，之後會再回購。",
+    SentimentType.NEUTRAL: "請問一下{product}的{category}是怎麼處理的？我想先了解清楚再決定要不要訂購。",
+    SentimentType.NEGATIVE: "我對這次的{product}很失望，{category}有問題，希望你們可以盡快處理並給我一個說法。",
+}
+
+
+def _weighted(rng: random.Random, choices: list):
+    """Draw one value from (value, weight) pairs."""
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+def _build_batch(rng: random.Random, size: int, user_ids: list, start: datetime, span_seconds: int, offset: int):
+    """Build one batch of file and analysis rows."""
+    files, analyses = [], []
+    product_values, product_weights = zip(*PRODUCTS)
+
+    for i in range(size):
+        file_id = str(uuid.uuid4())
+        file_format = _weighted(rng, FORMATS)
+        status = _weighted(rng, STATUSES)
+        created_at = start + timedelta(seconds=rng.randrange(span_seconds))
+
+        files.append({
+            "id": file_id,
+            "filename": f"{file_id}.{file_format.value}",
+            "original_filename": f"客服電話_{offset + i:07d}.{file_format.value}",
+            "file_path": f"{LOAD_PATH_PREFIX}{file_id}.{file_format.value}",
+            "file_size": rng.randint(200_000, 8_000_000) if file_format != FileFormat.TXT else rng.randint(200, 4000),
+            "file_format": file_format,
+            "duration": round(rng.uniform(20, 600), 1) if file_format != FileFormat.TXT else None,
+            "status": status,
+            "uploaded_by": rng.choice(user_ids),
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+
+        if status != FileStatus.COMPLETED:
+            continue
+
+        count = _weighted(rng, PRODUCT_COUNTS)
+        products = list(dict.fromkeys(rng.choices(product_values, weights=product_weights, k=count)))
+        sentiment = _weighted(rng, SENTIMENTS)
+        category = _weighted(rng, CATEGORIES)
+        analysis_time = created_at + timedelta(seconds=rng.randint(30, 900))
+        transcript = TRANSCRIPT_TEMPLATES[sentiment].format(product="、".join(products) or "產品", category=category)
+
+        analyses.append({
+            "id": str(uuid.uuid4()),
+            "file_id": file_id,
+            "transcript": transcript * rng.randint(1, 6),
+            "sentiment": sentiment,
+            "feedback_category": category,
+            "feedback_summary": f"客戶反映{'、'.join(products) or '產品'}的{category}",
+            # Same encoding as AnalysisService stores it
+            "product_names": json.dumps(products, ensure_ascii=False) if products else None,
+            "analysis_time": analysis_time,
+            "created_at": analysis_time,
+        })
+
+    return files, analyses
+
+
+def generate_load_data(total_files: int, batch_size: int, days: int, seed: int):
+    """批量生成語音文件與分析數據"""
+    db = SessionLocal()
+    rng = random.Random(seed)
+
+    try:
+        user_ids = [row.id for row in db.execute(select(User.id).where(User.is_active == True))]
+        if not user_ids:
+            logger.error("No active users found. Please run init_db.py first.")
+            return
+
+        end = datetime.utcnow()
+        start = end - timedelta(days=days)
+        span_seconds = days * 24 * 3600
+
+        started = time.perf_counter()
+        inserted_files = inserted_analyses = 0
+
+        for offset in range(0, total_files, batch_size):
+            size = min(batch_size, total_files - offset)
+            files, analyses = _build_batch(rng, size, user_ids, start, span_seconds, offset)
+
+            db.execute(insert(VoiceFile), files)
+            if analyses:
+                db.execute(insert(VoiceAnalysis), analyses)
+            db.commit()
+
+            inserted_files += len(files)
+            inserted_analyses += len(analyses)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"{inserted_files}/{total_files} files, {inserted_analyses} analyses "
+                f"({inserted_files / elapsed:.0f} files/s)"
+            )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Generated {inserted_files} files and {inserted_analyses} analyses in {elapsed:.1f}s"
+        )
+
+    except Exception as e:
+        logger.error(f"Error generating load data: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def clear_load_data(batch_size: int):
+    """清除壓力測試數據"""
+    db = SessionLocal()
+
+    try:
+        removed = 0
+        while True:
+            file_ids = [
+                row.id for row in db.execute(
+                    select(VoiceFile.id)
+                    .where(VoiceFile.file_path.like(f"{LOAD_PATH_PREFIX}%"))
+                    .limit(batch_size)
+                )
+            ]
+            if not file_ids:
+                break
+
+            db.execute(delete(VoiceAnalysis).where(VoiceAnalysis.file_id.in_(file_ids)))
+            db.execute(delete(VoiceFile).where(VoiceFile.id.in_(file_ids)))
+            db.commit()
+            removed += len(file_ids)
+            logger.info(f"Removed {removed} load test files")
+
+        logger.info(f"Load test data cleared ({removed} files)")
+
+    except Exception as e:
+        logger.error(f"Error clearing load data: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic voice files and analysis for load testing")
+    parser.add_argument("--files", type=int, default=1_000_000, help="Number of voice files to generate")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk INSERT")
+    parser.add_argument("--days", type=int, default=365, help="Spread records over this many past days")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for repeatable data sets")
+    parser.add_argument("--clear", action="store_true", help="Remove previously generated load test data")
+
+    args = parser.parse_args()
+
+    if args.clear:
+        clear_load_data(args.batch_size)
+    else:
+        generate_load_data(args.files, args.batch_size, args.days, args.seed)
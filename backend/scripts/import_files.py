@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+批量匯入錄音檔
+Import recordings from a directory or a zip/tar archive on this server.
+
+Files whose content was already imported are skipped, so a nightly dump
+can be imported again safely. Imported files are PENDING; add --analyze to
+analyze them here, one after another, once the import finishes.
+
+Usage:
+    python scripts/import_files.py /data/dumps/2025-08-01 --user admin@chimei.com
+    python scripts/import_files.py /data/dumps/2025-08-01.tar.gz --user admin@chimei.com --workers 8 --analyze
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.import_service import ImportService, analyze_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import recordings from a directory or archive")
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz/.bz2/.xz) archive")
+    parser.add_argument("--user", required=True, help="Email of the user recorded as uploader")
+    parser.add_argument("--workers", type=int, default=settings.IMPORT_WORKERS, help="Hashing and copying threads")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE, help="Files inserted per commit")
+    parser.add_argument("--analyze", action="store_true", help="Analyze the imported files after importing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == args.user).first()
+        if not user:
+            print(f"找不到用戶: {args.user}")
+            sys.exit(1)
+
+        try:
+            report = ImportService(db, workers=args.workers, batch_size=args.batch_size).import_path(args.source, user.id)
+        except (OSError, ValueError) as e:
+            print(f"匯入失敗: {e}")
+            sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"共 {report.total_files} 個檔案: 匯入 {report.imported_count}，"
+          f"已存在略過 {report.skipped_count}，失敗 {report.failed_count}")
+    print(f"耗時 {report.elapsed_seconds} 秒，{report.files_per_second} 檔/秒，{report.megabytes_per_second} MB/秒")
+    for failure in report.failed:
+        print(f"  失敗: {failure['name']} - {failure['reason']}")
+
+    if args.analyze and report.file_ids:
+        print(f"開始分析 {len(report.file_ids)} 個檔案...")
+        analyze_files(report.file_ids)
+
+
+if __name__ == "__main__":
+    main()
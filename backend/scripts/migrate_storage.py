@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+遷移上傳檔案至內容定址儲存
+Move uploads stored as UPLOAD_DIR/{uuid}{ext} into the content-addressed
+layout UPLOAD_DIR/ab/cd/{sha256}{ext}, merging files with identical content.
+
+Safe to interrupt and run again: records are only pointed at a new path
+once the file is there, and old files are removed after the commit.
+
+Usage:
+    python scripts/migrate_storage.py --dry-run
+    python scripts/migrate_storage.py --batch-size 1000
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.storage_service import StorageService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move uploads into the content-addressed storage layout")
+    parser.add_argument("--batch-size", type=int, default=500, help="Records updated per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the files that would move")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = StorageService(db).migrate_to_content_store(batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    if args.dry_run:
+        print(f"舊格式檔案: {report.total_files} 個")
+        return
+
+    print(f"舊格式檔案: {report.total_files} 個，已遷移 {report.moved_files}，"
+          f"內容相同合併 {report.deduplicated_files}（節省 {report.saved_bytes} bytes）")
+    print(f"檔案遺失: {len(report.missing_file_ids)} 筆，失敗: {len(report.failed)} 筆")
+    for failure in report.failed:
+        print(f"  失敗: {failure['id']} - {failure['reason']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+重建全文搜索索引
+Rebuild the transcript full-text index from the database.
+
+Run once after deploying full-text search, and whenever the index may have
+missed writes (bulk SQL updates, scripts that bypass the API, a lost index
+file). The index is cleared first, so searches return partial results until
+the rebuild finishes.
+
+Usage:
+    python scripts/rebuild_search_index.py
+    python scripts/rebuild_search_index.py --batch-size 2000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.search_service import SearchService
+from app.utils.search_index import search_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the transcript full-text index")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Analyses indexed per transaction")
+    args = parser.parse_args()
+
+    if search_index is None:
+        print(f"無法開啟搜索索引: {settings.SEARCH_INDEX_PATH}")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = SearchService(db).rebuild_index(batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"已索引 {count} 筆分析結果，耗時 {elapsed:.1f} 秒 ({settings.SEARCH_INDEX_PATH})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
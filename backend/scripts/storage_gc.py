@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+儲存空間清理
+Remove queued deleted files and reconcile UPLOAD_DIR (and AUDIO_COLD_DIR)
+with the file records.
+
+Files in UPLOAD_DIR that no record points to (older than
+STORAGE_GC_GRACE_SECONDS) are removed. Records whose file is missing are
+listed; add --delete-missing to delete them together with their analyses.
+
+Usage:
+    python scripts/storage_gc.py --dry-run
+    python scripts/storage_gc.py
+    python scripts/storage_gc.py --delete-missing
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.storage_service import StorageService, deletion_queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove deleted and orphaned files from storage")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    parser.add_argument("--delete-missing", action="store_true", help="Delete records whose file is missing")
+    parser.add_argument(
+        "--grace-seconds", type=int, default=settings.STORAGE_GC_GRACE_SECONDS,
+        help="Minimum age of a file without a record before it is removed"
+    )
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        removed = deletion_queue.drain()
+        print(f"已移除佇列中的刪除檔案: {removed}")
+
+    db = SessionLocal()
+    try:
+        report = StorageService(db).sweep(
+            delete_missing=args.delete_missing, dry_run=args.dry_run, grace_seconds=args.grace_seconds
+        )
+    finally:
+        db.close()
+
+    action = "將移除" if args.dry_run else "已移除"
+    print(f"無記錄的檔案: {len(report.orphaned_files)} 個 ({report.orphaned_bytes} bytes)，{action}")
+    for path in report.orphaned_files:
+        print(f"  {path}")
+    print(f"檔案遺失的記錄: {len(report.missing_file_ids)} 筆，已刪除 {report.deleted_records} 筆")
+    for file_id in report.missing_file_ids:
+        print(f"  {file_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ export interface AnalysisResponse {
   id: string
   file_id: string
   filename?: string
-  transcript: string
+  transcript?: string  // 列表接口只返回 transcript_preview，完整內容請用詳情接口
+  transcript_preview?: string
   sentiment: SentimentType
   feedback_category: string
   feedback_summary: string
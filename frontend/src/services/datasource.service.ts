@@ -3,10 +3,26 @@ import type {
   DataSourceFilter, 
   DataSourceListResponse,
   SortConfig,
-  FileAnalysisResult 
+  FileAnalysisResult,
+  ChunkedUploadState,
+  UploadResult
 } from '@/types/datasource'
 import api from './api'
 
+// 分段上傳：同時上傳的分段數與單一分段的重試次數
+const CHUNK_CONCURRENCY = 4
+const CHUNK_RETRIES = 3
+const RESUME_KEY_PREFIX = 'chunked-upload:'
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms))
+
+// 分段的 SHA-256（僅在安全環境 https/localhost 可用，否則由後端只檢查大小）
+const sha256Hex = async (blob: Blob): Promise<string | undefined> => {
+  if (!globalThis.crypto?.subtle) return undefined
+  const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer())
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('')
+}
+
 class DataSourceService {
   private baseURL = '/files'
 
@@ -125,6 +141,96 @@ class DataSourceService {
     }
   }
 
+  // 分段上传文件（可續傳）：分段並行上傳、失敗自動重試，中斷後重新上傳同一檔案只補傳缺少的分段
+  async uploadFileChunked(
+    file: File,
+    onProgress?: (progress: number) => void
+  ): Promise<UploadResult> {
+    const resumeKey = `${RESUME_KEY_PREFIX}${file.name}:${file.size}:${file.lastModified}`
+    let upload: ChunkedUploadState | null = null
+
+    // 續傳先前中斷的上傳
+    const previousId = localStorage.getItem(resumeKey)
+    if (previousId) {
+      try {
+        upload = (await api.get(`${this.baseURL}/uploads/${previousId}`)).data
+      } catch {
+        localStorage.removeItem(resumeKey)
+      }
+    }
+    if (!upload) {
+      upload = (await api.post(`${this.baseURL}/uploads`, { filename: file.name, file_size: file.size })).data
+      localStorage.setItem(resumeKey, upload!.upload_id)
+    }
+
+    const state = upload!
+    const received = new Set(state.received_chunks)
+    const pending = Array.from({ length: state.total_chunks }, (_, i) => i).filter(i => !received.has(i))
+    const loaded = new Map<number, number>()
+    const reportProgress = () => {
+      if (!onProgress) return
+      let bytes = 0
+      received.forEach(i => { bytes += Math.min(state.chunk_size, file.size - i * state.chunk_size) })
+      loaded.forEach(value => { bytes += value })
+      onProgress(Math.min(99, Math.round((bytes / file.size) * 100)))
+    }
+
+    const uploadChunk = async (index: number) => {
+      const blob = file.slice(index * state.chunk_size, Math.min(file.size, (index + 1) * state.chunk_size))
+      const checksum = await sha256Hex(blob)
+      for (let attempt = 0; ; attempt++) {
+        try {
+          await api.put(`${this.baseURL}/uploads/${state.upload_id}/chunks/${index}`, blob, {
+            headers: {
+              'Content-Type': 'application/octet-stream',
+              ...(checksum ? { 'X-Chunk-SHA256': checksum } : {})
+            },
+            timeout: 120000,
+            onUploadProgress: (progressEvent) => {
+              loaded.set(index, progressEvent.loaded)
+              reportProgress()
+            }
+          })
+          loaded.delete(index)
+          received.add(index)
+          reportProgress()
+          return
+        } catch (error: any) {
+          loaded.delete(index)
+          // 4xx（上傳過期、權限不足等）重試無用
+          const status = error.response?.status
+          if (attempt >= CHUNK_RETRIES || (status && status < 500 && status !== 408 && status !== 429)) {
+            throw error
+          }
+          await sleep(1000 * 2 ** attempt)
+        }
+      }
+    }
+
+    try {
+      const workers = Array.from({ length: Math.min(CHUNK_CONCURRENCY, pending.length) }, async () => {
+        while (pending.length) {
+          await uploadChunk(pending.shift()!)
+        }
+      })
+      await Promise.all(workers)
+
+      const response = await api.post(`${this.baseURL}/uploads/${state.upload_id}/complete`, null, {
+        timeout: 300000
+      })
+      localStorage.removeItem(resumeKey)
+      onProgress?.(100)
+      return response.data
+    } catch (error: any) {
+      // 上傳已過期或不存在時，下次從頭開始
+      if (error.response?.status === 404) {
+        localStorage.removeItem(resumeKey)
+      }
+      console.error('Failed to upload file in chunks:', error)
+      throw error
+    }
+  }
+
   // 批量上传文件
   async uploadFiles(
     files: File[], 
@@ -6,6 +6,7 @@ export interface AnalysisResult {
   feedback_summary?: string
   product_names?: string[]
   transcript?: string
+  transcript_preview?: string
 }
 
 export interface DataSourceItem {
@@ -69,6 +70,23 @@ export interface UploadOptions {
   notifyOnComplete: boolean
 }
 
+export interface ChunkedUploadState {
+  upload_id: string
+  filename: string
+  file_size: number
+  chunk_size: number
+  total_chunks: number
+  received_chunks: number[]
+}
+
+export interface UploadResult {
+  file_id: string
+  filename: string
+  message: string
+  duplicate: boolean
+  match_type: 'exact' | 'acoustic' | null
+}
+
 export interface UploadRequest {
   file: File
   options: UploadOptions